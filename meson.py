@@ -13,13 +13,13 @@ if sys.version_info < (3, 7):
     print('Please update your environment')
     sys.exit(1)
 
-from pathlib import Path
+import os
 
 # If we're run uninstalled, add the script directory to sys.path to ensure that
 # we always import the correct mesonbuild modules even if PYTHONPATH is mangled
-meson_exe = Path(sys.argv[0]).resolve()
-if (meson_exe.parent / 'mesonbuild').is_dir():
-    sys.path.insert(0, str(meson_exe.parent))
+meson_dir = os.path.dirname(os.path.realpath(sys.argv[0]))
+if os.path.isdir(os.path.join(meson_dir, 'mesonbuild')):
+    sys.path.insert(0, meson_dir)
 
 from mesonbuild import mesonmain
 
@@ -108,11 +108,24 @@ class CompilerArgs(T.MutableSequence[str]):
         self.pre: T.Deque[str] = collections.deque()
         self.post: T.List[str] = []
         self.needs_override_check: bool = False
+        # The distinct arguments in _container, pre and post, so that UNIQUE
+        # arguments can be looked up in constant time. It is built lazily,
+        # and dropped when arguments are replaced or deleted.
+        self._members: T.Optional[T.Set[str]] = None
+
+    def _get_members(self) -> T.Set[str]:
+        if self._members is None:
+            self._members = set(self._container)
+            self._members.update(self.pre)
+            self._members.update(self.post)
+        return self._members
 
     # Flush the saved pre and post list into the _container list
     #
     # This correctly deduplicates the entries after _can_dedup definition
     # Note: This function is designed to work without delete operations, as deletions are worsening the performance a lot.
+    # Deduplication only drops repeated occurrences, so the set of distinct
+    # arguments in _members stays valid.
     def flush_pre_post(self) -> None:
         if not self.needs_override_check:
             if self.pre:
@@ -182,10 +195,12 @@ class CompilerArgs(T.MutableSequence[str]):
     def __setitem__(self, index: T.Union[int, slice], value: T.Union[str, T.Iterable[str]]) -> None:  # noqa: F811
         self.flush_pre_post()
         self._container[index] = value  # type: ignore  # TODO: fix 'Invalid index type' and 'Incompatible types in assignment' errors
+        self._members = None
 
     def __delitem__(self, index: T.Union[int, slice]) -> None:
         self.flush_pre_post()
         del self._container[index]
+        self._members = None
 
     def __len__(self) -> int:
         return len(self._container) + len(self.pre) + len(self.post)
@@ -193,6 +208,8 @@ class CompilerArgs(T.MutableSequence[str]):
     def insert(self, index: int, value: str) -> None:
         self.flush_pre_post()
         self._container.insert(index, value)
+        if self._members is not None:
+            self._members.add(value)
 
     def copy(self) -> 'CompilerArgs':
         self.flush_pre_post()
@@ -259,6 +276,8 @@ class CompilerArgs(T.MutableSequence[str]):
             self.append(arg)
         else:
             self._container.append(arg)
+            if self._members is not None:
+                self._members.add(arg)
 
     def extend_direct(self, iterable: T.Iterable[str]) -> None:
         '''
@@ -302,7 +321,7 @@ class CompilerArgs(T.MutableSequence[str]):
             dedup = self._can_dedup(arg)
             if dedup is Dedup.UNIQUE:
                 # Argument already exists and adding a new instance is useless
-                if arg in self._container or arg in self.pre or arg in self.post:
+                if arg in self._get_members():
                     continue
             elif dedup is Dedup.OVERRIDDEN:
                 self.needs_override_check = True
@@ -310,7 +329,13 @@ class CompilerArgs(T.MutableSequence[str]):
                 tmp_pre.appendleft(arg)
             else:
                 self.post.append(arg)
+                if self._members is not None:
+                    self._members.add(arg)
         self.pre.extendleft(tmp_pre)
+        # Arguments to prepend are not looked up while the list is being
+        # added, they only become members now
+        if self._members is not None:
+            self._members.update(tmp_pre)
         #pre and post is going to be merged later before a iter call
         return self
 
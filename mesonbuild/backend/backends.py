@@ -16,6 +16,7 @@ import pickle
 import re
 import shlex
 import shutil
+import sys
 import typing as T
 import hashlib
 
@@ -27,7 +28,7 @@ from .. import mlog
 from ..compilers import detect, lang_suffixes
 from ..mesonlib import (
     File, MachineChoice, MesonException, MesonBugException, OrderedSet,
-    ExecutableSerialisation, EnvironmentException,
+    ExecutableSerialisation, EnvironmentException, RegenInfo,
     classify_unity_sources, get_compiler_for_source,
     get_rsp_threshold, unique_list
 )
@@ -63,12 +64,6 @@ if T.TYPE_CHECKING:
 # Assembly files cannot be unitified and neither can LLVM IR files
 LANGS_CANT_UNITY = ('d', 'fortran', 'vala', 'rust')
 
-@dataclass(eq=False)
-class RegenInfo:
-    source_dir: str
-    build_dir: str
-    depfiles: T.List[str]
-
 class TestProtocol(enum.Enum):
 
     EXITCODE = 0
@@ -211,6 +206,9 @@ class TestSerialisation:
     depends: T.List[str]
     version: str
     verbose: bool
+    cpu_cost: int
+    resources: T.List[str]
+    link_deps: T.List[str]
 
     def __post_init__(self) -> None:
         if self.exe_wrapper is not None:
@@ -394,6 +392,7 @@ class Backend:
             return os.path.join(self.build_to_src, target_dir)
         return self.build_to_src
 
+    @lru_cache(maxsize=None)
     def get_target_private_dir(self, target: build.BuildTargetTypes) -> str:
         return os.path.join(self.get_target_filename(target, warn_multi_output=False) + '.p')
 
@@ -467,6 +466,7 @@ class Backend:
         return result
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def relpath(todir: str, fromdir: str) -> str:
         return os.path.relpath(os.path.join('dummyprefixdir', todir),
                                os.path.join('dummyprefixdir', fromdir))
@@ -673,6 +673,7 @@ class Backend:
         if any(a.startswith('@') for a in es.cmd_args):
             reasons.append('because command is too long')
 
+        launcher = self.get_exe_launcher_command()
         if not force_serialize:
             if not capture and not feed:
                 return es.cmd_args, ''
@@ -682,10 +683,9 @@ class Backend:
             if feed:
                 args += ['--feed', feed]
 
-            return (
-                self.environment.get_build_command() + ['--internal', 'exe'] + args + ['--'] + es.cmd_args,
-                ', '.join(reasons)
-            )
+            if launcher is None:
+                launcher = self.environment.get_build_command() + ['--internal', 'exe']
+            return launcher + args + ['--'] + es.cmd_args, ', '.join(reasons)
 
         if isinstance(exe, (programs.ExternalProgram,
                             build.BuildTarget, build.CustomTarget)):
@@ -708,6 +708,15 @@ class Backend:
         hasher.update(bytes(str(capture), encoding='utf-8'))
         hasher.update(bytes(str(feed), encoding='utf-8'))
         digest = hasher.hexdigest()
+
+        desc = self.describe_executable(es) if launcher is not None else None
+        if desc is not None:
+            assert launcher is not None
+            exe_data = os.path.join(self.environment.get_scratch_dir(), f'meson_exe_{basename}_{digest}.json')
+            with open(exe_data, 'w', encoding='utf-8') as jf:
+                json.dump(desc, jf)
+            return launcher + ['--json', exe_data], ', '.join(reasons)
+
         scratch_file = f'meson_exe_{basename}_{digest}.dat'
         exe_data = os.path.join(self.environment.get_scratch_dir(), scratch_file)
         with open(exe_data, 'wb') as f:
@@ -715,6 +724,47 @@ class Backend:
         return (self.environment.get_build_command() + ['--internal', 'exe', '--unpickle', exe_data],
                 ', '.join(reasons))
 
+    @staticmethod
+    def get_exe_launcher_command() -> T.Optional[T.List[str]]:
+        """The command to run scripts/exe_launcher.py, which starts much
+        faster than `meson --internal exe`, or None if it cannot be run."""
+        if getattr(sys, 'frozen', False):
+            # There is no Python interpreter to run the script with
+            return None
+        launcher = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'exe_launcher.py')
+        if not os.path.isfile(launcher):
+            # e.g. in a zipapp, where the script is inside meson.pyz
+            return None
+        # -S skips importing the site module, the launcher only needs the
+        # standard library
+        return mesonlib.python_command + ['-S', launcher]
+
+    @staticmethod
+    def describe_executable(es: ExecutableSerialisation) -> T.Optional[T.Dict[str, T.Any]]:
+        """Describe es for scripts/exe_launcher.py, or return None if it needs
+        the full `meson --internal exe`."""
+        cmd_args = es.cmd_args
+        if es.exe_wrapper:
+            if not es.exe_wrapper.found():
+                return None
+            wrapper = es.exe_wrapper.get_command()
+            if es.extra_paths and any('wine' in i for i in wrapper):
+                # WINEPATH is computed by running wine
+                return None
+            cmd_args = wrapper + cmd_args
+        desc: T.Dict[str, T.Any] = {'cmd': cmd_args}
+        if es.env:
+            desc['env'] = [[method.__name__.lstrip('_'), name, values, separator]
+                           for method, name, values, separator in es.env.envvars]
+            desc['unset'] = sorted(es.env.unset_vars)
+        if es.extra_paths:
+            desc['extra_paths'] = es.extra_paths
+        for key in ('workdir', 'capture', 'feed', 'verbose'):
+            value = getattr(es, key)
+            if value:
+                desc[key] = value
+        return desc
+
     def serialize_tests(self) -> T.Tuple[str, str]:
         test_data = os.path.join(self.environment.get_scratch_dir(), 'meson_test_setup.dat')
         with open(test_data, 'wb') as datafile:
@@ -751,6 +801,7 @@ class Backend:
             fname = fname.replace(ch, '_')
         return hashed + fname
 
+    @lru_cache(maxsize=None)
     def object_filename_from_source(self, target: build.BuildTarget, compiler: Compiler, source: 'FileOrString', targetdir: T.Optional[str] = None) -> str:
         assert isinstance(source, mesonlib.File)
         if isinstance(target, build.CompileTarget):
@@ -1220,13 +1271,12 @@ class Backend:
             #    https://github.com/mesonbuild/meson/pull/11119
             # b) depends and targets passed via args.
             t_env = copy.deepcopy(t.env)
+            link_deps: T.Set[build.BuildTargetTypes] = set()
+            for d in depends:
+                if isinstance(d, build.BuildTarget):
+                    link_deps.update(d.get_all_link_deps())
             if not machine.is_windows() and not machine.is_cygwin():
-                ld_lib_path_libs: T.Set[build.SharedLibrary] = set()
-                for d in depends:
-                    if isinstance(d, build.BuildTarget):
-                        for l in d.get_all_link_deps():
-                            if isinstance(l, build.SharedLibrary):
-                                ld_lib_path_libs.add(l)
+                ld_lib_path_libs = {l for l in link_deps if isinstance(l, build.SharedLibrary)}
 
                 env_build_dir = self.environment.get_build_dir()
                 ld_lib_path: T.Set[str] = set(os.path.join(env_build_dir, l.get_subdir()) for l in ld_lib_path_libs)
@@ -1245,7 +1295,8 @@ class Backend:
                                    isinstance(exe, build.Executable),
                                    [x.get_id() for x in depends],
                                    self.environment.coredata.version,
-                                   t.verbose)
+                                   t.verbose, t.cpu_cost, t.resources,
+                                   [x.get_id() for x in link_deps])
             arr.append(ts)
         return arr
 
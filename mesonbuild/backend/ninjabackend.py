@@ -4,7 +4,7 @@
 
 from __future__ import annotations
 
-from collections import defaultdict, OrderedDict
+from collections import Counter, defaultdict, OrderedDict
 from dataclasses import dataclass
 from enum import Enum, unique
 from functools import lru_cache
@@ -58,6 +58,9 @@ FORTRAN_MODULE_PAT = r"^\s*\bmodule\b\s+(\w+)\s*(?:!+.*)*$"
 FORTRAN_SUBMOD_PAT = r"^\s*\bsubmodule\b\s*\((\w+:?\w+)\)\s*(\w+)"
 FORTRAN_USE_PAT = r"^\s*use,?\s*(?:non_intrinsic)?\s*(?:::)?\s*(\w+)"
 
+# Languages whose sources the generated header scanner understands
+HEADER_SCAN_LANGS = {'c', 'cpp', 'objc', 'objcpp', 'cuda'}
+
 def cmd_quote(arg: str) -> str:
     # see: https://docs.microsoft.com/en-us/windows/desktop/api/shellapi/nf-shellapi-commandlinetoargvw#remarks
 
@@ -103,6 +106,8 @@ raw_names = {'DEPFILE_UNQUOTED', 'DESC', 'pool', 'description', 'targetdep', 'dy
 
 NINJA_QUOTE_BUILD_PAT = re.compile(r"[$ :\n]")
 NINJA_QUOTE_VAR_PAT = re.compile(r"[$ \n]")
+# A variable reference, or an escaped character
+NINJA_EVAL_PAT = re.compile(r"\$(?:\{([\w.-]+)\}|([\w-]+)|(.))", re.DOTALL)
 
 def ninja_quote(text: str, is_build_line: bool = False) -> str:
     if '\n' in text:
@@ -119,6 +124,19 @@ Please report this error with a test case to the Meson bug tracker.'''
 
     return text
 
+# ninja quotes the paths in $in and $out itself, leaving fewer characters
+# unquoted than quote_func; see GetShellEscapedString() and
+# GetWin32EscapedString() in ninja's util.cc
+NINJA_SHELL_SAFE_PAT = re.compile(r"[A-Za-z0-9_+./-]*")
+NINJA_WIN32_SAFE_PAT = re.compile(r'[^ "]*')
+
+def ninja_path_quote(path: str) -> str:
+    if mesonlib.is_windows():
+        return path if NINJA_WIN32_SAFE_PAT.fullmatch(path) else cmd_quote(path)
+    if NINJA_SHELL_SAFE_PAT.fullmatch(path):
+        return path
+    return "'" + path.replace("'", "'\\''") + "'"
+
 
 @dataclass
 class TargetDependencyScannerInfo:
@@ -137,6 +155,24 @@ class TargetDependencyScannerInfo:
     sources: T.List[T.Tuple[str, Literal['cpp', 'fortran']]]
 
 
+@dataclass
+class TargetHeaderScannerInfo:
+
+    """Information passed to the generated header scanner about a target.
+
+    :param phony: The phony target that is built after all the generated
+        headers of the target.
+    :param generated_headers: The generated headers that the sources of the
+        target may include, relative to the build directory.
+    :param objects: The objects to scan, with their source and the include
+        directories used to compile it.
+    """
+
+    phony: str
+    generated_headers: T.List[str]
+    objects: T.List[T.Tuple[str, str, T.List[str]]]
+
+
 @unique
 class Quoting(Enum):
     both = 0
@@ -291,6 +327,41 @@ class NinjaRule:
         # determine command length
         return estimate
 
+class NinjaSharedArgs:
+
+    """Arguments common to the command lines of several build elements.
+
+    They are written once as a global ninja variable, which each user
+    references instead of repeating the arguments. Since quoting depends on
+    whether a user goes through a response file, one variable is written
+    for each quoting style needed by at least two users.
+    """
+
+    def __init__(self, name: str, args: T.List[str]) -> None:
+        self.name = name
+        self.args = args
+        self.users: T.List[NinjaBuildElement] = []
+
+    @mesonlib.lazy_property
+    def variables(self) -> T.Dict[T.Callable[[str], str], str]:
+        counts: T.Counter[T.Callable[[str], str]] = Counter(u.quote_func for u in self.users)
+        return {qf: self.name if qf is quote_func else f'{self.name}_{qf.__name__}'
+                for qf, count in counts.items() if count > 1}
+
+    @mesonlib.lazy_property
+    def command(self) -> str:
+        """The arguments as they appear in the command line of the users
+        that do not use a response file."""
+        return ' '.join([quote_func(i) for i in self.args])
+
+    def write(self, outfile: T.TextIO) -> None:
+        for qf, name in self.variables.items():
+            outfile.write(f'{name} = ')
+            outfile.write(' '.join([ninja_quote(qf(i)) for i in self.args]))
+            outfile.write('\n')
+        if self.variables:
+            outfile.write('\n')
+
 class NinjaBuildElement:
 
     rule: NinjaRule
@@ -310,6 +381,7 @@ class NinjaBuildElement:
         self.deps = set()
         self.orderdeps = set()
         self.elems = []
+        self.shared: T.Dict[str, NinjaSharedArgs] = {}
         self.all_outputs = all_outputs
         self.output_errors = ''
 
@@ -337,6 +409,16 @@ class NinjaBuildElement:
         if name == 'DEPFILE':
             self.elems.append((name + '_UNQUOTED', elems))
 
+    def add_shared_item(self, name: str, shared: NinjaSharedArgs) -> None:
+        """Reference shared for the leading arguments of the item name, if
+        they are the same."""
+        for item, elems in self.elems:
+            if item == name:
+                if elems[:len(shared.args)] == shared.args:
+                    self.shared[name] = shared
+                    shared.users.append(self)
+                return
+
     @mesonlib.lazy_property
     def _should_use_rspfile(self) -> bool:
         # 'phony' is a rule built-in to ninja
@@ -353,6 +435,14 @@ class NinjaBuildElement:
                                          outfilenames,
                                          self.elems) >= rsp_threshold
 
+    @property
+    def quote_func(self) -> T.Callable[[str], str]:
+        if self._should_use_rspfile:
+            if self.rule.rspfile_quote_style in {RSPFileSyntax.MSVC, RSPFileSyntax.TASKING}:
+                return cmd_quote
+            return gcc_rsp_quote
+        return quote_func
+
     def count_rule_references(self) -> None:
         if self.rulename != 'phony':
             if self._should_use_rspfile:
@@ -396,19 +486,16 @@ class NinjaBuildElement:
             )
         outfile.write(line)
 
-        if use_rspfile:
-            if self.rule.rspfile_quote_style in {RSPFileSyntax.MSVC, RSPFileSyntax.TASKING}:
-                qf = cmd_quote
-            else:
-                qf = gcc_rsp_quote
-        else:
-            qf = quote_func
-
+        qf = self.quote_func
         for e in self.elems:
             (name, elems) = e
             should_quote = name not in raw_names
             line = f' {name} = '
             newelems = []
+            shared = self.shared.get(name)
+            if shared and qf in shared.variables:
+                newelems.append('$' + shared.variables[qf])
+                elems = elems[len(shared.args):]
             for i in elems:
                 if not should_quote or i == '&&': # Hackety hack hack
                     newelems.append(ninja_quote(i))
@@ -419,6 +506,33 @@ class NinjaBuildElement:
             outfile.write(line)
         outfile.write('\n')
 
+    def get_command(self) -> str:
+        """Evaluate the command of the rule for this build element like ninja
+        does, without a response file."""
+        variables: T.Dict[str, str] = {}
+        for name, elems in self.elems:
+            if name in raw_names:
+                variables[name] = ' '.join(elems)
+                continue
+            value = []
+            shared = self.shared.get(name)
+            if shared and shared.args:
+                value.append(shared.command)
+                elems = elems[len(shared.args):]
+            value.extend([i if i == '&&' else quote_func(i) for i in elems])
+            variables[name] = ' '.join(value)
+        infilenames = [ninja_path_quote(i.replace('\\', '/')) for i in self.infilenames]
+        variables['in'] = ' '.join(infilenames)
+        variables['in_newline'] = '\n'.join(infilenames)
+        variables['out'] = ' '.join([ninja_path_quote(i.replace('\\', '/')) for i in self.outfilenames])
+
+        def evaluate(m: T.Match[str]) -> str:
+            if m.group(3) is not None:
+                return m.group(3)
+            return variables.get(m.group(1) or m.group(2), '')
+
+        return NINJA_EVAL_PAT.sub(evaluate, self.rule.command_str)
+
     def check_outputs(self) -> None:
         for n in self.outfilenames:
             if n in self.all_outputs:
@@ -493,6 +607,9 @@ class NinjaBackend(backends.Backend):
         self.implicit_meson_outs: T.List[str] = []
         self._uses_dyndeps = False
         self._generated_header_cache: T.Dict[str, T.List[FileOrString]] = {}
+        self.shared_compile_args: T.Dict[T.Tuple[str, str], NinjaSharedArgs] = {}
+        self.shared_compile_arg_names: T.Set[str] = set()
+        self.header_scan_include_dirs: T.Dict[str, T.List[str]] = {}
         # nvcc chokes on thin archives:
         #   nvlink fatal   : Could not open input file 'libfoo.a.p'
         #   nvlink fatal   : elfLink internal error
@@ -633,6 +750,9 @@ class NinjaBackend(backends.Backend):
             self.generate_rules()
 
             self.build_elements = []
+            self.shared_compile_args = {}
+            self.shared_compile_arg_names = set()
+            self.header_scan_include_dirs = {}
             self.generate_phony()
             self.add_build_comment(NinjaComment('Build rules for targets'))
 
@@ -711,28 +831,74 @@ class NinjaBackend(backends.Backend):
 
     # http://clang.llvm.org/docs/JSONCompilationDatabase.html
     def generate_compdb(self) -> None:
-        rules = []
+        rules: T.Set[str] = set()
         # TODO: Rather than an explicit list here, rules could be marked in the
         # rule store as being wanted in compdb
         for for_machine in MachineChoice:
             for compiler in self.environment.coredata.compilers[for_machine].values():
-                rules += [f"{rule}{ext}" for rule in [self.compiler_to_rule_name(compiler)]
-                          for ext in ['', '_RSP']]
-                rules += [f"{rule}{ext}" for rule in [self.compiler_to_pch_rule_name(compiler)]
-                          for ext in ['', '_RSP']]
+                rules.add(self.compiler_to_rule_name(compiler))
+                rules.add(self.compiler_to_pch_rule_name(compiler))
                 # Add custom MIL link rules to get the files compiled by the TASKING compiler family to MIL files included in the database
                 if compiler.get_id() == 'tasking':
-                    rule = self.get_compiler_rule_name('tasking_mil_compile', compiler.for_machine)
-                    rules.append(rule)
-                    rules.append(f'{rule}_RSP')
-        compdb_options = ['-x'] if mesonlib.version_compare(self.ninja_version, '>=1.9') else []
-        ninja_compdb = self.ninja_command + ['-t', 'compdb'] + compdb_options + rules
+                    rules.add(self.get_compiler_rule_name('tasking_mil_compile', compiler.for_machine))
+
         builddir = self.environment.get_build_dir()
+        fragments_dir = os.path.join(builddir, 'compile_commands.d')
+        fragments: T.Optional[T.Dict[str, T.List[str]]] = None
+        private_dirs: T.Dict[str, str] = {}
+        if self.environment.coredata.optstore.get_value_for('backend_compdb_fragments'):
+            fragments = {}
+            for t in self.build.get_targets().values():
+                if isinstance(t, build.BuildTarget):
+                    private_dirs[self.get_target_private_dir(t)] = t.get_id()
+
+        # The entries are written out the same way as by `ninja -t compdb`,
+        # and the files are only replaced when their content changes so that
+        # tools watching them do not reload them needlessly.
+        outfile = os.path.join(builddir, 'compile_commands.json')
+        tmpfile = outfile + '~'
         try:
-            jsondb = subprocess.check_output(ninja_compdb, cwd=builddir)
-            with open(os.path.join(builddir, 'compile_commands.json'), 'wb') as f:
-                f.write(jsondb)
-        except Exception:
+            with open(tmpfile, 'w', encoding='utf-8') as f:
+                f.write('[')
+                sep = '\n'
+                for elem in self.build_elements:
+                    if not isinstance(elem, NinjaBuildElement) or elem.rulename not in rules:
+                        continue
+                    entry = ('  {\n'
+                             f'    "directory": {json.dumps(builddir, ensure_ascii=False)},\n'
+                             f'    "command": {json.dumps(elem.get_command(), ensure_ascii=False)},\n'
+                             f'    "file": {json.dumps(elem.infilenames[0].replace(os.sep, "/"), ensure_ascii=False)},\n'
+                             f'    "output": {json.dumps(elem.outfilenames[0].replace(os.sep, "/"), ensure_ascii=False)}\n'
+                             '  }')
+                    f.write(sep)
+                    f.write(entry)
+                    sep = ',\n'
+                    if fragments is not None:
+                        d = os.path.dirname(elem.outfilenames[0])
+                        while d and d not in private_dirs:
+                            d = os.path.dirname(d)
+                        if d:
+                            fragments.setdefault(private_dirs[d], []).append(entry)
+                f.write('\n]\n')
+            mesonlib.replace_if_different(outfile, tmpfile)
+
+            if fragments is None:
+                if os.path.isdir(fragments_dir):
+                    mesonlib.windows_proof_rmtree(fragments_dir)
+                return
+            os.makedirs(fragments_dir, exist_ok=True)
+            stale = set(os.listdir(fragments_dir))
+            for tid, entries in fragments.items():
+                fname = os.path.join(fragments_dir, f'{tid}.json')
+                stale.discard(f'{tid}.json')
+                with open(fname + '~', 'w', encoding='utf-8') as f:
+                    f.write('[\n')
+                    f.write(',\n'.join(entries))
+                    f.write('\n]\n')
+                mesonlib.replace_if_different(fname, fname + '~')
+            for fname in stale:
+                os.unlink(os.path.join(fragments_dir, fname))
+        except OSError:
             mlog.warning('Could not create compilation database.', fatal=False)
 
     # Get all generated headers. Any source file might need them so
@@ -741,25 +907,29 @@ class NinjaBackend(backends.Backend):
         tid = target.get_id()
         if tid in self._generated_header_cache:
             return self._generated_header_cache[tid]
-        header_deps: T.List[FileOrString] = []
+        # The headers of a library shared by several dependencies must only be
+        # listed once, or the lists grow exponentially with diamond-shaped
+        # link graphs.
+        header_deps: OrderedSet[FileOrString] = OrderedSet()
         # XXX: Why don't we add deps to CustomTarget headers here?
         for genlist in target.get_generated_sources():
             if isinstance(genlist, (build.CustomTarget, build.CustomTargetIndex)):
                 continue
             for src in genlist.get_outputs():
                 if self.environment.is_header(src):
-                    header_deps.append(self.get_target_generated_dir(target, genlist, src))
+                    header_deps.add(self.get_target_generated_dir(target, genlist, src))
         if 'vala' in target.compilers and not isinstance(target, build.Executable):
             vala_header = File.from_built_file(self.get_target_dir(target), target.vala_header)
-            header_deps.append(vala_header)
+            header_deps.add(vala_header)
         # Recurse and find generated headers
         for dep in itertools.chain(target.link_targets, target.link_whole_targets):
             if isinstance(dep, (build.StaticLibrary, build.SharedLibrary)):
-                header_deps += self.get_generated_headers(dep)
+                header_deps.update(self.get_generated_headers(dep))
         if isinstance(target, build.CompileTarget):
-            header_deps.extend(target.get_generated_headers())
-        self._generated_header_cache[tid] = header_deps
-        return header_deps
+            header_deps.update(target.get_generated_headers())
+        result = list(header_deps)
+        self._generated_header_cache[tid] = result
+        return result
 
     def get_target_generated_sources(self, target: build.BuildTarget) -> T.MutableMapping[str, File]:
         """
@@ -1050,6 +1220,13 @@ class NinjaBackend(backends.Backend):
             o, s = self.generate_single_compile(target, src, True, [], header_deps)
             obj_list.append(o)
 
+        # With precise generated header dependencies, the sources that cannot
+        # include any of the generated headers are not ordered after them, so
+        # that they can compile while the code generators are running.
+        header_scan: T.Optional[T.List[T.Tuple[str, str, T.List[str]]]] = None
+        if header_deps and self.uses_precise_header_deps(target):
+            header_scan = []
+
         # Generate compile targets for all the preexisting sources for this target
         for src in target_sources.values():
             if not self.environment.is_separate_compile(src):
@@ -1063,6 +1240,14 @@ class NinjaBackend(backends.Backend):
                 abs_src = os.path.join(self.environment.get_build_dir(),
                                        src.rel_to_builddir(self.build_to_src))
                 unity_src.append(abs_src)
+            elif header_scan is not None and \
+                    get_compiler_for_source(target.compilers.values(), src).language in HEADER_SCAN_LANGS:
+                o, s = self.generate_single_compile(target, src, False, [],
+                                                    d_generated_deps + fortran_order_deps,
+                                                    fortran_inc_args, header_scan=header_scan)
+                obj_list.append(o)
+                compiled_sources.append(s)
+                source2object[s] = o
             else:
                 o, s = self.generate_single_compile(target, src, False, [],
                                                     header_deps + d_generated_deps + fortran_order_deps,
@@ -1070,6 +1255,8 @@ class NinjaBackend(backends.Backend):
                 obj_list.append(o)
                 compiled_sources.append(s)
                 source2object[s] = o
+        if header_scan:
+            self.generate_header_scan_target(target, header_deps, header_scan)
 
         if is_unity:
             for src in self.generate_unity_files(target, unity_src):
@@ -1129,6 +1316,70 @@ class NinjaBackend(backends.Backend):
             return False
         return True
 
+    def uses_precise_header_deps(self, target: build.BuildTarget) -> bool:
+        if not self.ninja_has_dyndeps or isinstance(target, build.CompileTarget):
+            return False
+        if self.environment.coredata.optstore.get_value_for('backend_header_deps') != 'precise':
+            return False
+        # A compilation can only use one dyndep file
+        return not self.should_use_dyndeps_for_target(target)
+
+    def get_header_scan_include_dirs(self, shared_args: NinjaSharedArgs) -> T.List[str]:
+        include_dirs = self.header_scan_include_dirs.get(shared_args.name)
+        if include_dirs is None:
+            include_dirs = []
+            args = iter(shared_args.args)
+            for arg in args:
+                for prefix in ('-isystem', '-iquote', '-idirafter', '-I', '/I'):
+                    if arg.startswith(prefix):
+                        d = arg[len(prefix):] or next(args, '')
+                        if d:
+                            include_dirs.append(d)
+                        break
+            self.header_scan_include_dirs[shared_args.name] = include_dirs
+        return include_dirs
+
+    def generate_header_scan_target(self, target: build.BuildTarget,
+                                    header_deps: T.List[FileOrString],
+                                    objects: T.List[T.Tuple[str, str, T.List[str]]]) -> None:
+        self._uses_dyndeps = True
+        pickle_file, dyndep_file, phony = self.get_header_scan_files_for(target)
+        pickle_abs = os.path.join(self.environment.get_build_dir(), pickle_file)
+
+        headers: T.List[str] = []
+        for d in header_deps:
+            if isinstance(d, File):
+                d = d.rel_to_builddir(self.build_to_src)
+            elif not self.has_dir_part(d):
+                d = os.path.join(self.get_target_private_dir(target), d)
+            headers.append(d)
+
+        elem = NinjaBuildElement(self.all_outputs, phony, 'phony', [])
+        elem.add_orderdep(headers)
+        self.add_build(elem)
+
+        scaninfo = TargetHeaderScannerInfo(phony, headers, objects)
+        write = True
+        if os.path.exists(pickle_abs):
+            with open(pickle_abs, 'rb') as p:
+                old = pickle.load(p)
+            write = old != scaninfo
+
+        if write:
+            with open(pickle_abs, 'wb') as p:
+                pickle.dump(scaninfo, p)
+
+        elem = NinjaBuildElement(self.all_outputs, dyndep_file, 'headerscan', pickle_file)
+        elem.add_dep([src for _, src, _ in objects])
+        elem.add_item('DEPFILE', dyndep_file + '.d')
+        elem.add_item('name', target.name)
+        self.add_build(elem)
+
+    def get_header_scan_files_for(self, target: build.BuildTarget) -> T.Tuple[str, str, str]:
+        priv = self.get_target_private_dir(target)
+        return (os.path.join(priv, 'headerscan.dat'), os.path.join(priv, 'headerscan.dd'),
+                os.path.join(priv, 'generated-headers'))
+
     def generate_dependency_scan_target(self, target: build.BuildTarget,
                                         compiled_sources: T.List[str],
                                         source2object: T.Dict[str, str],
@@ -2702,6 +2953,16 @@ https://gcc.gnu.org/bugzilla/show_bug.cgi?id=47485'''))
         rule = NinjaRule(rulename, command, args, description)
         self.add_rule(rule)
 
+        if self.ninja_has_dyndeps and \
+                self.environment.coredata.optstore.get_value_for('backend_header_deps') == 'precise':
+            rulename = 'headerscan'
+            command = self.environment.get_build_command() + \
+                ['--internal', 'headerscan']
+            args = ['$out', '$DEPFILE', '$in']
+            description = 'Scanning target $name for generated header includes'
+            rule = NinjaRule(rulename, command, args, description, deps='gcc', depfile='$DEPFILE')
+            self.add_rule(rule)
+
     def generate_compile_rules(self) -> None:
         for for_machine in MachineChoice:
             clist = self.environment.coredata.compilers[for_machine]
@@ -3101,9 +3362,14 @@ https://gcc.gnu.org/bugzilla/show_bug.cgi?id=47485'''))
                                 order_deps: T.Optional[T.List[FileOrString]] = None,
                                 extra_args: T.Optional[T.List[str]] = None,
                                 unity_sources: T.Optional[T.List[FileOrString]] = None,
+                                header_scan: T.Optional[T.List[T.Tuple[str, str, T.List[str]]]] = None,
                                 ) -> T.Tuple[str, str]:
         """
         Compiles C/C++, ObjC/ObjC++, Fortran, and D sources
+
+        If header_scan is a list, the object is ordered after the generated
+        headers of the target only if the generated header scanner finds that
+        it may include them, and the object is added to the list.
         """
         header_deps = header_deps if header_deps is not None else []
         order_deps = order_deps if order_deps is not None else []
@@ -3128,6 +3394,23 @@ https://gcc.gnu.org/bugzilla/show_bug.cgi?id=47485'''))
 
         commands = commands.compiler.compiler_args(commands)
 
+        # All sources of a target compiled by the same compiler share the
+        # arguments computed so far, write them only once.
+        shared_key = (target.get_id(), compiler.get_language())
+        shared_args = self.shared_compile_args.get(shared_key)
+        if shared_args is None:
+            # $name references in ninja end at any other character, including '.'
+            base = re.sub(r'[^\w-]', '_', '_'.join(shared_key), flags=re.ASCII)
+            name = base + '_ARGS'
+            i = 1
+            while name in self.shared_compile_arg_names:
+                i += 1
+                name = f'{base}_{i}_ARGS'
+            self.shared_compile_arg_names.add(name)
+            shared_args = NinjaSharedArgs(name, commands.to_native())
+            self.shared_compile_args[shared_key] = shared_args
+            self.build_elements.append(shared_args)
+
         # Create introspection information
         if is_generated is False:
             self.create_target_source_introspection(target, compiler, commands, [src], [], unity_sources)
@@ -3245,6 +3528,13 @@ https://gcc.gnu.org/bugzilla/show_bug.cgi?id=47485'''))
                 return result
             element.add_item('CUDA_ESCAPED_TARGET', quote_make_target(rel_obj))
         element.add_item('ARGS', commands)
+        element.add_shared_item('ARGS', shared_args)
+
+        if header_scan is not None:
+            header_scan.append((rel_obj, rel_src, self.get_header_scan_include_dirs(shared_args)))
+            dyndep_file = self.get_header_scan_files_for(target)[1]
+            element.add_item('dyndep', dyndep_file)
+            element.add_orderdep(dyndep_file)
 
         self.add_dependency_scanner_entries_to_element(target, compiler, element, src)
         self.add_build(element)
@@ -1369,11 +1369,22 @@ class BuildTarget(Target):
                     t.get_dependencies_recurse(result, include_proc_macros = self.uses_rust())
         return result
 
-    def get_dependencies_recurse(self, result: OrderedSet[BuildTargetTypes], include_internals: bool = True, include_proc_macros: bool = False) -> None:
+    def get_dependencies_recurse(self, result: OrderedSet[BuildTargetTypes], include_internals: bool = True, include_proc_macros: bool = False,
+                                 walked: T.Optional[T.Set[T.Tuple[BuildTargetTypes, bool, bool]]] = None) -> None:
         # self is always a static library because we don't need to pull dependencies
         # of shared libraries. If self is installed (not internal) it already
         # include objects extracted from all its internal dependencies so we can
         # skip them.
+        #
+        # Walking a library again with the same flags cannot add anything, as
+        # result only grows. Skipping these walks keeps the traversal linear
+        # in the number of edges when libraries are reachable through many paths.
+        if walked is None:
+            walked = set()
+        key = (self, include_internals, include_proc_macros)
+        if key in walked:
+            return
+        walked.add(key)
         include_internals = include_internals and self.is_internal()
         for t in self.link_targets:
             if t in result:
@@ -1383,9 +1394,9 @@ class BuildTarget(Target):
             if include_internals or not t.is_internal():
                 result.add(t)
             if isinstance(t, StaticLibrary):
-                t.get_dependencies_recurse(result, include_internals, include_proc_macros)
+                t.get_dependencies_recurse(result, include_internals, include_proc_macros, walked)
         for t in self.link_whole_targets:
-            t.get_dependencies_recurse(result, include_internals, include_proc_macros)
+            t.get_dependencies_recurse(result, include_internals, include_proc_macros, walked)
 
     def get_source_subdir(self):
         return self.subdir
@@ -1535,14 +1546,21 @@ class BuildTarget(Target):
         self.get_internal_static_libraries_recurse(result)
         return result
 
-    def get_internal_static_libraries_recurse(self, result: OrderedSet[BuildTargetTypes]) -> None:
+    def get_internal_static_libraries_recurse(self, result: OrderedSet[BuildTargetTypes],
+                                              walked: T.Optional[T.Set[BuildTargetTypes]] = None) -> None:
+        # Like in get_dependencies_recurse(), walking a library twice is useless
+        if walked is None:
+            walked = set()
+        if self in walked:
+            return
+        walked.add(self)
         for t in self.link_targets:
             if t.is_internal() and t not in result:
                 result.add(t)
-                t.get_internal_static_libraries_recurse(result)
+                t.get_internal_static_libraries_recurse(result, walked)
         for t in self.link_whole_targets:
             if t.is_internal():
-                t.get_internal_static_libraries_recurse(result)
+                t.get_internal_static_libraries_recurse(result, walked)
 
     def _bundle_static_library(self, t: T.Union[BuildTargetTypes], promoted: bool = False) -> None:
         if self.uses_rust():
@@ -2843,13 +2861,15 @@ class CustomTargetBase:
 
     rust_crate_type = ''
 
-    def get_dependencies_recurse(self, result: OrderedSet[BuildTargetTypes], include_internals: bool = True) -> None:
+    def get_dependencies_recurse(self, result: OrderedSet[BuildTargetTypes], include_internals: bool = True, include_proc_macros: bool = False,
+                                 walked: T.Optional[T.Set[T.Tuple[BuildTargetTypes, bool, bool]]] = None) -> None:
         pass
 
     def get_internal_static_libraries(self) -> OrderedSet[BuildTargetTypes]:
         return OrderedSet()
 
-    def get_internal_static_libraries_recurse(self, result: OrderedSet[BuildTargetTypes]) -> None:
+    def get_internal_static_libraries_recurse(self, result: OrderedSet[BuildTargetTypes],
+                                              walked: T.Optional[T.Set[BuildTargetTypes]] = None) -> None:
         pass
 
     def get_all_linked_targets(self) -> ImmutableListProtocol[BuildTargetTypes]:
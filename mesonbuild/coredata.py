@@ -357,6 +357,16 @@ class CoreData:
                 'limit',
                 0,
                 min_value=0))
+            self.optstore.add_system_option('backend_header_deps', options.UserComboOption(
+                'backend_header_deps',
+                'Whether compilations wait for all generated headers of their '
+                'target or only for those they may include',
+                'target',
+                choices=['target', 'precise']))
+            self.optstore.add_system_option('backend_compdb_fragments', options.UserBooleanOption(
+                'backend_compdb_fragments',
+                'Also write the compilation database of each target to compile_commands.d',
+                False))
         elif backend_name.startswith('vs'):
             self.optstore.add_system_option('backend_startup_project', options.UserStringOption(
                 'backend_startup_project',
@@ -297,6 +297,7 @@ class Interpreter(InterpreterBase, HoldableObject):
         self.subprojects: T.Dict[str, SubprojectHolder] = {}
         self.subproject_stack: T.List[str] = []
         self.configure_file_outputs: T.Dict[str, int] = {}
+        self.run_processes: T.List[RunProcess] = []
         # Passed from the outside, only used in subprojects.
         if invoker_method_default_options:
             assert isinstance(invoker_method_default_options, dict)
@@ -776,12 +777,19 @@ class Interpreter(InterpreterBase, HoldableObject):
         KwargInfo('check', (bool, NoneType), since='0.47.0'),
         KwargInfo('capture', bool, default=True, since='0.47.0'),
         ENV_KW.evolve(since='0.50.0'),
+        KwargInfo('wait', bool, default=True, since='1.10.0'),
     )
     def func_run_command(self, node: mparser.BaseNode,
                          args: T.Tuple[T.Union[build.Executable, ExternalProgram, compilers.Compiler, mesonlib.File, str],
                                        T.List[T.Union[build.Executable, ExternalProgram, compilers.Compiler, mesonlib.File, str]]],
-                         kwargs: 'kwtypes.RunCommand') -> RunProcess:
-        return self.run_command_impl(args, kwargs)
+                         kwargs: 'kwtypes.FuncRunCommand') -> RunProcess:
+        proc = self.run_command_impl(args, kwargs)
+        if kwargs['wait'] or node is self.current_statement:
+            # Later statements may rely on the side effects of the command,
+            # such as the files it writes. If the result is discarded, there
+            # is nothing to wait for later either.
+            proc.wait()
+        return proc
 
     def run_command_impl(self,
                          args: T.Tuple[T.Union[build.Executable, ExternalProgram, compilers.Compiler, mesonlib.File, str],
@@ -854,9 +862,12 @@ class Interpreter(InterpreterBase, HoldableObject):
                 a = os.path.join(builddir if in_builddir else srcdir, self.subdir, a)
             self.add_build_def_file(a)
 
-        return RunProcess(cmd, expanded_args, env, srcdir, builddir, self.subdir,
+        proc = RunProcess(cmd, expanded_args, env, srcdir, builddir, self.subdir,
                           self.environment.get_build_command() + ['introspect'],
-                          in_builddir=in_builddir, check=check, capture=capture)
+                          in_builddir=in_builddir, check=check, capture=capture,
+                          node=self.current_node)
+        self.run_processes.append(proc)
+        return proc
 
     def func_option(self, nodes, args, kwargs):
         raise InterpreterException('Tried to call option() in build description file. All options must be in the option file.')
@@ -1294,6 +1305,8 @@ class Interpreter(InterpreterBase, HoldableObject):
         if not self.is_subproject():
             wrap_mode = WrapMode.from_string(self.coredata.optstore.get_value_for(OptionKey('wrap_mode')))
             self.environment.wrap_resolver = wrap.Resolver(self.environment.get_source_dir(), subprojects_dir, self.subproject, wrap_mode)
+            if self.coredata.optstore.get_value_for(OptionKey('wrap_prefetch')):
+                self.environment.wrap_resolver.prefetch()
         else:
             assert self.environment.wrap_resolver is not None, 'for mypy'
             self.environment.wrap_resolver.load_and_merge(subprojects_dir, self.subproject)
@@ -2299,7 +2312,9 @@ class Interpreter(InterpreterBase, HoldableObject):
                      kwargs['workdir'],
                      kwargs['protocol'],
                      kwargs['priority'],
-                     kwargs['verbose'])
+                     kwargs['verbose'],
+                     kwargs['cpu_cost'],
+                     kwargs['resources'])
 
     def add_test(self, node: mparser.BaseNode,
                  args: T.Tuple[str, T.Union[build.Executable, build.Jar, ExternalProgram, mesonlib.File, build.CustomTarget, build.CustomTargetIndex]],
@@ -2753,6 +2768,8 @@ class Interpreter(InterpreterBase, HoldableObject):
             res = self.run_command_impl((cmd, args),
                                         {'capture': True, 'check': True, 'env': EnvironmentVariables()},
                                         True)
+            # The output must exist before configure_file() returns
+            res.wait()
             if kwargs['capture']:
                 dst_tmp = ofile_abs + '~'
                 file_encoding = kwargs['encoding']
@@ -3065,12 +3082,26 @@ class Interpreter(InterpreterBase, HoldableObject):
             return ret
 
     def run(self) -> None:
-        super().run()
+        try:
+            super().run()
+            # run_command() results are waited for lazily, make sure that every
+            # command has finished and that `check: true` failures are reported
+            # even if the result was never used.
+            for proc in self.run_processes:
+                proc.wait()
+            self.run_processes.clear()
+        except BaseException:
+            # Do not let pending wrap downloads delay reporting the error
+            if not self.is_subproject() and self.environment.wrap_resolver is not None:
+                self.environment.wrap_resolver.cancel_prefetch(wait=False)
+            raise
         mlog.log('Build targets in project:', mlog.bold(str(len(self.build.targets))))
         FeatureNew.report(self.subproject)
         FeatureDeprecated.report(self.subproject)
         FeatureBroken.report(self.subproject)
         if not self.is_subproject():
+            if self.environment.wrap_resolver is not None:
+                self.environment.wrap_resolver.cancel_prefetch()
             self.print_extra_warnings()
             self._print_summary()
 
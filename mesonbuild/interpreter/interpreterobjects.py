@@ -3,6 +3,7 @@ import os
 import shlex
 import subprocess
 import copy
+import threading
 import textwrap
 
 from pathlib import Path, PurePath
@@ -30,6 +31,7 @@ import typing as T
 
 if T.TYPE_CHECKING:
     from . import kwargs
+    from .. import mparser
     from ..cmake.interpreter import CMakeInterpreter
     from ..envconfig import MachineInfo
     from ..interpreterbase import FeatureCheckBase, SubProject, TYPE_var, TYPE_kwargs, TYPE_nvar, TYPE_nkwargs
@@ -203,6 +205,13 @@ class FeatureOptionHolder(ObjectHolder[options.UserFeatureOption]):
 
 class RunProcess(MesonInterpreterObject):
 
+    """The result of run_command().
+
+    The child process is started immediately, but its result is only waited
+    for the first time it is accessed, so that independent commands can run
+    concurrently with each other and with the rest of the interpreter.
+    """
+
     def __init__(self,
                  cmd: ExternalProgram,
                  args: T.List[str],
@@ -213,12 +222,18 @@ class RunProcess(MesonInterpreterObject):
                  mesonintrospect: T.List[str],
                  in_builddir: bool = False,
                  check: bool = False,
-                 capture: bool = True) -> None:
+                 capture: bool = True,
+                 node: T.Optional[mparser.BaseNode] = None) -> None:
         super().__init__()
         if not isinstance(cmd, ExternalProgram):
             raise AssertionError('BUG: RunProcess must be passed an ExternalProgram')
         self.capture = capture
-        self.returncode, self.stdout, self.stderr = self.run_command(cmd, args, env, source_dir, build_dir, subdir, mesonintrospect, in_builddir, check)
+        self.check = check
+        self.node = node
+        self._result: T.Optional[T.Tuple[int, str, str]] = None
+        self._error: T.Optional[BaseException] = None
+        self.command_array = cmd.get_command() + args
+        self.thread: T.Optional[threading.Thread] = self.run_command(cmd, args, env, source_dir, build_dir, subdir, mesonintrospect, in_builddir)
 
     def run_command(self,
                     cmd: ExternalProgram,
@@ -228,9 +243,7 @@ class RunProcess(MesonInterpreterObject):
                     build_dir: str,
                     subdir: str,
                     mesonintrospect: T.List[str],
-                    in_builddir: bool,
-                    check: bool = False) -> T.Tuple[int, str, str]:
-        command_array = cmd.get_command() + args
+                    in_builddir: bool) -> threading.Thread:
         menv = {'MESON_SOURCE_ROOT': source_dir,
                 'MESON_BUILD_ROOT': build_dir,
                 'MESON_SUBDIR': subdir,
@@ -244,25 +257,66 @@ class RunProcess(MesonInterpreterObject):
         child_env.update(menv)
         child_env = env.get_env(child_env)
         stdout = subprocess.PIPE if self.capture else subprocess.DEVNULL
-        mlog.debug('Running command:', mesonlib.join_args(command_array))
-        try:
-            p, o, e = Popen_safe(command_array, stdout=stdout, env=child_env, cwd=cwd)
-            if self.capture:
-                mlog.debug('--- stdout ---')
-                mlog.debug(o)
-            else:
-                o = ''
-                mlog.debug('--- stdout disabled ---')
-            mlog.debug('--- stderr ---')
-            mlog.debug(e)
-            mlog.debug('')
-
-            if check and p.returncode != 0:
-                raise InterpreterException('Command `{}` failed with status {}.'.format(mesonlib.join_args(command_array), p.returncode))
-
-            return p.returncode, o, e
-        except FileNotFoundError:
-            raise InterpreterException('Could not execute command `%s`.' % mesonlib.join_args(command_array))
+        mlog.debug('Running command:', mesonlib.join_args(self.command_array))
+
+        def communicate() -> None:
+            try:
+                p, o, e = Popen_safe(self.command_array, stdout=stdout, env=child_env, cwd=cwd)
+                self._result = (p.returncode, o, e)
+            except BaseException as ex:
+                self._error = ex
+
+        thread = threading.Thread(target=communicate, daemon=True)
+        thread.start()
+        return thread
+
+    def wait(self) -> T.Tuple[int, str, str]:
+        """Block until the command has finished and return its result.
+
+        Errors are reported with the location of the original run_command()
+        call rather than that of the statement that first used the result.
+        """
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+            cmd_str = mesonlib.join_args(self.command_array)
+            if isinstance(self._error, FileNotFoundError):
+                self._error = self._exception(f'Could not execute command `{cmd_str}`.')
+            elif self._result is not None:
+                returncode, o, e = self._result
+                if self.capture:
+                    mlog.debug(f'--- stdout of `{cmd_str}` ---')
+                    mlog.debug(o)
+                else:
+                    o = ''
+                    mlog.debug(f'--- stdout of `{cmd_str}` disabled ---')
+                mlog.debug(f'--- stderr of `{cmd_str}` ---')
+                mlog.debug(e)
+                mlog.debug('')
+                self._result = (returncode, o, e)
+                if self.check and returncode != 0:
+                    self._error = self._exception(f'Command `{cmd_str}` failed with status {returncode}.')
+        if self._error is not None:
+            raise self._error
+        assert self._result is not None, 'for mypy'
+        return self._result
+
+    def _exception(self, msg: str) -> InterpreterException:
+        if self.node is None:
+            return InterpreterException(msg)
+        return T.cast('InterpreterException', InterpreterException.from_node(msg, node=self.node))
+
+    @property
+    def returncode(self) -> int:
+        return self.wait()[0]
+
+    @property
+    def stdout(self) -> str:
+        return self.wait()[1]
+
+    @property
+    def stderr(self) -> str:
+        return self.wait()[2]
 
     @noPosargs
     @noKwargs
@@ -778,7 +832,7 @@ class Test(MesonInterpreterObject):
                  cmd_args: T.List[T.Union[str, mesonlib.File, build.Target, ExternalProgram]],
                  env: mesonlib.EnvironmentVariables,
                  should_fail: bool, timeout: int, workdir: T.Optional[str], protocol: str,
-                 priority: int, verbose: bool):
+                 priority: int, verbose: bool, cpu_cost: int, resources: T.List[str]):
         super().__init__()
         self.name = name
         self.suite = listify(suite)
@@ -794,6 +848,8 @@ class Test(MesonInterpreterObject):
         self.protocol = TestProtocol.from_str(protocol)
         self.priority = priority
         self.verbose = verbose
+        self.cpu_cost = cpu_cost
+        self.resources = resources
 
     def get_exe(self) -> T.Union[ExternalProgram, build.Executable, build.CustomTarget, build.CustomTargetIndex]:
         return self.exe
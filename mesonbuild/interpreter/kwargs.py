@@ -48,6 +48,8 @@ class BaseTest(TypedDict):
     priority: int
     env: EnvironmentVariables
     suite: T.List[str]
+    cpu_cost: int
+    resources: T.List[str]
 
 
 class FuncBenchmark(BaseTest):
@@ -253,6 +255,11 @@ class RunCommand(TypedDict):
     env: EnvironmentVariables
 
 
+class FuncRunCommand(RunCommand):
+
+    wait: bool
+
+
 class FeatureOptionRequire(TypedDict):
 
     error_message: T.Optional[str]
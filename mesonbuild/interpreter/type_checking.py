@@ -505,6 +505,9 @@ TEST_KWS_NO_ARGS: T.List[KwargInfo] = [
     DEPENDS_KW.evolve(since='0.46.0'),
     KwargInfo('suite', ContainerTypeInfo(list, str), listify=True, default=['']),  # yes, a list of empty string
     KwargInfo('verbose', bool, default=False, since='0.62.0'),
+    KwargInfo('cpu_cost', int, default=1, since='1.10.0',
+              validator=lambda x: 'must be at least 1' if x < 1 else None),
+    KwargInfo('resources', ContainerTypeInfo(list, str), listify=True, default=[], since='1.10.0'),
 ]
 
 TEST_KWS: T.List[KwargInfo] = TEST_KWS_NO_ARGS + [
@@ -90,6 +90,9 @@ class InterpreterBase:
         # Current node set during a function call. This can be used as location
         # when printing a warning message during a method call.
         self.current_node = mparser.BaseNode(-1, -1, 'sentinel')
+        # The top-level statement of the innermost code block currently being
+        # evaluated. Used to tell whether a function's result is discarded.
+        self.current_statement: T.Optional[mparser.BaseNode] = None
         # This is set to `version_string` when this statement is evaluated:
         # meson.version().compare_version(version_string)
         # If it was part of a if-clause, it is used to temporally override the
@@ -191,6 +194,7 @@ class InterpreterBase:
         i = 0
         while i < len(statements):
             cur = statements[i]
+            self.current_statement = cur
             try:
                 self.evaluate_statement(cur)
             except Exception as e:
@@ -3,25 +3,28 @@
 
 from __future__ import annotations
 
-# Work around some pathlib bugs...
-
-from . import _pathlib
 import sys
-sys.modules['pathlib'] = _pathlib
+
+# Work around some pathlib bugs...
+if sys.platform == 'win32':
+    from . import _pathlib
+    sys.modules['pathlib'] = _pathlib
 
 # This file is an entry point for all commands, including scripts. Include the
-# strict minimum python modules for performance reasons.
+# strict minimum python modules for performance reasons: internal scripts are
+# run by the backends for many build steps and should only pay for what they
+# import themselves. The rest is imported when it is needed.
 import os.path
-import platform
 import importlib
-import argparse
 import typing as T
 
-from .utils.core import MesonException, MesonBugException
-from . import mlog
+if T.TYPE_CHECKING:
+    import argparse
 
 def errorhandler(e: Exception, command: str) -> int:
     import traceback
+    from .utils.core import MesonException, MesonBugException
+    from . import mlog
     if isinstance(e, MesonException):
         mlog.exception(e)
         logfile = mlog.shutdown()
@@ -67,6 +70,7 @@ class CommandLineParser:
         from . import mconf, mdist, minit, minstall, mintro, msetup, mtest, rewriter, msubprojects, munstable_coredata, mcompile, mdevenv, mformat
         from .scripts import env2mfile, reprotest
         from .wrap import wraptool
+        import argparse
         import shutil
 
         self.term_width = shutil.get_terminal_size().columns
@@ -119,6 +123,7 @@ class CommandLineParser:
 
     def add_command(self, name: str, add_arguments_func: T.Callable[[argparse.ArgumentParser], None],
                     run_func: T.Callable[[argparse.Namespace], int], help_msg: str, aliases: T.List[str] = None) -> None:
+        import argparse
         aliases = aliases or []
         # FIXME: Cannot have hidden subparser:
         # https://bugs.python.org/issue22848
@@ -133,6 +138,8 @@ class CommandLineParser:
             self.commands[i] = p
 
     def add_runpython_arguments(self, parser: argparse.ArgumentParser) -> None:
+        import argparse
+        import platform
         parser.add_argument('-c', action='store_true', dest='eval_arg', default=False)
         parser.add_argument('--version', action='version', version=platform.python_version())
         parser.add_argument('script_file')
@@ -176,7 +183,7 @@ class CommandLineParser:
             parser = self.parser
             command = None
 
-        from . import mesonlib
+        from . import mesonlib, mlog
         args = mesonlib.expand_arguments(args)
         options = parser.parse_args(args)
 
@@ -215,12 +222,18 @@ def run_script_command(script_name: str, script_args: T.List[str]) -> int:
     try:
         module = importlib.import_module('mesonbuild.scripts.' + module_name)
     except ModuleNotFoundError as e:
+        from . import mlog
         mlog.exception(e)
         return 1
 
     try:
         return module.run(script_args)
-    except MesonException as e:
+    except Exception as e:
+        # A script that raised MesonException has already imported it
+        from .utils.core import MesonException
+        if not isinstance(e, MesonException):
+            raise
+        from . import mlog
         mlog.error(f'Error in {script_name} helper script:')
         mlog.exception(e)
         return 1
@@ -280,6 +293,7 @@ def run(original_args: T.List[str], mainfile: str) -> int:
 
     # https://github.com/mesonbuild/meson/issues/3653
     if sys.platform == 'cygwin' and os.environ.get('MSYSTEM', '') not in ['MSYS', '']:
+        from . import mlog
         mlog.error('This python3 seems to be msys/python on MSYS2 Windows, but you are in a MinGW environment')
         mlog.error('Please install it via https://packages.msys2.org/base/mingw-w64-python')
         return 2
@@ -3,22 +3,31 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from glob import glob
 import argparse
 import errno
+import functools
+import hashlib
+import json
 import os
 import selectors
 import shlex
 import shutil
+import stat
 import subprocess
 import sys
+import tarfile
+import tempfile
+import time
 import typing as T
 import re
 
 from . import build, environment
 from .backend.backends import InstallData
 from .mesonlib import (MesonException, Popen_safe, RealPathAction, is_windows,
-                       is_aix, setup_vsenv, pickle_load, is_osx)
+                       is_aix, setup_vsenv, pickle_load, is_osx, determine_worker_count,
+                       clone_or_copy_file)
 from .options import OptionKey
 from .scripts import depfixer, destdir_join
 from .scripts.meson_exe import run_exe
@@ -53,6 +62,11 @@ if T.TYPE_CHECKING:
         skip_subprojects: str
         tags: str
         strip: bool
+        num_processes: T.Optional[int]
+        incremental: bool
+        archive: T.Optional[str]
+
+    TarMode = T.Literal['w|', 'w|gz', 'w|bz2', 'w|xz', 'w|zst']
 
 
 symlink_warning = '''\
@@ -86,6 +100,14 @@ def add_arguments(parser: argparse.ArgumentParser) -> None:
                         help='Install only targets having one of the given tags. (Since 0.60.0)')
     parser.add_argument('--strip', action='store_true',
                         help='Strip targets even if strip option was not set during configure. (Since 0.62.0)')
+    parser.add_argument('-j', '--num-processes', default=None, type=int,
+                        help='How many files to copy, strip or fix in parallel. (Since 1.10.0)')
+    parser.add_argument('--incremental', default=False, action='store_true',
+                        help='Skip the files whose content did not change since the last incremental install '
+                             'into the same DESTDIR, and remove those that are no longer installed. (Since 1.10.0)')
+    parser.add_argument('--archive', default=None, metavar='FILE',
+                        help='Install into a tar archive instead of the file system. The compression is chosen '
+                             'by the extension: .tar, .tar.gz, .tar.bz2, .tar.xz or .tar.zst. (Since 1.10.0)')
 
 class DirMaker:
     def __init__(self, lf: T.TextIO, makedirs: T.Callable[..., None]):
@@ -125,6 +147,102 @@ class DirMaker:
             append_to_log(self.lf, d)
 
 
+def file_digest(fname: str) -> str:
+    h = hashlib.sha256()
+    with open(fname, 'rb') as f:
+        while True:
+            block = f.read(1024 * 1024)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+class InstallManifest:
+    '''The files installed into a DESTDIR by the last incremental install.
+
+    Each installed file is recorded with the size, mtime and hash of its
+    source, and with the size and mtime it had once installed. A file does
+    not need to be installed again if neither its source, compared by hash
+    when its mtime changed, nor its installed copy changed since.
+    '''
+
+    version = 1
+
+    def __init__(self, fname: str) -> None:
+        self.fname = fname
+        self.old: T.Dict[str, T.Dict[str, T.Any]] = {}
+        self.new: T.Dict[str, T.Dict[str, T.Any]] = {}
+        try:
+            with open(fname, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == self.version:
+                self.old = data['files']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def is_unchanged(self, from_file: str, to_file: str, postprocess: str) -> bool:
+        entry = self.old.get(to_file)
+        if (entry is None or 'sha256' not in entry or entry['source'] != from_file
+                or entry['postprocess'] != postprocess):
+            return False
+        st = os.lstat(to_file)
+        if [st.st_size, st.st_mtime_ns] != entry['installed']:
+            return False
+        st = os.stat(from_file)
+        if [st.st_size, st.st_mtime_ns] != [entry['size'], entry['mtime']]:
+            if st.st_size != entry['size'] or file_digest(from_file) != entry['sha256']:
+                return False
+            entry = dict(entry, mtime=st.st_mtime_ns)
+        self.new[to_file] = entry
+        return True
+
+    def is_unchanged_symlink(self, target: str, link: str) -> bool:
+        entry = self.old.get(link)
+        if entry is None or entry.get('symlink') != target:
+            return False
+        if not os.path.islink(link) or os.readlink(link) != target:
+            return False
+        self.new[link] = entry
+        return True
+
+    def add_file(self, from_file: str, to_file: str, postprocess: str) -> None:
+        # Completed by hash_source(), and by write() once the file has been
+        # stripped and fixed
+        self.new[to_file] = {'source': from_file, 'postprocess': postprocess}
+
+    def hash_source(self, to_file: str) -> None:
+        entry = self.new[to_file]
+        st = os.stat(entry['source'])
+        entry.update(size=st.st_size, mtime=st.st_mtime_ns, sha256=file_digest(entry['source']))
+
+    def add_symlink(self, target: str, link: str) -> None:
+        self.new[link] = {'symlink': target}
+
+    def keep(self, to_file: str) -> None:
+        if to_file in self.old:
+            self.new[to_file] = self.old[to_file]
+
+    def get_removed(self) -> T.List[str]:
+        '''Files installed last time, but not this time.'''
+        return [f for f in self.old if f not in self.new]
+
+    def write(self) -> None:
+        for to_file, entry in list(self.new.items()):
+            if 'symlink' in entry or 'installed' in entry:
+                continue
+            try:
+                st = os.lstat(to_file)
+            except FileNotFoundError:
+                del self.new[to_file]
+                continue
+            entry['installed'] = [st.st_size, st.st_mtime_ns]
+        tmpname = self.fname + '~'
+        with open(tmpname, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'files': self.new}, f)
+        os.replace(tmpname, self.fname)
+
+
 def load_install_data(fname: str) -> InstallData:
     return pickle_load(fname, 'InstallData', InstallData)
 
@@ -133,6 +251,13 @@ def is_executable(path: str, follow_symlinks: bool = False) -> bool:
     return bool(os.stat(path, follow_symlinks=follow_symlinks).st_mode & 0o111)
 
 
+def copy2(src: str, dst: str, follow_symlinks: bool = True) -> None:
+    if not follow_symlinks and os.path.islink(src):
+        shutil.copy2(src, dst, follow_symlinks=False)
+        return
+    clone_or_copy_file(src, dst)
+    shutil.copystat(src, dst)
+
 def append_to_log(lf: T.TextIO, line: str) -> None:
     lf.write(line)
     if not line.endswith('\n'):
@@ -314,6 +439,15 @@ class Installer:
         # ['sub1', ...] means skip only those.
         self.skip_subprojects = [i.strip() for i in options.skip_subprojects.split(',')]
         self.tags = [i.strip() for i in options.tags.split(',')] if options.tags else None
+        self.num_processes = options.num_processes or determine_worker_count()
+        self.executor: T.Optional[ThreadPoolExecutor] = None
+        # Copies that run in the executor, with what must be done to the
+        # files afterwards, by destination
+        self.pending: T.Dict[str, Future[None]] = {}
+        self.manifest: T.Optional[InstallManifest] = None
+        self.copied_file_count = 0
+        self.skipped_file_count = 0
+        self.removed_file_count = 0
 
     def remove(self, *args: T.Any, **kwargs: T.Any) -> None:
         if not self.dry_run:
@@ -333,7 +467,7 @@ class Installer:
 
     def copy2(self, *args: T.Any, **kwargs: T.Any) -> None:
         if not self.dry_run:
-            shutil.copy2(*args, **kwargs)
+            copy2(*args, **kwargs)
 
     def copyfile(self, *args: T.Any, **kwargs: T.Any) -> None:
         if not self.dry_run:
@@ -378,6 +512,50 @@ class Installer:
             return run_exe(exe, extra_env)
         return 0
 
+    def schedule(self, to_file: str, func: T.Callable[[], None]) -> None:
+        '''Run func in the thread pool, after what is already scheduled for
+        to_file.
+
+        The installation log, the output and the directories are all taken
+        care of in the main thread, in the same order as a serial install:
+        only copying, stripping and fixing the installed files, which do not
+        depend on each other, is done in parallel.'''
+        if self.num_processes <= 1 or self.dry_run:
+            func()
+            return
+        prev = self.pending.get(to_file)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.num_processes)
+
+        def run() -> None:
+            # Jobs are started in submission order, so prev is already
+            # running or done.
+            if prev is not None:
+                prev.result()
+            func()
+        self.pending[to_file] = self.executor.submit(run)
+
+    def after_copy(self, to_file: str, func: T.Callable[[], None]) -> None:
+        '''Run func once to_file has been copied.'''
+        if to_file in self.pending:
+            self.schedule(to_file, func)
+        else:
+            func()
+
+    def wait_for(self, to_file: str) -> None:
+        f = self.pending.pop(to_file, None)
+        if f is not None:
+            f.result()
+
+    def wait_for_all(self) -> None:
+        '''Wait until all files are installed, and raise the first error in
+        installation order.'''
+        wait(self.pending.values())
+        pending = self.pending
+        self.pending = {}
+        for f in pending.values():
+            f.result()
+
     def should_install(self, d: T.Union[TargetInstallData, InstallEmptyDir,
                                         InstallDataBase, InstallSymlinkData,
                                         ExecutableSerialisation]) -> bool:
@@ -403,7 +581,15 @@ class Installer:
 
     def do_copyfile(self, from_file: str, to_file: str,
                     makedirs: T.Optional[T.Tuple[T.Any, str]] = None,
-                    follow_symlinks: T.Optional[bool] = None) -> bool:
+                    follow_symlinks: T.Optional[bool] = None,
+                    postprocess: str = '') -> bool:
+        '''Copy from_file to to_file, and return whether it was copied.
+
+        postprocess describes what is done to the file once copied, so that
+        an incremental install copies it again when it changes.
+        '''
+        # Installing the same file twice replaces the first copy
+        self.wait_for(to_file)
         outdir = os.path.split(to_file)[0]
         if not os.path.isfile(from_file) and not os.path.islink(from_file):
             raise MesonException(f'Tried to install something that isn\'t a file: {from_file!r}')
@@ -416,6 +602,15 @@ class Installer:
             if self.should_preserve_existing_file(from_file, to_file):
                 append_to_log(self.lf, f'# Preserving old file {to_file}\n')
                 self.preserved_file_count += 1
+                if self.manifest:
+                    self.manifest.keep(to_file)
+                return False
+            if (self.manifest and not os.path.islink(from_file)
+                    and self.manifest.is_unchanged(from_file, to_file, postprocess)):
+                # Unlike preserved files, it is still installed
+                append_to_log(self.lf, to_file)
+                self.skipped_file_count += 1
+                self.did_install_something = True
                 return False
             self.log(f'Installing {from_file} to {outdir}')
             self.remove(to_file)
@@ -434,9 +629,14 @@ class Installer:
                 if follow_symlinks is None:
                     follow_symlinks = True  # TODO: change to False when removing the warning
                     print(symlink_warning)
-                self.copy2(from_file, to_file, follow_symlinks=follow_symlinks)
+                self.schedule(to_file, functools.partial(self.copy2, from_file, to_file, follow_symlinks=follow_symlinks))
         else:
-            self.copy2(from_file, to_file)
+            self.schedule(to_file, functools.partial(self.copy2, from_file, to_file))
+        if self.manifest:
+            self.manifest.add_file(from_file, to_file, postprocess)
+            if not self.dry_run and os.path.exists(from_file):
+                self.schedule(to_file, functools.partial(self.manifest.hash_source, to_file))
+        self.copied_file_count += 1
         selinux_updates.append(to_file)
         append_to_log(self.lf, to_file)
         return True
@@ -447,6 +647,11 @@ class Installer:
             abs_target = os.path.join(full_dst_dir, target)
         elif not os.path.exists(abs_target):
             abs_target = destdir_join(destdir, abs_target)
+        self.wait_for(link)
+        if self.manifest and self.manifest.is_unchanged_symlink(target, link):
+            append_to_log(self.lf, link)
+            self.skipped_file_count += 1
+            return True
         if os.path.lexists(link):
             if not os.path.islink(link):
                 raise MesonException(f'Destination {link!r} already exists and is not a symlink')
@@ -461,6 +666,8 @@ class Installer:
                       "Skipping all symlinking.")
                 self.printed_symlink_error = True
             return False
+        if self.manifest:
+            self.manifest.add_symlink(target, link)
         append_to_log(self.lf, link)
         return True
 
@@ -535,7 +742,7 @@ class Installer:
                     self.copystat(os.path.dirname(abs_src), parent_dir)
                 # FIXME: what about symlinks?
                 self.do_copyfile(abs_src, abs_dst, follow_symlinks=follow_symlinks)
-                self.set_mode(abs_dst, install_mode, data.install_umask)
+                self.after_copy(abs_dst, functools.partial(self.set_mode, abs_dst, install_mode, data.install_umask))
 
     def do_install(self, datafilename: str) -> None:
         d = load_install_data(datafilename)
@@ -556,6 +763,10 @@ class Installer:
             assert isinstance(d.install_umask, int)
             os.umask(d.install_umask)
 
+        if self.options.incremental:
+            digest = hashlib.sha256(destdir.encode()).hexdigest()[:16]
+            self.manifest = InstallManifest(os.path.join(d.build_dir, 'meson-private', f'install-manifest-{digest}.json'))
+
         self.did_install_something = False
         try:
             with DirMaker(self.lf, self.makedirs) as dm:
@@ -566,6 +777,9 @@ class Installer:
                 self.install_emptydir(d, dm, destdir, fullprefix)
                 self.install_data(d, dm, destdir, fullprefix)
                 self.install_symlinks(d, dm, destdir, fullprefix)
+                self.wait_for_all()
+                if self.manifest:
+                    self.finish_incremental_install()
                 self.restore_selinux_contexts(destdir)
                 self.run_install_script(d, destdir, fullprefix)
                 if not self.did_install_something:
@@ -573,6 +787,9 @@ class Installer:
                 if not self.options.quiet and self.preserved_file_count > 0:
                     self.log('Preserved {} unchanged files, see {} for the full list'
                              .format(self.preserved_file_count, os.path.normpath(self.lf.name)))
+                if self.manifest:
+                    self.log(f'Copied {self.copied_file_count} files, skipped {self.skipped_file_count} unchanged files, '
+                             f'removed {self.removed_file_count} files that are no longer installed')
         except PermissionError:
             if is_windows() or destdir != '' or not os.isatty(sys.stdout.fileno()) or not os.isatty(sys.stderr.fileno()):
                 # can't elevate to root except in an interactive unix environment *and* when not doing a destdir install
@@ -609,9 +826,29 @@ class Installer:
                     os.execlp(rootcmd, rootcmd, sys.executable, main_file, *sys.argv[1:],
                               '-C', os.getcwd(), '--no-rebuild')
             raise
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+                self.executor = None
+
+    def finish_incremental_install(self) -> None:
+        assert self.manifest is not None
+        removed = self.manifest.get_removed()
+        if self.tags or self.skip_subprojects != ['']:
+            # The files that were not installed this time may have been
+            # filtered out, and are still installed
+            for f in removed:
+                self.manifest.keep(f)
+        else:
+            for f in removed:
+                if os.path.lexists(f) and not os.path.isdir(f):
+                    self.log(f'Removing {f}')
+                    self.remove(f)
+                    self.removed_file_count += 1
+        if not self.dry_run:
+            self.manifest.write()
 
     def do_strip(self, strip_bin: T.List[str], fname: str, outname: str) -> None:
-        self.log(f'Stripping target {fname!r}.')
         if is_osx():
             # macOS expects dynamic objects to be stripped with -x maximum.
             # To also strip the debug info, -S must be added.
@@ -645,7 +882,7 @@ class Installer:
             outdir = os.path.dirname(outfilename)
             if self.do_copyfile(fullfilename, outfilename, makedirs=(dm, outdir), follow_symlinks=i.follow_symlinks):
                 self.did_install_something = True
-            self.set_mode(outfilename, i.install_mode, d.install_umask)
+            self.after_copy(outfilename, functools.partial(self.set_mode, outfilename, i.install_mode, d.install_umask))
 
     def install_symlinks(self, d: InstallData, dm: DirMaker, destdir: str, fullprefix: str) -> None:
         for s in d.symlinks:
@@ -666,7 +903,7 @@ class Installer:
             outdir = os.path.dirname(outfilename)
             if self.do_copyfile(full_source_filename, outfilename, makedirs=(dm, outdir)):
                 self.did_install_something = True
-            self.set_mode(outfilename, m.install_mode, d.install_umask)
+            self.after_copy(outfilename, functools.partial(self.set_mode, outfilename, m.install_mode, d.install_umask))
 
     def install_emptydir(self, d: InstallData, dm: DirMaker, destdir: str, fullprefix: str) -> None:
         for e in d.emptydir:
@@ -692,7 +929,7 @@ class Installer:
             if self.do_copyfile(fullfilename, outfilename, makedirs=(dm, outdir),
                                 follow_symlinks=t.follow_symlinks):
                 self.did_install_something = True
-            self.set_mode(outfilename, t.install_mode, d.install_umask)
+            self.after_copy(outfilename, functools.partial(self.set_mode, outfilename, t.install_mode, d.install_umask))
 
     def run_install_script(self, d: InstallData, destdir: str, fullprefix: str) -> None:
         env = {'MESON_SOURCE_ROOT': d.source_dir,
@@ -703,6 +940,8 @@ class Installer:
             env['MESON_INSTALL_QUIET'] = '1'
         if self.dry_run:
             env['MESON_INSTALL_DRY_RUN'] = '1'
+        if self.options.num_processes:
+            env['MESON_NUM_PROCESSES'] = str(self.options.num_processes)
 
         for i in d.install_scripts:
             if not self.should_install(i):
@@ -756,18 +995,22 @@ class Installer:
             outname = os.path.join(outdir, os.path.basename(fname))
             final_path = os.path.join(d.prefix, t.outdir, os.path.basename(fname))
             should_strip = t.strip or (t.can_strip and self.options.strip)
-            install_rpath = t.install_rpath
-            install_name_mappings = t.install_name_mappings
             install_mode = t.install_mode
             if not os.path.exists(fname):
                 raise MesonException(f'File {fname!r} could not be found')
             elif os.path.isfile(fname):
-                file_copied = self.do_copyfile(fname, outname, makedirs=(dm, outdir))
-                if should_strip and d.strip_bin is not None:
+                strip = should_strip and d.strip_bin is not None
+                postprocess = repr((strip, final_path, t.install_rpath, sorted(t.rpath_dirs_to_remove),
+                                    t.install_name_mappings, install_mode, d.install_umask))
+                file_copied = self.do_copyfile(fname, outname, makedirs=(dm, outdir), postprocess=postprocess)
+                if strip:
                     if fname.endswith('.jar'):
                         self.log('Not stripping jar target: {}'.format(os.path.basename(fname)))
                         continue
-                    self.do_strip(d.strip_bin, fname, outname)
+                    # Files that were not copied are already stripped
+                    if file_copied:
+                        self.log(f'Stripping target {fname!r}.')
+                        self.after_copy(outname, functools.partial(self.do_strip, d.strip_bin, fname, outname))
                 if fname.endswith('.js'):
                     # Emscripten outputs js files and optionally a wasm file.
                     # If one was generated, install it as well.
@@ -784,16 +1027,282 @@ class Installer:
                 raise RuntimeError(f'Unknown file type for {fname!r}')
             if file_copied:
                 self.did_install_something = True
-                try:
-                    self.fix_rpath(outname, t.rpath_dirs_to_remove, install_rpath, final_path,
-                                   install_name_mappings, verbose=False)
-                except SystemExit as e:
-                    if isinstance(e.code, int) and e.code == 0:
-                        pass
-                    else:
-                        raise
+                fix_rpath = functools.partial(self.fix_target_rpath, t, outname, final_path)
+                if fname.endswith('.jar'):
+                    # fix_jar() extracts the manifest into the current
+                    # directory, so jars are fixed one at a time
+                    self.wait_for(outname)
+                    fix_rpath()
+                else:
+                    self.after_copy(outname, fix_rpath)
                 # file mode needs to be set last, after strip/depfixer editing
-                self.set_mode(outname, install_mode, d.install_umask)
+                self.after_copy(outname, functools.partial(self.set_mode, outname, install_mode, d.install_umask))
+
+    def fix_target_rpath(self, t: TargetInstallData, outname: str, final_path: str) -> None:
+        try:
+            self.fix_rpath(outname, t.rpath_dirs_to_remove, t.install_rpath, final_path,
+                           t.install_name_mappings, verbose=False)
+        except SystemExit as e:
+            if isinstance(e.code, int) and e.code == 0:
+                pass
+            else:
+                raise
+
+
+class ArchiveEntry:
+
+    def __init__(self, tartype: bytes, mode: int, mtime: float) -> None:
+        self.tartype = tartype
+        self.mode = mode
+        self.mtime = mtime
+        # The file to read the content of a regular file from
+        self.source = ''
+        # Whether source is a temporary copy that can be modified
+        self.copied = False
+        self.linkname = ''
+        self.owner: T.Union[str, int, None] = None
+        self.group: T.Union[str, int, None] = None
+
+
+class ArchiveLog:
+    '''Writes the paths of the installation log without the staging
+    directory that they are installed into.'''
+
+    def __init__(self, lf: T.TextIO) -> None:
+        self.lf = lf
+        self.name = lf.name
+        self.root = ''
+
+    def write(self, line: str) -> int:
+        if self.root and line.startswith(self.root + os.sep):
+            line = line[len(self.root):]
+        return self.lf.write(line)
+
+    def flush(self) -> None:
+        self.lf.flush()
+
+
+class ArchiveInstaller(Installer):
+    '''Installs into a tar archive.
+
+    The installation runs as usual, into a DESTDIR that is never created:
+    every operation on the installed files is recorded instead, and the
+    archive is written at the end, reading the content of the files from
+    the build and source directories. Only the files that are stripped or
+    have their rpath fixed are copied, into a temporary directory.
+    '''
+
+    # By extension, the mode of tarfile.open() or the program to compress a
+    # plain tar stream with
+    formats: T.List[T.Tuple[str, TarMode, T.Optional[T.List[str]]]] = [
+        ('.tar', 'w|', None),
+        ('.tar.gz', 'w|gz', None),
+        ('.tgz', 'w|gz', None),
+        ('.tar.bz2', 'w|bz2', None),
+        ('.tar.xz', 'w|xz', None),
+        ('.tar.zst', 'w|', ['zstd', '-q', '-T0']),
+        ('.tzst', 'w|', ['zstd', '-q', '-T0']),
+    ]
+
+    def __init__(self, options: 'ArgumentType', lf: T.TextIO):
+        self.archive_log = ArchiveLog(lf)
+        super().__init__(options, T.cast('T.TextIO', self.archive_log))
+        self.entries: T.Dict[str, ArchiveEntry] = {}
+        # The directories created by the last call to makedirs()
+        self.new_dirs: T.Set[str] = set()
+        self.root = ''
+        self.tmpdir = ''
+        self.start_time = time.time()
+
+    @classmethod
+    def get_format(cls, fname: str) -> T.Tuple[TarMode, T.Optional[T.List[str]]]:
+        for ext, mode, compressor in cls.formats:
+            if fname.endswith(ext):
+                if compressor is not None and sys.version_info >= (3, 14):
+                    return 'w|zst', None
+                return mode, compressor
+        raise MesonException(f'Unknown archive format for {fname!r}, supported extensions are: '
+                             + ', '.join(ext for ext, _, _ in cls.formats))
+
+    def do_install(self, datafilename: str) -> None:
+        assert self.options.archive is not None
+        for arg, value in [('--destdir', self.options.destdir),
+                           ('--incremental', self.options.incremental),
+                           ('--only-changed', self.options.only_changed)]:
+            if value:
+                raise MesonException(f'--archive cannot be used with {arg}')
+        mode, compressor = self.get_format(self.options.archive)
+        if compressor is not None and not shutil.which(compressor[0]):
+            raise MesonException(f'{compressor[0]!r} not found, it is needed to create {self.options.archive!r}')
+        # Scripts that need DESTDIR are skipped as usual, the others would
+        # install files that cannot be added to the archive
+        for i in load_install_data(datafilename).install_scripts:
+            if self.should_install(i) and not i.skip_if_destdir:
+                name = ' '.join(i.cmd_args)
+                raise MesonException(f'Custom install script {name!r} cannot be run when installing into an archive, '
+                                     'install into a DESTDIR instead')
+        with tempfile.TemporaryDirectory(prefix='meson-install-') as self.tmpdir:
+            # Only created so that the staging directory itself is not
+            # logged as created, nothing is written into it
+            self.root = os.path.join(self.tmpdir, 'root')
+            os.mkdir(self.root)
+            self.archive_log.root = self.root
+            self.options.destdir = self.root
+            super().do_install(datafilename)
+            if not self.dry_run:
+                self.write_archive(self.options.archive, mode, compressor)
+
+    def write_archive(self, fname: str, mode: TarMode, compressor: T.Optional[T.List[str]]) -> None:
+        with open(fname, 'wb') as f:
+            if compressor is None:
+                with tarfile.open(fileobj=f, mode=mode) as tf:
+                    self.add_entries(tf)
+                return
+            p = subprocess.Popen(compressor, stdin=subprocess.PIPE, stdout=f)
+            assert p.stdin is not None
+            with p.stdin, tarfile.open(fileobj=p.stdin, mode=mode) as tf:
+                self.add_entries(tf)
+            if p.wait() != 0:
+                raise MesonException(f'{compressor[0]!r} failed to create {fname!r}')
+
+    def add_entries(self, tf: tarfile.TarFile) -> None:
+        # Sorted, so that directories come before their content and the
+        # archive does not depend on the order of the installation
+        for path in sorted(self.entries):
+            entry = self.entries[path]
+            info = tarfile.TarInfo(os.path.relpath(path, self.root).replace(os.sep, '/'))
+            info.type = entry.tartype
+            info.mode = entry.mode
+            info.mtime = int(entry.mtime)
+            info.uname = info.gname = 'root'
+            if isinstance(entry.owner, int):
+                info.uid, info.uname = entry.owner, ''
+            elif entry.owner is not None:
+                info.uname = entry.owner
+            if isinstance(entry.group, int):
+                info.gid, info.gname = entry.group, ''
+            elif entry.group is not None:
+                info.gname = entry.group
+            if entry.tartype == tarfile.SYMTYPE:
+                info.linkname = entry.linkname
+                tf.addfile(info)
+            elif entry.tartype == tarfile.REGTYPE:
+                with open(entry.source, 'rb') as f:
+                    info.size = os.fstat(f.fileno()).st_size
+                    tf.addfile(info, f)
+            else:
+                tf.addfile(info)
+
+    def add_file(self, from_file: str, to_file: str) -> None:
+        st = os.stat(from_file)
+        entry = ArchiveEntry(tarfile.REGTYPE, stat.S_IMODE(st.st_mode), st.st_mtime)
+        entry.source = from_file
+        self.entries[to_file] = entry
+
+    def add_symlink(self, target: str, link: str) -> None:
+        entry = ArchiveEntry(tarfile.SYMTYPE, 0o777, self.start_time)
+        entry.linkname = target
+        self.entries[link] = entry
+
+    def materialize(self, path: str) -> str:
+        '''Return a temporary copy of the installed file path, to be modified.'''
+        entry = self.entries[path]
+        if not entry.copied:
+            fd, tmpname = tempfile.mkstemp(dir=self.tmpdir)
+            os.close(fd)
+            clone_or_copy_file(entry.source, tmpname)
+            entry.source = tmpname
+            entry.copied = True
+        return entry.source
+
+    def remove(self, path: str) -> None:
+        self.entries.pop(path, None)
+
+    def symlink(self, target: str, link: str, target_is_directory: bool = False) -> None:
+        self.add_symlink(target, link)
+
+    def makedirs(self, path: str, exist_ok: bool = False) -> None:
+        path = os.path.normpath(path)
+        umask = os.umask(0)
+        os.umask(umask)
+        self.new_dirs = set()
+        while path.startswith(self.root + os.sep) and path not in self.entries:
+            self.entries[path] = ArchiveEntry(tarfile.DIRTYPE, 0o777 & ~umask, self.start_time)
+            self.new_dirs.add(path)
+            path = os.path.dirname(path)
+
+    def copy(self, from_file: str, outdir: str, follow_symlinks: bool = True) -> None:
+        to_file = os.path.join(outdir, os.path.basename(from_file))
+        if not follow_symlinks and os.path.islink(from_file):
+            self.add_symlink(os.readlink(from_file), to_file)
+        else:
+            self.add_file(from_file, to_file)
+
+    def copy2(self, from_file: str, to_file: str, follow_symlinks: bool = True) -> None:
+        if not follow_symlinks and os.path.islink(from_file):
+            self.add_symlink(os.readlink(from_file), to_file)
+        else:
+            self.add_file(from_file, to_file)
+
+    def copyfile(self, from_file: str, to_file: str) -> None:
+        self.add_file(from_file, to_file)
+
+    def copystat(self, src: str, dst: str) -> None:
+        dst = os.path.normpath(dst)
+        entry = self.entries.get(dst)
+        # Directories are created when they do not exist on disk, which is
+        # always the case here: only copy the stat of those that were just
+        # created, as the installation into a DESTDIR does.
+        if entry is None or (entry.tartype == tarfile.DIRTYPE and dst not in self.new_dirs):
+            return
+        st = os.stat(src)
+        entry.mode = stat.S_IMODE(st.st_mode)
+        entry.mtime = st.st_mtime
+
+    def do_strip(self, strip_bin: T.List[str], fname: str, outname: str) -> None:
+        if not self.dry_run:
+            super().do_strip(strip_bin, fname, self.materialize(outname))
+
+    def fix_rpath(self, outname: str, *args: T.Any, **kwargs: T.Any) -> None:
+        if not self.dry_run:
+            depfixer.fix_rpath(self.materialize(outname), *args, **kwargs)
+
+    def set_chown(self, path: str, user: T.Union[str, int, None] = None,
+                  group: T.Union[str, int, None] = None, **kwargs: T.Any) -> None:
+        entry = self.entries.get(os.path.normpath(path))
+        if entry is not None:
+            entry.owner = user
+            entry.group = group
+
+    def set_chmod(self, path: str, mode: int, **kwargs: T.Any) -> None:
+        entry = self.entries.get(os.path.normpath(path))
+        if entry is not None:
+            entry.mode = mode
+
+    def sanitize_permissions(self, path: str, umask: T.Union[str, int]) -> None:
+        entry = self.entries.get(os.path.normpath(path))
+        if entry is None or umask == 'preserve' or entry.tartype == tarfile.SYMTYPE:
+            return
+        assert isinstance(umask, int), 'umask should only be "preserve" or an integer'
+        entry.mode = (0o777 if entry.mode & 0o111 else 0o666) & ~umask
+
+    def set_mode(self, path: str, mode: T.Optional['FileMode'], default_umask: T.Union[str, int]) -> None:
+        if mode is None or all(m is None for m in [mode.perms_s, mode.owner, mode.group]):
+            self.sanitize_permissions(path, default_umask)
+            return
+        if mode.owner is not None or mode.group is not None:
+            self.set_chown(path, mode.owner, mode.group)
+        if mode.perms_s is not None:
+            self.set_chmod(path, mode.perms)
+        else:
+            self.sanitize_permissions(path, default_umask)
+
+    def restore_selinux_contexts(self, destdir: str) -> None:
+        pass
+
+    def log(self, msg: str) -> None:
+        super().log(msg.replace(self.root, '') if self.root else msg)
+
 
 def rebuild_all(wd: str, backend: str) -> bool:
     if backend == 'none':
@@ -875,9 +1384,14 @@ def run(opts: 'ArgumentType') -> int:
         backend = T.cast('str', b.environment.coredata.optstore.get_value_for(OptionKey('backend')))
         if not rebuild_all(opts.wd, backend):
             sys.exit(-1)
+    if opts.archive:
+        opts.archive = os.path.abspath(opts.archive)
     os.chdir(opts.wd)
-    with open(os.path.join(log_dir, 'install-log.txt'), 'w', encoding='utf-8') as lf:
-        installer = Installer(opts, lf)
+    # The files listed in install-log.txt are removed by `meson uninstall`,
+    # which must not touch the host paths of the files in an archive
+    log_name = 'archive-log.txt' if opts.archive else 'install-log.txt'
+    with open(os.path.join(log_dir, log_name), 'w', encoding='utf-8') as lf:
+        installer = ArchiveInstaller(opts, lf) if opts.archive else Installer(opts, lf)
         append_to_log(lf, '# List of files installed by Meson')
         append_to_log(lf, '# Does not contain files installed by custom scripts.')
         if opts.profile:
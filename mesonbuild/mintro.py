@@ -438,6 +438,8 @@ def get_test_list(testdata: T.List[backends.TestSerialisation]) -> T.List[T.Dict
         to['suite'] = t.suite
         to['is_parallel'] = t.is_parallel
         to['priority'] = t.priority
+        to['cpu_cost'] = t.cpu_cost
+        to['resources'] = t.resources
         to['protocol'] = str(t.protocol)
         to['depends'] = t.depends
         to['extra_paths'] = t.extra_paths
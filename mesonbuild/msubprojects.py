@@ -17,6 +17,7 @@ import zipfile
 from . import mlog
 from .ast import IntrospectionInterpreter
 from .mesonlib import quiet_git, GitException, Popen_safe, MesonException, windows_proof_rmtree
+from .wrap.cache import add_git_alternate, format_size, git_objects_size
 from .wrap.wrap import (Resolver, WrapException, ALL_TYPES,
                         parse_patch_url, update_wrap_file, get_releases)
 
@@ -124,6 +125,7 @@ class Runner:
         self.wrap_resolver.wrap = self.wrap
         self.run_method: T.Callable[[], bool] = self.options.subprojects_func.__get__(self)
         self.log_queue: T.List[T.Tuple[mlog.TV_LoggableList, T.Any]] = []
+        self.fetched_bytes: T.Optional[int] = None
 
     def log(self, *args: mlog.TV_Loggable, **kwargs: T.Any) -> None:
         self.log_queue.append((list(args), kwargs))
@@ -369,6 +371,16 @@ class Runner:
             # git into setting FETCH_HEAD just in case, from the local commit.
             self.git_output(['fetch', '.', revision])
         else:
+            fetched = 0
+            shared_cache = self.wrap_resolver.shared_cache
+            if shared_cache and not self.wrap.values.get('depth'):
+                # Refresh the shared mirror first, so that the fetch below
+                # only has to download objects it does not have yet. Shallow
+                # wraps do not use the mirror, it has the full history.
+                mirror, fetched = shared_cache.update_git_mirror(url)
+                if mirror:
+                    add_git_alternate(self.repo_dir, mirror)
+            before = git_objects_size(self.repo_dir)
             try:
                 # Fetch only the revision we need, this avoids fetching useless branches.
                 # revision can be either a branch, tag or commit id. In all cases we want
@@ -384,6 +396,9 @@ class Runner:
                 self.log(mlog.red(e.output))
                 self.log(mlog.red(str(e)))
                 return False
+            fetched += max(git_objects_size(self.repo_dir) - before, 0)
+            self.fetched_bytes = fetched
+            self.log('  -> Fetched', format_size(fetched))
 
         if branch == '':
             # We are currently in detached mode
@@ -749,14 +764,19 @@ def run(options: 'Arguments') -> int:
     if pre_func:
         pre_func(options)
     logger = Logger(len(wraps))
+    runners: T.List[Runner] = []
     for wrap in wraps:
         dirname = Path(source_dir, subproject_dir, wrap.directory).as_posix()
         runner = Runner(logger, r, wrap, dirname, options)
         task = loop.run_in_executor(executor, runner.run)
         tasks.append(task)
         task_names.append(wrap.name)
+        runners.append(runner)
     results = loop.run_until_complete(asyncio.gather(*tasks))
     logger.flush()
+    fetched = [runner.fetched_bytes for runner in runners if runner.fetched_bytes is not None]
+    if fetched:
+        mlog.log('Fetched', mlog.bold(format_size(sum(fetched))), 'from', len(fetched), 'git remote(s)')
     post_func = getattr(options, 'post_func', None)
     if post_func:
         post_func(options)
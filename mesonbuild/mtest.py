@@ -13,7 +13,11 @@ import argparse
 import asyncio
 import datetime
 import enum
+import hashlib
+import heapq
+import itertools
 import json
+import math
 import os
 import pickle
 import platform
@@ -121,6 +125,18 @@ def test_slice(arg: str) -> T.Tuple[int, int]:
 
     return subslice, nrslices
 
+def test_resource(arg: str) -> T.Tuple[str, int]:
+    name, sep, count = arg.partition('=')
+    if not name or not sep:
+        raise argparse.ArgumentTypeError("value does not conform to format 'NAME=COUNT'")
+    try:
+        value = int(count)
+    except ValueError:
+        raise argparse.ArgumentTypeError('COUNT is not an integer')
+    if value <= 0:
+        raise argparse.ArgumentTypeError('COUNT is not a positive integer')
+    return name, value
+
 # Note: when adding arguments, please also add them to the completion
 # scripts in $MESONSRC/data/shell-completions/
 def add_arguments(parser: argparse.ArgumentParser) -> None:
@@ -173,6 +189,27 @@ def add_arguments(parser: argparse.ArgumentParser) -> None:
                         help='Maximum number of lines to show from a long test log. Since 1.5.0.')
     parser.add_argument('--slice', default=None, type=test_slice, metavar='SLICE/NUM_SLICES',
                         help='Split tests into NUM_SLICES slices and execute slice SLICE. Since 1.8.0.')
+    parser.add_argument('--schedule', default='history', choices=['history', 'declared'],
+                        help='Order in which parallel tests of the same priority are started: longest first, '
+                        'according to the duration of their previous runs, or as declared. Since 1.10.0.')
+    parser.add_argument('--slice-by', default='index', choices=['index', 'duration'],
+                        help='How --slice splits the tests: by their index, or into slices that take the same '
+                        'time according to the duration of their previous runs. Since 1.10.0.')
+    parser.add_argument('--durations', default=None, metavar='FILE',
+                        help='File to read the duration of the previous runs of the tests from, and to write '
+                        'the new ones to, instead of the build directory. Since 1.10.0.')
+    parser.add_argument('--resource', default=[], dest='resources', action='append', type=test_resource,
+                        metavar='NAME=COUNT',
+                        help='How many tests using the resource NAME can run at the same time, '
+                        '1 if not given. Since 1.10.0.')
+    parser.add_argument('--pipeline', default=False, action='store_true',
+                        help='Build the dependencies of the tests in batches, and start each test as soon as its '
+                        'own are built, instead of building all of them first. Since 1.10.0.')
+    parser.add_argument('--cached', default=False, action='store_true',
+                        help='Do not run again the tests that passed, if their command, environment, '
+                        'executable, depends and file arguments did not change. Since 1.10.0.')
+    parser.add_argument('--no-cache', dest='cached', action='store_false',
+                        help='Run all tests, even with --cached. Since 1.10.0.')
     parser.add_argument('args', nargs='*',
                         help='Optional list of test names to run. "testname" to run all tests with that name, '
                         '"subprojname:testname" to specifically run "testname" from "subprojname", '
@@ -538,6 +575,11 @@ class ConsoleLogger(TestLogger):
     HLINE = "\u2015"
     RTRI = "\u25B6 "
 
+    # Short tests finish faster than the console can keep up with, so
+    # their results are flushed and the progress report is redrawn at
+    # most this often
+    REFRESH_INTERVAL = 0.05
+
     def __init__(self, max_lines: int) -> None:
         self.max_lines = max_lines
         self.running_tests: OrderedSet['TestRun'] = OrderedSet()
@@ -549,6 +591,7 @@ class ConsoleLogger(TestLogger):
         # it will create a new event loop
         self.update: asyncio.Event
         self.should_erase_line = ''
+        self.flush_pending = False
         self.test_count = 0
         self.started_tests = 0
         self.spinner_index = 0
@@ -576,6 +619,15 @@ class ConsoleLogger(TestLogger):
             print(self.should_erase_line, end='')
             self.should_erase_line = ''
 
+    def request_flush(self) -> None:
+        if not self.flush_pending:
+            self.flush_pending = True
+            asyncio.get_running_loop().call_later(self.REFRESH_INTERVAL, self.flush_output)
+
+    def flush_output(self) -> None:
+        self.flush_pending = False
+        sys.stdout.flush()
+
     def print_progress(self, line: str) -> None:
         print(self.should_erase_line, line, sep='', end='\r')
         self.should_erase_line = '\x1b[K'
@@ -619,10 +671,19 @@ class ConsoleLogger(TestLogger):
         async def report_progress() -> None:
             loop = asyncio.get_running_loop()
             next_update = 0.0
+            next_redraw = 0.0
+            redraw_scheduled = False
             self.request_update()
             while not self.stop:
                 await self.update.wait()
                 self.update.clear()
+                if loop.time() < next_redraw:
+                    if not redraw_scheduled:
+                        loop.call_at(next_redraw, self.request_update)
+                        redraw_scheduled = True
+                    continue
+                redraw_scheduled = False
+                next_redraw = loop.time() + self.REFRESH_INTERVAL
                 # We may get here simply because the progress line has been
                 # overwritten, so do not always switch.  Only do so every
                 # second, or if the printed test has finished
@@ -723,10 +784,10 @@ class ConsoleLogger(TestLogger):
                 print(self.output_end)
                 print(harness.format(result, mlog.colorize_console(), max_left_width=self.max_left_width))
             else:
-                print(harness.format(result, mlog.colorize_console(), max_left_width=self.max_left_width),
-                      flush=True)
+                print(harness.format(result, mlog.colorize_console(), max_left_width=self.max_left_width))
                 if result.verbose or result.res.is_bad():
                     self.print_log(harness, result)
+                self.request_flush()
             if result.warnings:
                 print(flush=True)
                 for w in result.warnings:
@@ -765,7 +826,7 @@ class TextLogfileBuilder(TestFileLogger):
         starttime_str = time.strftime("%H:%M:%S", time.gmtime(result.starttime))
         self.file.write('start time:   ' + starttime_str + '\n')
         self.file.write('duration:     ' + '%.2fs' % result.duration + '\n')
-        self.file.write('result:       ' + result.get_exit_status() + '\n')
+        self.file.write('result:       ' + result.get_exit_status() + (', cached' if result.cached else '') + '\n')
         if result.cmdline:
             self.file.write('command:      ' + result.cmdline + '\n')
         if result.stdo:
@@ -801,6 +862,8 @@ class JsonLogfileBuilder(TestFileLogger):
         }
         if result.stde:
             jresult['stderr'] = result.stde
+        if result.cached:
+            jresult['cached'] = True
         self.file.write(json.dumps(jresult) + '\n')
 
 
@@ -932,6 +995,9 @@ class JunitBuilder(TestLogger):
                 fail = et.SubElement(testcase, 'error')
                 fail.text = 'Test did not finish before configured timeout.'
                 suite.attrib['errors'] = str(int(suite.attrib['errors']) + 1)
+            if test.cached:
+                out = et.SubElement(testcase, 'system-out')
+                out.text = 'Cached result, the test was not run again.'
             if test.stdo:
                 out = et.SubElement(testcase, 'system-out')
                 out.text = replace_unencodable_xml_chars(test.stdo.rstrip())
@@ -975,7 +1041,10 @@ class TestRun:
         self.stde = ''
         self.additional_error = ''
         self.cmd: T.Optional[T.List[str]] = None
+        self._cmdline: T.Optional[str] = None
         self.env = test_env
+        # Looking up os.environ is slow, the harness sets a copy
+        self.inherited_env: T.Mapping[str, str] = os.environ
         self.should_fail = test.should_fail
         self.project = test.project_name
         self.junit: T.Optional[et.ElementTree] = None
@@ -983,6 +1052,8 @@ class TestRun:
         self.verbose = verbose
         self.interactive = interactive
         self.warnings: T.List[str] = []
+        self.fingerprint: T.Optional[str] = None
+        self.cached = False
 
     def start(self, cmd: T.List[str]) -> None:
         self.res = TestResult.RUNNING
@@ -1026,6 +1097,8 @@ class TestRun:
     def get_details(self) -> str:
         if self.res is TestResult.PENDING:
             return ''
+        if self.cached:
+            return 'cached'
         if self.returncode:
             return self.get_exit_status()
         return self.get_results()
@@ -1048,9 +1121,11 @@ class TestRun:
     def cmdline(self) -> T.Optional[str]:
         if not self.cmd:
             return None
-        test_only_env = set(self.env.items()) - set(os.environ.items())
-        return env_tuple_to_str(test_only_env) + \
-            ' '.join(sh_quote(x) for x in self.cmd)
+        if self._cmdline is None:
+            test_only_env = [(k, v) for k, v in self.env.items() if self.inherited_env.get(k) != v]
+            self._cmdline = env_tuple_to_str(test_only_env) + \
+                ' '.join(sh_quote(x) for x in self.cmd)
+        return self._cmdline
 
     def complete_skip(self) -> None:
         self.starttime = time.time()
@@ -1061,6 +1136,12 @@ class TestRun:
     def complete(self) -> None:
         self._complete()
 
+    def complete_cached(self, res: TestResult, returncode: T.Optional[int]) -> None:
+        self.res = res
+        self.returncode = returncode
+        self.cached = True
+        self.duration = time.time() - self.starttime
+
     def get_log(self, colorize: bool = False, stderr_only: bool = False) -> str:
         stdo = '' if stderr_only else self.stdo
         if self.stde or self.additional_error:
@@ -1509,6 +1590,7 @@ class SingleTestRunner:
         is_parallel = test.is_parallel and self.options.num_processes > 1 and not self.options.interactive
         verbose = (test.verbose or self.options.verbose) and not self.options.quiet
         self.runobj = TestRun(test, env, name, timeout, is_parallel, verbose, self.options.interactive)
+        self.cached_result: T.Optional[T.Tuple[TestResult, T.Optional[int]]] = None
 
     @property
     def console_mode(self) -> ConsoleUser:
@@ -1569,7 +1651,10 @@ class SingleTestRunner:
             cmd = self.cmd + self.test.cmd_args + self.options.test_args
             self.runobj.start(cmd)
             harness.log_start_test(self.runobj)
-            await self._run_cmd(harness, cmd)
+            if self.cached_result is not None:
+                self.runobj.complete_cached(*self.cached_result)
+            else:
+                await self._run_cmd(harness, cmd)
         return self.runobj
 
     async def _run_subprocess(self, args: T.List[str], *, stdin: T.Optional[int],
@@ -1582,15 +1667,9 @@ class SingleTestRunner:
             signal.signal(signal.SIGINT, signal.SIG_IGN)
 
         def preexec_fn() -> None:
-            if self.options.interactive:
-                # Restore the SIGINT handler for the child process to
-                # ensure it can handle it.
-                signal.signal(signal.SIGINT, signal.SIG_DFL)
-            else:
-                # We don't want setsid() in gdb because gdb needs the
-                # terminal in order to handle ^C and not show tcsetpgrp()
-                # errors avoid not being able to use the terminal.
-                os.setsid()
+            # Restore the SIGINT handler for the child process to
+            # ensure it can handle it.
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
 
         def postwait_fn() -> None:
             if self.options.interactive:
@@ -1603,7 +1682,14 @@ class SingleTestRunner:
                                                  stderr=stderr,
                                                  env=env,
                                                  cwd=cwd,
-                                                 preexec_fn=preexec_fn if not is_windows() else None)
+                                                 # Without preexec_fn, the test can be started
+                                                 # with vfork(), which is much faster. We don't
+                                                 # want setsid() in gdb because gdb needs the
+                                                 # terminal in order to handle ^C and not show
+                                                 # tcsetpgrp() errors avoid not being able to
+                                                 # use the terminal.
+                                                 preexec_fn=preexec_fn if self.options.interactive and not is_windows() else None,
+                                                 start_new_session=not self.options.interactive and not is_windows())
         return TestSubprocess(p, stdout=stdout, stderr=stderr,
                               postwait_fn=postwait_fn if not is_windows() else None)
 
@@ -1652,6 +1738,344 @@ class SingleTestRunner:
         self.runobj.complete()
 
 
+class TestHistory:
+    '''The duration of the last run of each test, which is kept in the
+    private directory.'''
+
+    version = 1
+
+    def __init__(self, fname: str) -> None:
+        self.fname = fname
+        self.durations: T.Dict[str, float] = {}
+        try:
+            with open(fname, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == self.version:
+                self.durations = data['durations']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    @staticmethod
+    def key(test: TestSerialisation) -> str:
+        return '{}:{} ({})'.format(test.project_name, test.name, ' '.join(test.suite))
+
+    def balanced_slice(self, tests: T.List[TestSerialisation], subslice: int,
+                       nslices: int) -> T.List[TestSerialisation]:
+        '''Return the tests of slice subslice out of nslices, such that all
+        slices take about the same time.
+
+        The result only depends on the tests and on the recorded durations,
+        so that every machine gets the same slices. The longest tests are
+        put first each into the slice that takes the least time so far.
+        Durations are rounded to steps of about 20%, and tests of the same
+        rounded duration are ordered by name hash, so that small variations
+        between runs do not move tests around. Tests that never ran come
+        last, assumed to take the average duration, so that adding a test
+        does not move the others. Non-parallel tests, which run alone, are
+        split first and separately.
+        '''
+        known = list(self.durations.values())
+        default = sum(known) / len(known) if known else 1.0
+
+        order = []
+        for i, test in enumerate(tests):
+            key = self.key(test)
+            duration = self.durations.get(key)
+            if duration is None:
+                bucket, duration = 0, default
+            else:
+                bucket = round(math.log2(max(duration, 0.001)) * 4)
+                duration = 2 ** (bucket / 4)
+            order.append((test.is_parallel, key not in self.durations, -bucket,
+                          hashlib.sha256(key.encode()).hexdigest(), duration, i))
+
+        parallel_load = [0.0] * nslices
+        serial_load = [0.0] * nslices
+        selected: T.Set[int] = set()
+        for is_parallel, _, _, _, duration, i in sorted(order):
+            if is_parallel:
+                k = min(range(nslices), key=lambda k: (parallel_load[k], serial_load[k], k))
+                parallel_load[k] += duration
+            else:
+                k = min(range(nslices), key=lambda k: (serial_load[k], k))
+                serial_load[k] += duration
+            if k == subslice - 1:
+                selected.add(i)
+        return [t for i, t in enumerate(tests) if i in selected]
+
+    def get(self, test: TestSerialisation) -> T.Optional[float]:
+        return self.durations.get(self.key(test))
+
+    def add(self, result: TestRun) -> None:
+        # Skipped and interrupted tests do not tell how long they take
+        if result.res not in {TestResult.SKIP, TestResult.IGNORED, TestResult.INTERRUPT}:
+            self.durations[self.key(result.test)] = round(result.duration, 3)
+
+    def write(self) -> None:
+        tmpname = self.fname + '~'
+        with open(tmpname, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'durations': self.durations}, f)
+        os.replace(tmpname, self.fname)
+
+
+class TestResultCache:
+    '''The tests that passed, with a fingerprint of their inputs, which is
+    kept in the private directory.
+
+    The fingerprint covers the command line, the whole environment of the
+    test, its working directory, and the size and modification time of the
+    files in the command line and in the environment set for the test, and
+    of the outputs of the targets in its depends and of the libraries they
+    link to. Inputs not named there, such as the files of a directory passed
+    as argument, are not covered.
+    '''
+
+    version = 1
+
+    def __init__(self, fname: str, targets_file: str) -> None:
+        self.fname = fname
+        self.targets_file = targets_file
+        self.results: T.Dict[str, T.Dict[str, T.Any]] = {}
+        self._target_files: T.Optional[T.Dict[str, T.List[str]]] = None
+        try:
+            with open(fname, encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == self.version:
+                self.results = data['results']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def target_files(self, target_id: str) -> T.List[str]:
+        if self._target_files is None:
+            self._target_files = {}
+            try:
+                with open(self.targets_file, encoding='utf-8') as f:
+                    for target in json.load(f):
+                        self._target_files[target['id']] = target['filename']
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        return self._target_files.get(target_id, [])
+
+    def fingerprint(self, runner: SingleTestRunner, cmd: T.List[str]) -> str:
+        test = runner.test
+        # The whole environment is an input, since tests can behave
+        # differently depending on the variables they inherit. MALLOC_PERTURB_
+        # is random unless set by the user, and the iteration only changes
+        # with --repeat, which does not use the cache.
+        env = {k: v for k, v in runner.runobj.env.items()
+               if k not in {'MALLOC_PERTURB_', 'MESON_TEST_ITERATION'}}
+        # Only look for files in the variables set for the test
+        test_env = [v for k, v in env.items() if runner.runobj.inherited_env.get(k) != v]
+        files: T.Set[str] = set()
+        for arg in itertools.chain(cmd, test_env):
+            path = os.path.join(test.workdir or '', arg)
+            if os.path.isfile(path):
+                files.add(os.path.abspath(path))
+        # Shared libraries are relinked without changing the executables
+        # that link to them
+        for d in itertools.chain(test.depends, test.link_deps):
+            files.update(self.target_files(d))
+
+        stats: T.List[T.Tuple[str, int, int]] = []
+        for f in sorted(files):
+            try:
+                st = os.stat(f)
+            except OSError:
+                stats.append((f, -1, -1))
+            else:
+                stats.append((f, st.st_size, st.st_mtime_ns))
+
+        data = [cmd, sorted(env.items()), test.workdir, test.should_fail,
+                test.protocol.value, stats]
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+    def check(self, runner: SingleTestRunner) -> None:
+        '''Use the result of the previous run of the test, if it passed with
+        the same inputs.'''
+        if runner.cmd is None:
+            return
+        cmd = runner.cmd + runner.test.cmd_args + runner.options.test_args
+        fingerprint = self.fingerprint(runner, cmd)
+        runner.runobj.fingerprint = fingerprint
+        record = self.results.get(TestHistory.key(runner.test))
+        if record is not None and record['fingerprint'] == fingerprint:
+            runner.cached_result = TestResult(record['result']), record['returncode']
+
+    def add(self, result: TestRun) -> None:
+        if result.fingerprint is None or result.cached:
+            return
+        key = TestHistory.key(result.test)
+        if result.res in {TestResult.OK, TestResult.EXPECTEDFAIL}:
+            self.results[key] = {'fingerprint': result.fingerprint, 'result': result.res.value,
+                                 'returncode': result.returncode}
+        else:
+            self.results.pop(key, None)
+
+    def write(self) -> None:
+        tmpname = self.fname + '~'
+        with open(tmpname, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'results': self.results}, f)
+        os.replace(tmpname, self.fname)
+
+
+class TestSlots:
+    '''The processes and the resources used by the running tests.
+
+    A test uses as many processes as its cpu_cost, and one unit of each of
+    its resources. Tests get them in the order in which they are started,
+    except that a test waiting for a resource lets the tests after it go
+    first. A test waiting for processes does not, so that cheaper tests do
+    not keep delaying it.
+    '''
+
+    def __init__(self, num_processes: int, resources: T.Dict[str, int]) -> None:
+        self.num_processes = num_processes
+        self.free = num_processes
+        self.resources = resources
+        self.used: T.Dict[str, int] = {}
+        self.waiting: T.Deque[T.Tuple[SingleTestRunner, asyncio.Future]] = deque()
+
+    def cost(self, runner: SingleTestRunner) -> int:
+        # More expensive tests run alone
+        return min(runner.test.cpu_cost, self.num_processes)
+
+    def _fits(self, runner: SingleTestRunner) -> bool:
+        return all(self.used.get(r, 0) < self.resources.get(r, 1) for r in runner.test.resources)
+
+    def _take(self, runner: SingleTestRunner) -> None:
+        self.free -= self.cost(runner)
+        for r in runner.test.resources:
+            self.used[r] = self.used.get(r, 0) + 1
+
+    async def acquire(self, runner: SingleTestRunner) -> None:
+        if not self.waiting and self.cost(runner) <= self.free and self._fits(runner):
+            self._take(runner)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append((runner, future))
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self.waiting.remove((runner, future))
+                self._wake()
+            else:
+                self.release(runner)
+            raise
+
+    def release(self, runner: SingleTestRunner) -> None:
+        self.free += self.cost(runner)
+        for r in runner.test.resources:
+            self.used[r] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for runner, future in list(self.waiting):
+            if self.cost(runner) > self.free:
+                break
+            if self._fits(runner):
+                self._take(runner)
+                self.waiting.remove((runner, future))
+                future.set_result(None)
+
+
+class DependencyBuilder:
+    '''Build the dependencies of the tests in batches, in the order in which
+    the tests are started, so that each test can start as soon as its own
+    dependencies are built.
+
+    Batches double in size, from the dependencies of the first test on, so
+    that the first tests start early while ninja only runs a few times.
+    Each batch is built with the processes that no test is using.
+    '''
+
+    def __init__(self, ninja: T.List[str], wd: str, runners: T.List[SingleTestRunner],
+                 num_processes: int) -> None:
+        self.ninja = ninja
+        self.wd = wd
+        self.num_processes = num_processes
+        self.batches: T.List[T.List[str]] = []
+        # Index of the last batch each test needs, -1 if none
+        self.needs: T.Dict[SingleTestRunner, int] = {}
+
+        ninja_targets = get_ninja_targets(wd)
+        batch_of_target: T.Dict[str, int] = {}
+        batch: T.List[str] = []
+        batch_tests = 0
+        for runner in runners:
+            needs = -1
+            added = False
+            for d in runner.test.depends:
+                for target in ninja_targets.get(d, []):
+                    if target not in batch_of_target:
+                        batch_of_target[target] = len(self.batches)
+                        batch.append(target)
+                        added = True
+                    needs = max(needs, batch_of_target[target])
+            self.needs[runner] = needs
+            batch_tests += added
+            if batch_tests == 1 << len(self.batches):
+                self.batches.append(batch)
+                batch = []
+                batch_tests = 0
+        if batch:
+            self.batches.append(batch)
+        self.built = [asyncio.Event() for _ in self.batches]
+        # Whether each batch could be built, once its event is set
+        self.succeeded = [False] * len(self.batches)
+
+    async def wait(self, runner: SingleTestRunner) -> bool:
+        '''Wait for the dependencies of runner, and return whether they
+        could be built.'''
+        needs = self.needs[runner]
+        if needs < 0:
+            return True
+        await self.built[needs].wait()
+        return self.succeeded[needs]
+
+    async def run(self, harness: TestHarness) -> bool:
+        try:
+            for i, (batch, built) in enumerate(zip(self.batches, self.built)):
+                jobs = max(1, self.num_processes - harness.running_processes)
+                p = await asyncio.create_subprocess_exec(*self.ninja, '-C', self.wd, '-j', str(jobs), *batch,
+                                                         stdin=asyncio.subprocess.DEVNULL,
+                                                         stdout=asyncio.subprocess.PIPE,
+                                                         stderr=asyncio.subprocess.STDOUT)
+                try:
+                    stdo, _ = await p.communicate()
+                except asyncio.CancelledError:
+                    p.terminate()
+                    await p.wait()
+                    raise
+                if p.returncode != 0:
+                    harness.flush_logfiles()
+                    print(stdo.decode(errors='replace'), end='')
+                    print(f'Could not rebuild {self.wd}')
+                    harness.build_failed = True
+                    return False
+                self.succeeded[i] = True
+                built.set()
+            return True
+        finally:
+            # Wake up the tests left, which are then not run
+            for built in self.built:
+                built.set()
+
+
+def expected_makespan(durations: T.List[T.Tuple[float, bool]], num_processes: int) -> float:
+    '''Return how long running tests with the given durations, and whether
+    they are parallel, takes when they are started in this order.'''
+    slots = [0.0] * num_processes
+    for duration, is_parallel in durations:
+        if is_parallel:
+            heapq.heappush(slots, heapq.heappop(slots) + duration)
+        else:
+            # Waits for all the running tests, and runs alone
+            slots = [max(slots) + duration] * num_processes
+    return max(slots)
+
+
 class TestHarness:
     def __init__(self, options: argparse.Namespace):
         self.options = options
@@ -1671,6 +2095,18 @@ class TestHarness:
         self.loggers.append(self.console_logger)
         self.need_console = False
         self.ninja: T.List[str] = None
+        self.history: T.Optional[TestHistory] = None
+        self.record_durations = False
+        self.expected_makespan: T.Optional[float] = None
+        self.makespan: T.Optional[float] = None
+        self.result_cache: T.Optional[TestResultCache] = None
+        self.environ: T.Optional[T.Dict[str, str]] = None
+        self.setup_options: T.Dict[T.Optional[str], T.Tuple[argparse.Namespace, T.Dict[str, str]]] = {}
+        self.cached_count = 0
+        self.pipeline = False
+        self.max_processes = 0
+        self.build_failed = False
+        self.running_processes = 0
 
         self.logfile_base: T.Optional[str] = None
         if self.options.logbase and not self.options.interactive:
@@ -1785,20 +2221,34 @@ class TestHarness:
             sys.exit('Conflict: both test setup and command line specify an exe wrapper.')
         return current.env.get_env(os.environ.copy())
 
+    def get_setup_options(self, test: TestSerialisation) -> T.Tuple[argparse.Namespace, T.Dict[str, str]]:
+        '''Return the options and the environment of the test setup of the
+        test, which are shared by all the tests using the same setup.'''
+        if self.environ is None:
+            self.environ = os.environ.copy()
+        key = None
+        if self.options.setup:
+            key = self.options.setup if ':' in self.options.setup else test.project_name
+        if key not in self.setup_options:
+            options = deepcopy(self.options)
+            if self.options.setup:
+                env = self.merge_setup_options(options, test)
+            else:
+                env = self.environ
+            self.setup_options[key] = options, env
+        return self.setup_options[key]
+
     def get_test_runner(self, test: TestSerialisation, iteration: int) -> SingleTestRunner:
         name = self.get_pretty_suite(test)
-        options = deepcopy(self.options)
-        if self.options.setup:
-            env = self.merge_setup_options(options, test)
-        else:
-            env = os.environ.copy()
-        test_env = test.env.get_env(env)
-        env.update(test_env)
+        options, setup_env = self.get_setup_options(test)
+        env = test.env.get_env(setup_env)
         if (test.is_cross_built and test.needs_exe_wrapper and
                 test.exe_wrapper and test.exe_wrapper.found()):
             env['MESON_EXE_WRAPPER'] = join_args(test.exe_wrapper.get_command())
         env['MESON_TEST_ITERATION'] = str(iteration + 1)
-        return SingleTestRunner(test, env, name, options)
+        runner = SingleTestRunner(test, env, name, options)
+        runner.runobj.inherited_env = self.environ
+        return runner
 
     def process_test_result(self, result: TestRun) -> None:
         if result.res is TestResult.TIMEOUT:
@@ -1820,6 +2270,12 @@ class TestHarness:
 
         if result.res.is_bad():
             self.collected_failures.append(result)
+        if result.cached:
+            self.cached_count += 1
+        elif self.record_durations:
+            self.get_history().add(result)
+        if self.result_cache is not None:
+            self.result_cache.add(result)
         for l in self.loggers:
             l.log(self, result)
 
@@ -1879,6 +2335,10 @@ class TestHarness:
         for result, count in results.items():
             if count > 0 or result.startswith('Ok:') or result.startswith('Fail:'):
                 summary.append(result + '{:<4}'.format(count))
+        if self.expected_makespan is not None and self.makespan is not None and not self.cached_count:
+            summary.append(f'\nTook {self.makespan:.2f}s, {self.expected_makespan:.2f}s expected from previous runs')
+        if self.cached_count:
+            summary.append(f'\n{self.cached_count} results cached from previous runs, use --no-cache to run all tests')
 
         return '\n{}\n'.format('\n'.join(summary))
 
@@ -1893,7 +2353,11 @@ class TestHarness:
         rebuild_only_tests = tests if self.options.args else []
         if not tests:
             return 0
-        if not self.options.no_rebuild and not rebuild_deps(self.ninja, self.options.wd, rebuild_only_tests, self.options.benchmark):
+        # Dependencies are built while running the tests when pipelining
+        self.pipeline = self.options.pipeline and not self.options.no_rebuild
+        self.max_processes = self.options.num_processes
+        if not self.options.no_rebuild and not self.pipeline and \
+                not rebuild_deps(self.ninja, self.options.wd, rebuild_only_tests, self.options.benchmark):
             # We return 125 here in case the build failed.
             # The reason is that exit code 125 tells `git bisect run` that the current
             # commit should be skipped.  Thus users can directly use `meson test` to
@@ -1904,6 +2368,11 @@ class TestHarness:
         self.name_max_len = max(uniwidth(self.get_pretty_suite(test)) for test in tests)
         self.options.num_processes = min(self.options.num_processes,
                                          len(tests) * self.options.repeat)
+        # Durations under a debugger are meaningless, and benchmarks are
+        # always run one at a time
+        self.record_durations = not self.options.benchmark and not self.options.gdb and not self.options.interactive
+        if self.record_durations and self.options.schedule == 'history' and self.options.num_processes > 1:
+            tests = self.schedule_tests(tests)
         startdir = os.getcwd()
         try:
             os.chdir(self.options.wd)
@@ -1917,12 +2386,59 @@ class TestHarness:
                     self.need_console = any(runner.console_mode is not ConsoleUser.LOGGER
                                             for runner in runners)
 
+            # Repeated tests are meant to run again
+            if self.options.cached and self.record_durations and self.options.repeat == 1:
+                self.result_cache = TestResultCache(os.path.abspath(os.path.join('meson-private', 'test-results.json')),
+                                                    os.path.join('meson-info', 'intro-targets.json'))
+
             self.test_count = len(runners)
             self.run_tests(runners)
         finally:
             os.chdir(startdir)
+        if self.record_durations:
+            self.get_history().write()
+        if self.result_cache is not None:
+            self.result_cache.write()
+        if self.build_failed:
+            sys.exit(125)
         return self.total_failure_count()
 
+    def get_history(self) -> TestHistory:
+        if self.history is None:
+            fname = self.options.durations or os.path.join(self.options.wd, 'meson-private', 'test-durations.json')
+            self.history = TestHistory(os.path.abspath(fname))
+        return self.history
+
+    def schedule_tests(self, tests: T.List[TestSerialisation]) -> T.List[TestSerialisation]:
+        '''Start the longest parallel tests first, so that they do not end
+        last, after all other tests are done.
+
+        Tests are only moved within each group of parallel tests of the same
+        priority; those that never ran start first, as they could be long.
+        '''
+        history = self.get_history()
+
+        def key(test: TestSerialisation) -> T.Tuple[int, bool, float]:
+            duration = history.get(test)
+            return -test.priority, duration is not None, -(duration or 0)
+
+        scheduled: T.List[TestSerialisation] = []
+        group: T.List[TestSerialisation] = []
+        for test in tests:
+            if test.is_parallel:
+                group.append(test)
+            else:
+                scheduled += sorted(group, key=key)
+                scheduled.append(test)
+                group = []
+        scheduled += sorted(group, key=key)
+
+        durations = [(history.get(test), test.is_parallel) for test in scheduled]
+        known = [(d, is_parallel) for d, is_parallel in durations if d is not None]
+        if len(known) == len(durations):
+            self.expected_makespan = expected_makespan(known * self.options.repeat, self.options.num_processes)
+        return scheduled
+
     @staticmethod
     def split_suite_string(suite: str) -> T.Tuple[str, str]:
         if ':' in suite:
@@ -2045,7 +2561,10 @@ class TestHarness:
             our_slice, nslices = self.options.slice
             if nslices > len(tests):
                 raise MesonException(f'number of slices ({nslices}) exceeds number of tests ({len(tests)})')
-            tests = tests[our_slice - 1::nslices]
+            if self.options.slice_by == 'duration':
+                tests = self.get_history().balanced_slice(tests, our_slice, nslices)
+            else:
+                tests = tests[our_slice - 1::nslices]
 
         if not tests:
             print('No suitable tests defined.', file=errorfile)
@@ -2096,6 +2615,9 @@ class TestHarness:
             # TODO: this is the default for python 3.8
             if sys.platform == 'win32':
                 asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+            elif sys.version_info < (3, 12) and can_use_pidfd():
+                # The default before 3.12 starts a thread for each test
+                asyncio.set_child_watcher(asyncio.PidfdChildWatcher())
 
             asyncio.run(self._run_tests(runners))
         finally:
@@ -2110,22 +2632,37 @@ class TestHarness:
             l.start_test(self, test)
 
     async def _run_tests(self, runners: T.List[SingleTestRunner]) -> None:
-        semaphore = asyncio.Semaphore(self.options.num_processes)
+        slots = TestSlots(self.max_processes, dict(self.options.resources))
         futures: T.Deque[asyncio.Future] = deque()
         running_tests: T.Dict[asyncio.Future, str] = {}
         interrupted = False
         ctrlc_times: T.Deque[float] = deque(maxlen=MAX_CTRLC)
         loop = asyncio.get_running_loop()
+        builder: T.Optional[DependencyBuilder] = None
+        build_task: T.Optional[asyncio.Future] = None
+        if self.pipeline:
+            builder = DependencyBuilder(self.ninja, self.options.wd, runners, self.max_processes)
 
         async def run_test(test: SingleTestRunner) -> None:
-            async with semaphore:
+            if builder is not None and not await builder.wait(test):
+                return
+            await slots.acquire(test)
+            try:
                 if interrupted or (self.options.repeat > 1 and self.fail_count):
                     return
-                res = await test.run(self)
+                if self.result_cache is not None:
+                    self.result_cache.check(test)
+                self.running_processes += slots.cost(test)
+                try:
+                    res = await test.run(self)
+                finally:
+                    self.running_processes -= slots.cost(test)
                 self.process_test_result(res)
                 maxfail = self.options.maxfail
                 if maxfail and self.fail_count >= maxfail and res.res.is_bad():
                     cancel_all_tests()
+            finally:
+                slots.release(test)
 
         def test_done(f: asyncio.Future) -> None:
             if not f.cancelled():
@@ -2145,9 +2682,17 @@ class TestHarness:
             del running_tests[future]
             future.cancel()
 
+        def build_done(f: asyncio.Future) -> None:
+            nonlocal interrupted
+            if not f.cancelled() and not f.result():
+                # Let the running tests finish, but do not start any other
+                interrupted = True
+
         def cancel_all_tests() -> None:
             nonlocal interrupted
             interrupted = True
+            if build_task is not None:
+                build_task.cancel()
             while running_tests:
                 cancel_one_test(False)
 
@@ -2185,6 +2730,10 @@ class TestHarness:
             else:
                 loop.add_signal_handler(signal.SIGINT, sigterm_handler)
             loop.add_signal_handler(signal.SIGTERM, sigterm_handler)
+        start = time.monotonic()
+        if builder is not None:
+            build_task = asyncio.ensure_future(builder.run(self))
+            build_task.add_done_callback(build_done)
         try:
             for runner in runners:
                 if not runner.is_parallel:
@@ -2199,6 +2748,9 @@ class TestHarness:
                     break
 
             await complete_all(futures)
+            if build_task is not None:
+                await complete(build_task)
+            self.makespan = time.monotonic() - start
         finally:
             if sys.platform != 'win32':
                 loop.remove_signal_handler(signal.SIGINT)
@@ -2206,33 +2758,47 @@ class TestHarness:
             for l in self.loggers:
                 await l.finish(self)
 
+def can_use_pidfd() -> bool:
+    if not hasattr(asyncio, 'PidfdChildWatcher'):
+        return False
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return False
+    return True
+
 def list_tests(th: TestHarness) -> bool:
     tests = th.get_tests(errorfile=sys.stderr)
     for t in tests:
         print(th.get_pretty_suite(t))
     return not tests
 
-def rebuild_deps(ninja: T.List[str], wd: str, tests: T.List[TestSerialisation], benchmark: bool) -> bool:
+def get_ninja_targets(wd: str) -> T.Dict[str, T.List[str]]:
+    '''Return the ninja targets for the outputs of each build target, by id.'''
     def convert_path_to_target(path: str) -> str:
         path = os.path.relpath(path, wd)
         if os.sep != '/':
             path = path.replace(os.sep, '/')
         return path
 
+    targets_file = os.path.join(wd, 'meson-info/intro-targets.json')
+    with open(targets_file, encoding='utf-8') as fp:
+        targets_info = json.load(fp)
+
+    intro_targets: T.Dict[str, T.List[str]] = {}
+    for target in targets_info:
+        intro_targets[target['id']] = [
+            convert_path_to_target(f)
+            for f in target['filename']]
+    return intro_targets
+
+def rebuild_deps(ninja: T.List[str], wd: str, tests: T.List[TestSerialisation], benchmark: bool) -> bool:
     assert len(ninja) > 0
 
     targets: T.Set[str] = set()
     if tests:
-        targets_file = os.path.join(wd, 'meson-info/intro-targets.json')
-        with open(targets_file, encoding='utf-8') as fp:
-            targets_info = json.load(fp)
-
         depends: T.Set[str] = set()
-        intro_targets: T.Dict[str, T.List[str]] = {}
-        for target in targets_info:
-            intro_targets[target['id']] = [
-                convert_path_to_target(f)
-                for f in target['filename']]
+        intro_targets = get_ninja_targets(wd)
         for t in tests:
             for d in t.depends:
                 if d in depends:
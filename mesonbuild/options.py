@@ -101,6 +101,7 @@ _BUILTIN_NAMES = {
     'warning_level',
     'werror',
     'wrap_mode',
+    'wrap_prefetch',
     'force_fallback_for',
     'pkg_config_path',
     'cmake_prefix_path',
@@ -731,6 +732,7 @@ BUILTIN_CORE_OPTIONS: T.Mapping[OptionKey, AnyOptionType] = {
         UserComboOption('warning_level', 'Compiler warning level to use', '1', choices=['0', '1', '2', '3', 'everything']),
         UserBooleanOption('werror', 'Treat warnings as errors', False),
         UserComboOption('wrap_mode', 'Wrap mode', 'default', choices=['default', 'nofallback', 'nodownload', 'forcefallback', 'nopromote']),
+        UserBooleanOption('wrap_prefetch', 'Download and extract wrap files in the background', False),
         UserStringArrayOption('force_fallback_for', 'Force fallback for those subprojects', []),
         UserBooleanOption('vsenv', 'Activate Visual Studio environment', False, readonly=True),
 
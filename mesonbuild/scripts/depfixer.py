@@ -5,6 +5,7 @@ from __future__ import annotations
 
 
 import sys
+import mmap
 import os
 import stat
 import struct
@@ -12,9 +13,34 @@ import shutil
 import subprocess
 import typing as T
 
-from ..mesonlib import OrderedSet, generate_list, Popen_safe
+from ..utils.core import generate_list
+
+if T.TYPE_CHECKING:
+    from ..mesonlib import OrderedSet
 
 SHT_STRTAB = 3
+SHT_DYNSYM = 11
+SHT_NOBITS = 8
+SHT_GNU_VERDEF = 0x6ffffffd
+SHT_GNU_VERNEED = 0x6ffffffe
+SHT_GNU_VERSYM = 0x6fffffff
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xff00
+SHN_ABS = 0xfff1
+SHN_COMMON = 0xfff2
+STB_LOCAL = 0
+STB_GLOBAL = 1
+STB_WEAK = 2
+STB_GNU_UNIQUE = 10
+STT_OBJECT = 1
+STT_COMMON = 5
+STT_GNU_IFUNC = 10
+VER_FLG_BASE = 0x1
+VERSYM_HIDDEN = 0x8000
+VERSYM_VERSION = 0x7fff
 DT_NEEDED = 1
 DT_RPATH = 15
 DT_RUNPATH = 29
@@ -25,6 +51,25 @@ DT_MIPS_RLD_MAP_REL = 1879048245
 # Global cache for tools
 INSTALL_NAME_TOOL = False
 
+# Symbol types that `nm` derives from the name of the section of a symbol,
+# before looking at the section flags
+NM_SECTION_TYPES = [
+    (b'.bss', 'b'), (b'code', 't'), (b'.data', 'd'), (b'*DEBUG*', 'N'),
+    (b'.debug', 'N'), (b'.drectve', 'i'), (b'.edata', 'e'), (b'.fini', 't'),
+    (b'.idata', 'i'), (b'.init', 't'), (b'.pdata', 'p'), (b'.rdata', 'r'),
+    (b'.rodata', 'r'), (b'.sbss', 's'), (b'.scommon', 'c'), (b'.sdata', 'g'),
+    (b'.text', 't'), (b'vars', 'd'), (b'zerovars', 'b'),
+]
+NM_SECTION_SEPARATORS = {b'', b'.', b'$'} | {bytes([c]) for c in b'0123456789'}
+
+class DynamicSymbol(T.NamedTuple):
+    name: str
+    # '@VERSION' or '@@VERSION' for the default version, as printed by nm
+    version: str
+    # The symbol type letter of nm
+    symtype: str
+    size: int
+
 class DataSizes:
     def __init__(self, ptrsize: int, is_le: bool) -> None:
         if is_le:
@@ -53,68 +98,46 @@ class DataSizes:
             self.OffSize = 4
 
 class DynamicEntry(DataSizes):
-    def __init__(self, ifile: T.BinaryIO, ptrsize: int, is_le: bool) -> None:
+    def __init__(self, data: T.Union[bytes, mmap.mmap], offset: int, ptrsize: int, is_le: bool) -> None:
         super().__init__(ptrsize, is_le)
         self.ptrsize = ptrsize
         if ptrsize == 64:
-            self.d_tag = struct.unpack(self.Sxword, ifile.read(self.SxwordSize))[0]
-            self.val = struct.unpack(self.XWord, ifile.read(self.XWordSize))[0]
+            self.fmt = self.Sxword + self.XWord[1:]
         else:
-            self.d_tag = struct.unpack(self.Sword, ifile.read(self.SwordSize))[0]
-            self.val = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
+            self.fmt = self.Sword + self.Word[1:]
+        self.size = struct.calcsize(self.fmt)
+        self.d_tag, self.val = struct.unpack_from(self.fmt, data, offset)
 
-    def write(self, ofile: T.BinaryIO) -> None:
-        if self.ptrsize == 64:
-            ofile.write(struct.pack(self.Sxword, self.d_tag))
-            ofile.write(struct.pack(self.XWord, self.val))
-        else:
-            ofile.write(struct.pack(self.Sword, self.d_tag))
-            ofile.write(struct.pack(self.Word, self.val))
+    def write(self, data: mmap.mmap, offset: int) -> None:
+        struct.pack_into(self.fmt, data, offset, self.d_tag, self.val)
 
 class SectionHeader(DataSizes):
-    def __init__(self, ifile: T.BinaryIO, ptrsize: int, is_le: bool) -> None:
+    def __init__(self, data: T.Union[bytes, mmap.mmap], offset: int, ptrsize: int, is_le: bool) -> None:
         super().__init__(ptrsize, is_le)
-        is_64 = ptrsize == 64
-
-# Elf64_Word
-        self.sh_name = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Word
-        self.sh_type = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Xword
-        if is_64:
-            self.sh_flags = struct.unpack(self.XWord, ifile.read(self.XWordSize))[0]
-        else:
-            self.sh_flags = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Addr
-        self.sh_addr = struct.unpack(self.Addr, ifile.read(self.AddrSize))[0]
-# Elf64_Off
-        self.sh_offset = struct.unpack(self.Off, ifile.read(self.OffSize))[0]
-# Elf64_Xword
-        if is_64:
-            self.sh_size = struct.unpack(self.XWord, ifile.read(self.XWordSize))[0]
-        else:
-            self.sh_size = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Word
-        self.sh_link = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Word
-        self.sh_info = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Xword
-        if is_64:
-            self.sh_addralign = struct.unpack(self.XWord, ifile.read(self.XWordSize))[0]
-        else:
-            self.sh_addralign = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
-# Elf64_Xword
-        if is_64:
-            self.sh_entsize = struct.unpack(self.XWord, ifile.read(self.XWordSize))[0]
-        else:
-            self.sh_entsize = struct.unpack(self.Word, ifile.read(self.WordSize))[0]
+        # The Elf64_Xword fields are Elf32_Word in 32-bit files
+        xword = self.XWord[1:] if ptrsize == 64 else self.Word[1:]
+        fmt = (self.Word        # sh_name
+               + 'I'            # sh_type
+               + xword          # sh_flags
+               + self.Addr[1:]  # sh_addr
+               + self.Off[1:]   # sh_offset
+               + xword          # sh_size
+               + 'I'            # sh_link
+               + 'I'            # sh_info
+               + xword          # sh_addralign
+               + xword)         # sh_entsize
+        self.size = struct.calcsize(fmt)
+        (self.sh_name, self.sh_type, self.sh_flags, self.sh_addr, self.sh_offset, self.sh_size,
+         self.sh_link, self.sh_info, self.sh_addralign, self.sh_entsize) = struct.unpack_from(fmt, data, offset)
 
 class Elf(DataSizes):
-    def __init__(self, bfile: str, verbose: bool = True) -> None:
+    def __init__(self, bfile: str, verbose: bool = True, readonly: bool = False) -> None:
         self.bfile = bfile
         self.verbose = verbose
+        self.readonly = readonly
         self.sections: T.List[SectionHeader] = []
         self.dynamic: T.List[DynamicEntry] = []
+        self.mm: T.Optional[mmap.mmap] = None
         self.open_bf(bfile)
         try:
             (self.ptrsize, self.is_le) = self.detect_elf_type()
@@ -127,8 +150,11 @@ class Elf(DataSizes):
             raise
 
     def open_bf(self, bfile: str) -> None:
-        self.bf = None
+        self.bf: T.Optional[T.BinaryIO] = None
         self.bf_perms = None
+        if self.readonly:
+            self.bf = open(bfile, 'rb')
+            return
         try:
             self.bf = open(bfile, 'r+b')
         except PermissionError as e:
@@ -142,6 +168,9 @@ class Elf(DataSizes):
                 raise e
 
     def close_bf(self) -> None:
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
         if self.bf is not None:
             if self.bf_perms is not None:
                 os.chmod(self.bf.fileno(), self.bf_perms)
@@ -181,43 +210,24 @@ class Elf(DataSizes):
         return ptrsize, is_le
 
     def parse_header(self) -> None:
-        self.bf.seek(0)
-        self.e_ident = struct.unpack('16s', self.bf.read(16))[0]
-        self.e_type = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_machine = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_version = struct.unpack(self.Word, self.bf.read(self.WordSize))[0]
-        self.e_entry = struct.unpack(self.Addr, self.bf.read(self.AddrSize))[0]
-        self.e_phoff = struct.unpack(self.Off, self.bf.read(self.OffSize))[0]
-        self.e_shoff = struct.unpack(self.Off, self.bf.read(self.OffSize))[0]
-        self.e_flags = struct.unpack(self.Word, self.bf.read(self.WordSize))[0]
-        self.e_ehsize = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_phentsize = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_phnum = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_shentsize = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_shnum = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
-        self.e_shstrndx = struct.unpack(self.Half, self.bf.read(self.HalfSize))[0]
+        # The whole file is mapped and parsed in place, without reading it
+        # field by field.
+        fmt = self.Half[0] + '16shhI' + self.Addr[1:] + 2 * self.Off[1:] + 'I6h'
+        (self.e_ident, self.e_type, self.e_machine, self.e_version, self.e_entry,
+         self.e_phoff, self.e_shoff, self.e_flags, self.e_ehsize, self.e_phentsize,
+         self.e_phnum, self.e_shentsize, self.e_shnum, self.e_shstrndx) = struct.unpack_from(fmt, self.mapped())
 
     def parse_sections(self) -> None:
-        self.bf.seek(self.e_shoff)
+        mm = self.mapped()
+        offset = self.e_shoff
         for _ in range(self.e_shnum):
-            self.sections.append(SectionHeader(self.bf, self.ptrsize, self.is_le))
-
-    def read_str(self) -> bytes:
-        arr = []
-        x = self.bf.read(1)
-        while x != b'\0':
-            arr.append(x)
-            x = self.bf.read(1)
-            if x == b'':
-                raise RuntimeError('Tried to read past the end of the file')
-        return b''.join(arr)
+            sec = SectionHeader(mm, offset, self.ptrsize, self.is_le)
+            self.sections.append(sec)
+            offset += sec.size
 
     def find_section(self, target_name: bytes) -> T.Optional[SectionHeader]:
-        section_names = self.sections[self.e_shstrndx]
         for i in self.sections:
-            self.bf.seek(section_names.sh_offset + i.sh_name)
-            name = self.read_str()
-            if name == target_name:
+            if self.section_name(i) == target_name:
                 return i
         return None
 
@@ -225,19 +235,19 @@ class Elf(DataSizes):
         sec = self.find_section(b'.dynamic')
         if sec is None:
             return
-        self.bf.seek(sec.sh_offset)
+        mm = self.mapped()
+        offset = sec.sh_offset
         while True:
-            e = DynamicEntry(self.bf, self.ptrsize, self.is_le)
+            e = DynamicEntry(mm, offset, self.ptrsize, self.is_le)
             self.dynamic.append(e)
             if e.d_tag == 0:
                 break
+            offset += e.size
 
     @generate_list
     def get_section_names(self) -> T.Generator[str, None, None]:
-        section_names = self.sections[self.e_shstrndx]
         for i in self.sections:
-            self.bf.seek(section_names.sh_offset + i.sh_name)
-            yield self.read_str().decode()
+            yield self.section_name(i).decode()
 
     def get_soname(self) -> T.Optional[str]:
         soname = None
@@ -249,8 +259,7 @@ class Elf(DataSizes):
                 strtab = i
         if soname is None or strtab is None:
             return None
-        self.bf.seek(strtab.val + soname.val)
-        return self.read_str().decode()
+        return self.read_cstr(strtab.val + soname.val).decode()
 
     def get_entry_offset(self, entrynum: int) -> T.Optional[int]:
         sec = self.find_section(b'.dynstr')
@@ -265,24 +274,185 @@ class Elf(DataSizes):
         offset = self.get_entry_offset(DT_RPATH)
         if offset is None:
             return None
-        self.bf.seek(offset)
-        return self.read_str().decode()
+        return self.read_cstr(offset).decode()
 
     def get_runpath(self) -> T.Optional[str]:
         offset = self.get_entry_offset(DT_RUNPATH)
         if offset is None:
             return None
-        self.bf.seek(offset)
-        return self.read_str().decode()
+        return self.read_cstr(offset).decode()
 
     @generate_list
     def get_deps(self) -> T.Generator[str, None, None]:
         sec = self.find_section(b'.dynstr')
         for i in self.dynamic:
             if i.d_tag == DT_NEEDED:
-                offset = sec.sh_offset + i.val
-                self.bf.seek(offset)
-                yield self.read_str().decode()
+                yield self.read_cstr(sec.sh_offset + i.val).decode()
+
+    def mapped(self) -> mmap.mmap:
+        if self.mm is None:
+            access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+            self.mm = mmap.mmap(self.bf.fileno(), 0, access=access)
+        return self.mm
+
+    def read_cstr(self, offset: int) -> bytes:
+        mm = self.mapped()
+        end = mm.find(b'\0', offset)
+        if end < 0:
+            raise RuntimeError('Tried to read past the end of the file')
+        return mm[offset:end]
+
+    def section_name(self, sec: SectionHeader) -> bytes:
+        return self.read_cstr(self.sections[self.e_shstrndx].sh_offset + sec.sh_name)
+
+    def find_section_by_type(self, sh_type: int) -> T.Optional[SectionHeader]:
+        for i in self.sections:
+            if i.sh_type == sh_type:
+                return i
+        return None
+
+    def get_soname_line(self) -> T.Optional[str]:
+        """The line of `readelf -d` that shows the SONAME."""
+        sec = self.find_section(b'.dynamic')
+        if sec is None:
+            return None
+        strtab = self.sections[sec.sh_link].sh_offset
+        for i in self.dynamic:
+            if i.d_tag == DT_SONAME:
+                soname = self.read_cstr(strtab + i.val).decode(errors='replace')
+                if self.ptrsize == 64:
+                    return f' 0x{DT_SONAME:016x} (SONAME)             Library soname: [{soname}]'
+                return f' 0x{DT_SONAME:08x} (SONAME)                     Library soname: [{soname}]'
+        return None
+
+    def get_symbol_versions(self) -> T.Tuple[T.Dict[int, T.Tuple[str, bool]], int]:
+        """Map the version indices of .gnu.version to their name and whether
+        they are version definitions, like libbfd does, and return the
+        number of version definitions."""
+        mm = self.mapped()
+        e = '<' if self.is_le else '>'
+        versions: T.Dict[int, T.Tuple[str, bool]] = {}
+        base_is_default = False
+        cverdefs = 0
+        verdef = self.find_section_by_type(SHT_GNU_VERDEF)
+        if verdef is not None:
+            strtab = self.sections[verdef.sh_link].sh_offset
+            offset = verdef.sh_offset
+            for _ in range(verdef.sh_info):
+                _, vd_flags, vd_ndx, vd_cnt, _, vd_aux, vd_next = struct.unpack_from(e + 'HHHHIII', mm, offset)
+                ndx = vd_ndx & VERSYM_VERSION
+                cverdefs = max(cverdefs, ndx)
+                if ndx == 1:
+                    base_is_default = bool(vd_flags & VER_FLG_BASE)
+                if vd_cnt:
+                    vda_name = struct.unpack_from(self.Word, mm, offset + vd_aux)[0]
+                    versions[ndx] = (self.read_cstr(strtab + vda_name).decode(errors='replace'), True)
+                if not vd_next:
+                    break
+                offset += vd_next
+        if 1 in versions and (base_is_default or cverdefs < 1):
+            del versions[1]
+        verneed = self.find_section_by_type(SHT_GNU_VERNEED)
+        if verneed is not None:
+            strtab = self.sections[verneed.sh_link].sh_offset
+            offset = verneed.sh_offset
+            for _ in range(verneed.sh_info):
+                _, vn_cnt, _, vn_aux, vn_next = struct.unpack_from(e + 'HHIII', mm, offset)
+                aux = offset + vn_aux
+                for _ in range(vn_cnt):
+                    _, _, vna_other, vna_name, vna_next = struct.unpack_from(e + 'IHHII', mm, aux)
+                    if vna_other > cverdefs:
+                        versions.setdefault(vna_other, (self.read_cstr(strtab + vna_name).decode(errors='replace'), False))
+                    if not vna_next:
+                        break
+                    aux += vna_next
+                if not vn_next:
+                    break
+                offset += vn_next
+        return versions, cverdefs
+
+    def section_symtype(self, sec: SectionHeader) -> str:
+        name = self.section_name(sec)
+        for prefix, symtype in NM_SECTION_TYPES:
+            if name.startswith(prefix) and name[len(prefix):len(prefix) + 1] in NM_SECTION_SEPARATORS:
+                return symtype
+        has_contents = sec.sh_type != SHT_NOBITS
+        if sec.sh_flags & SHF_EXECINSTR:
+            return 't'
+        if has_contents and sec.sh_flags & SHF_ALLOC:
+            return 'd' if sec.sh_flags & SHF_WRITE else 'r'
+        if not has_contents:
+            return 'b'
+        if not sec.sh_flags & SHF_WRITE:
+            return 'n'
+        return '?'
+
+    @generate_list
+    def get_dynamic_symbols(self) -> T.Generator[DynamicSymbol, None, None]:
+        """The defined external symbols of the dynamic symbol table, with
+        the same type and version as `nm --dynamic --extern-only --defined-only`
+        and in the order of the symbol table."""
+        dynsym = self.find_section_by_type(SHT_DYNSYM)
+        if dynsym is None:
+            return
+        mm = self.mapped()
+        e = '<' if self.is_le else '>'
+        strsec = self.sections[dynsym.sh_link]
+        strtab = mm[strsec.sh_offset:strsec.sh_offset + strsec.sh_size]
+        if self.ptrsize == 64:
+            fmt = e + 'IBBHQQ'
+        else:
+            fmt = e + 'IIIBBH'
+        entsize = struct.calcsize(fmt)
+        count = dynsym.sh_size // entsize
+        symtab = mm[dynsym.sh_offset:dynsym.sh_offset + count * entsize]
+        versym = self.find_section_by_type(SHT_GNU_VERSYM)
+        versions: T.Dict[int, T.Tuple[str, bool]] = {}
+        vernums: T.Sequence[int] = []
+        if versym is not None:
+            versions, cverdefs = self.get_symbol_versions()
+            if versions or cverdefs:
+                vernums = struct.unpack_from(f'{e}{count}H', mm, versym.sh_offset)
+        section_symtypes: T.Dict[int, str] = {}
+        for index, fields in enumerate(struct.iter_unpack(fmt, symtab)):
+            if self.ptrsize == 64:
+                st_name, st_info, _, st_shndx, _, st_size = fields
+            else:
+                st_name, _, st_size, st_info, _, st_shndx = fields
+            if st_shndx == SHN_UNDEF:
+                # Also skips the null symbol at index 0
+                continue
+            bind = st_info >> 4
+            stype = st_info & 0xf
+            if st_shndx == SHN_COMMON:
+                symtype = 'C'
+            elif bind not in {STB_GLOBAL, STB_WEAK, STB_GNU_UNIQUE}:
+                continue
+            elif stype == STT_GNU_IFUNC:
+                symtype = 'i'
+            elif bind == STB_WEAK:
+                symtype = 'V' if stype in {STT_OBJECT, STT_COMMON} else 'W'
+            elif bind == STB_GNU_UNIQUE:
+                symtype = 'u'
+            elif st_shndx >= SHN_LORESERVE or st_shndx >= len(self.sections):
+                symtype = 'A'
+            else:
+                try:
+                    symtype = section_symtypes[st_shndx]
+                except KeyError:
+                    symtype = section_symtypes[st_shndx] = self.section_symtype(self.sections[st_shndx]).upper()
+            name = strtab[st_name:strtab.index(b'\0', st_name)].decode(errors='replace')
+            version = ''
+            if vernums:
+                vernum = vernums[index]
+                vername, is_def = versions.get(vernum & VERSYM_VERSION, ('', True))
+                # Versions that are only needed are always printed as
+                # non-default ones, and version definitions are not printed
+                # for the symbol that has the name of the version.
+                hidden = bool(vernum & VERSYM_HIDDEN) or not is_def
+                if vername and not (is_def and vername == name):
+                    version = ('@' if hidden else '@@') + vername
+            yield DynamicSymbol(name, version, symtype, st_size)
 
     def fix_deps(self, prefix: bytes) -> None:
         sec = self.find_section(b'.dynstr')
@@ -292,15 +462,13 @@ class Elf(DataSizes):
                 deps.append(i)
         for i in deps:
             offset = sec.sh_offset + i.val
-            self.bf.seek(offset)
-            name = self.read_str()
+            name = self.read_cstr(offset)
             if name.startswith(prefix):
                 basename = name.rsplit(b'/', maxsplit=1)[-1]
                 padding = b'\0' * (len(name) - len(basename))
                 newname = basename + padding
                 assert len(newname) == len(name)
-                self.bf.seek(offset)
-                self.bf.write(newname)
+                self.mapped()[offset:offset + len(newname)] = newname
 
     def fix_rpath(self, fname: str, rpath_dirs_to_remove: T.Set[bytes], new_rpath: bytes) -> None:
         # The path to search for can be either rpath or runpath.
@@ -314,9 +482,9 @@ class Elf(DataSizes):
             if self.verbose:
                 print(f'File {fname!r} does not have an rpath. It should be a fully static executable.')
             return
-        self.bf.seek(rp_off)
 
-        old_rpath = self.read_str()
+        old_rpath = self.read_cstr(rp_off)
+        from ..mesonlib import OrderedSet
         # Some rpath entries may come from multiple sources.
         # Only add each one once.
         new_rpaths: OrderedSet[bytes] = OrderedSet()
@@ -349,9 +517,7 @@ class Elf(DataSizes):
         if not new_rpath:
             self.remove_rpath_entry(entrynum)
         else:
-            self.bf.seek(rp_off)
-            self.bf.write(new_rpath)
-            self.bf.write(b'\0')
+            self.mapped()[rp_off:rp_off + len(new_rpath) + 1] = new_rpath + b'\0'
 
     def remove_rpath_entry(self, entrynum: int) -> None:
         sec = self.find_section(b'.dynamic')
@@ -368,9 +534,11 @@ class Elf(DataSizes):
             if entry.d_tag == DT_MIPS_RLD_MAP_REL:
                 entry.val += 2 * (self.ptrsize // 8)
                 break
-        self.bf.seek(sec.sh_offset)
+        mm = self.mapped()
+        offset = sec.sh_offset
         for entry in self.dynamic:
-            entry.write(self.bf)
+            entry.write(mm, offset)
+            offset += entry.size
         return None
 
 def fix_elf(fname: str, rpath_dirs_to_remove: T.Set[bytes], new_rpath: T.Optional[bytes], verbose: bool = True) -> None:
@@ -380,6 +548,7 @@ def fix_elf(fname: str, rpath_dirs_to_remove: T.Set[bytes], new_rpath: T.Optiona
             e.fix_rpath(fname, rpath_dirs_to_remove, new_rpath)
 
 def get_darwin_rpaths(fname: str) -> OrderedSet[str]:
+    from ..mesonlib import OrderedSet, Popen_safe
     p, out, _ = Popen_safe(['otool', '-l', fname], stderr=subprocess.DEVNULL)
     if p.returncode != 0:
         raise subprocess.CalledProcessError(p.returncode, p.args, out)
@@ -407,6 +576,7 @@ def fix_darwin(fname: str, rpath_dirs_to_remove: T.Set[bytes], new_rpath: str, f
         # Otool failed, which happens when invoked on a
         # non-executable target. Just return.
         return
+    from ..mesonlib import OrderedSet
     new_rpaths: OrderedSet[str] = OrderedSet()
     if new_rpath:
         new_rpaths.update(new_rpath.split(':'))
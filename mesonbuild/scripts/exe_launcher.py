@@ -0,0 +1,136 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+"""Run a custom target or generator command that cannot be expressed as a
+plain command line.
+
+This is the lightweight counterpart of meson_exe.py: it is run directly
+as a script, not through `meson --internal`, and must only import modules
+from the standard library that the interpreter loads anyway, so that it
+starts as fast as Python can. Check with `python -X importtime` before
+adding an import.
+
+Usage:
+
+    exe_launcher.py [--capture FILE] [--feed FILE] -- COMMAND...
+    exe_launcher.py --json FILE
+
+The JSON file describes the command with the following keys, which are
+all optional but "cmd":
+
+    cmd: the command to run, including the exe wrapper if any
+    env: list of [operation, name, values, separator], operation being
+         one of "set", "append" or "prepend"
+    unset: environment variables to remove
+    extra_paths: directories to prepend to PATH
+    workdir, capture, feed: same as the corresponding custom_target() kwargs
+    verbose: do not redirect the output of the command
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import subprocess
+
+# typing takes longer to import than the rest of this script
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import typing as T
+
+    Description = T.Dict[str, T.Any]
+
+
+def get_env(desc: Description) -> T.Dict[str, str]:
+    env = os.environ.copy()
+    for op, name, values, separator in desc.get('env', []):
+        curr = env.get(name)
+        if op == 'append' and curr is not None:
+            values = [curr] + values
+        elif op == 'prepend' and curr is not None:
+            values = values + [curr]
+        env[name] = separator.join(values)
+    for name in desc.get('unset', []):
+        env.pop(name, None)
+    extra_paths = desc.get('extra_paths')
+    if extra_paths:
+        env['PATH'] = os.pathsep.join(extra_paths + ['']) + env.get('PATH', '')
+    return env
+
+
+def run_command(desc: Description, described: bool) -> int:
+    cmd = desc['cmd']
+    capture = desc.get('capture')
+    feed = desc.get('feed')
+    verbose = desc.get('verbose', False)
+    env = get_env(desc) if described else None
+
+    stdin = open(feed, 'rb') if feed else None
+    pipe = None if verbose else subprocess.PIPE
+    try:
+        p = subprocess.Popen(cmd, env=env, cwd=desc.get('workdir'),
+                             close_fds=False, stdin=stdin, stdout=pipe, stderr=pipe)
+        stdout, stderr = p.communicate()
+    finally:
+        if stdin is not None:
+            stdin.close()
+
+    if p.returncode == 0xc0000135:
+        # STATUS_DLL_NOT_FOUND on Windows indicating a common problem that is otherwise hard to diagnose
+        path = (env or os.environ).get('PATH', '')
+        raise FileNotFoundError(p.returncode, 'Failed to run due to missing DLLs, with path: ' + path, cmd)
+
+    if p.returncode != 0:
+        if described:
+            print(f'while executing {cmd!r}')
+        if verbose:
+            return p.returncode
+        import locale
+        encoding = locale.getpreferredencoding()
+        if not capture:
+            print('--- stdout ---')
+            print(stdout.decode(encoding=encoding, errors='replace'))
+        print('--- stderr ---')
+        print(stderr.decode(encoding=encoding, errors='replace'))
+        return p.returncode
+
+    if capture:
+        # Do not touch the output if it did not change, so that ninja can
+        # skip rebuilding what depends on it.
+        try:
+            with open(capture, 'rb') as cur:
+                if cur.read() == stdout:
+                    return 0
+        except OSError:
+            pass
+        with open(capture, 'wb') as output:
+            output.write(stdout)
+    return 0
+
+
+def parse_args(args: T.List[str]) -> T.Tuple[Description, bool]:
+    desc: Description = {}
+    while args:
+        arg = args.pop(0)
+        if arg == '--':
+            desc['cmd'] = args
+            return desc, False
+        if arg in {'--capture', '--feed', '--json'} and args:
+            desc[arg[2:]] = args.pop(0)
+        else:
+            break
+    if 'json' in desc and len(desc) == 1:
+        # Only imported when needed, it is not loaded at startup
+        import json
+        with open(desc['json'], encoding='utf-8') as f:
+            return json.load(f), True
+    sys.exit(f'usage: {sys.argv[0]} [--capture FILE] [--feed FILE] -- COMMAND... | --json FILE')
+
+
+def run(args: T.List[str]) -> int:
+    desc, described = parse_args(list(args))
+    return run_command(desc, described)
+
+
+if __name__ == '__main__':
+    sys.exit(run(sys.argv[1:]))
@@ -0,0 +1,117 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+"""Find the objects of a target that may include generated headers.
+
+The sources of the target and the headers they include are scanned for
+include directives, without running the preprocessor. Generated headers
+cannot be read before they have been generated, so any generated header
+may include any other: an object is only allowed to compile before the
+code generators of its target run if it cannot include any of them.
+
+The result is a ninja dyndep file, which makes the objects that include a
+generated header depend on the phony target that orders them after all
+the generated headers, and a depfile listing every file that was read.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import typing as T
+
+from .depaccumulate import quote
+
+if T.TYPE_CHECKING:
+    from ..backend.ninjabackend import TargetHeaderScannerInfo
+
+# Computed includes, such as `#include FOO_H`, have no quote or angle
+# bracket and cannot be resolved without preprocessing.
+INCLUDE_RE = re.compile(rb'^[ \t]*#[ \t]*(?:include|include_next|import)\b[ \t]*(?:([<"])([^>"\r\n]*)|(.*))', re.MULTILINE)
+
+
+class HeaderScanner:
+
+    def __init__(self, pickle_file: str, outfile: str, depfile: str) -> None:
+        with open(pickle_file, 'rb') as pf:
+            self.target_data: TargetHeaderScannerInfo = pickle.load(pf)
+        self.outfile = outfile
+        self.depfile = depfile
+        self.generated = {os.path.normpath(h) for h in self.target_data.generated_headers}
+        self.includes: T.Dict[str, T.Optional[T.List[str]]] = {}
+
+    def read_includes(self, fname: str) -> T.Optional[T.List[str]]:
+        """Return the files included by fname, or None if one of them
+        cannot be known without preprocessing."""
+        try:
+            return self.includes[fname]
+        except KeyError:
+            pass
+        result: T.Optional[T.List[str]] = []
+        try:
+            with open(fname, 'rb') as f:
+                content = f.read()
+        except OSError:
+            content = b''
+        for m in INCLUDE_RE.finditer(content):
+            if m.group(3) is not None and m.group(3).strip():
+                result = None
+                break
+            assert result is not None
+            name = m.group(2)
+            if name:
+                result.append(name.decode('utf-8', errors='surrogateescape'))
+        self.includes[fname] = result
+        return result
+
+    def may_include_generated(self, source: str, include_dirs: T.List[str]) -> bool:
+        # Try every directory on the include path instead of only the first
+        # match, so that the result stays conservative regardless of the
+        # search order of the compiler.
+        todo = [os.path.normpath(source)]
+        seen = set(todo)
+        while todo:
+            fname = todo.pop()
+            includes = self.read_includes(fname)
+            if includes is None:
+                return True
+            for name in includes:
+                for d in [os.path.dirname(fname)] + include_dirs:
+                    path = os.path.normpath(os.path.join(d, name))
+                    if path in self.generated:
+                        return True
+                    # Headers outside of the source and build directories,
+                    # which are always referred to with absolute paths, are
+                    # not scanned: they cannot include the generated headers.
+                    if path in seen or os.path.isabs(path) or not os.path.isfile(path):
+                        continue
+                    seen.add(path)
+                    todo.append(path)
+        return False
+
+    def scan(self) -> int:
+        with open(self.outfile, 'w', encoding='utf-8') as f:
+            f.write('ninja_dyndep_version = 1\n\n')
+            for obj, source, include_dirs in self.target_data.objects:
+                if self.may_include_generated(source, include_dirs):
+                    f.write(f'build {quote(obj)}: dyndep | {quote(self.target_data.phony)}\n\n')
+                else:
+                    f.write(f'build {quote(obj)}: dyndep\n\n')
+
+        def depfile_quote(path: str) -> str:
+            return path.replace('\\', '/').replace('$', '$$').replace('#', '\\#').replace(' ', '\\ ')
+
+        with open(self.depfile, 'w', encoding='utf-8') as f:
+            f.write(depfile_quote(self.outfile) + ':')
+            for fname in sorted(self.includes):
+                f.write(' \\\n ' + depfile_quote(fname))
+            f.write('\n')
+        return 0
+
+
+def run(args: T.List[str]) -> int:
+    assert len(args) == 3, 'got wrong number of arguments!'
+    outfile, depfile, pickle_file = args
+    scanner = HeaderScanner(pickle_file, outfile, depfile)
+    return scanner.scan()
@@ -6,12 +6,14 @@
 # type: ignore
 # pylint: disable=deprecated-module
 
-import json, os, subprocess, sys
+import json, os, struct, subprocess, sys, time
 from compileall import compile_file
 
 quiet = int(os.environ.get('MESON_INSTALL_QUIET', 0))
 
-def compileall(files):
+def find_sources(files):
+    '''Yield the installed path of each python source to compile, and the
+    directory it is installed into without DESTDIR, if it is set.'''
     for f in files:
         # f is prefixed by {py_xxxxlib}, both variants are 12 chars
         # the key is the middle 10 chars of the prefix
@@ -31,22 +33,127 @@ def compileall(files):
                     ddir = root.replace(absf, f, 1)
                 for dirf in files:
                     if dirf.endswith('.py'):
-                        fullpath = os.path.join(root, dirf)
-                        compile_file(fullpath, ddir, force=True, quiet=quiet)
+                        yield os.path.join(root, dirf), ddir
         else:
-            compile_file(fullpath, ddir, force=True, quiet=quiet)
+            yield fullpath, ddir
+
+def compileall(files):
+    for fullpath, ddir in find_sources(files):
+        compile_file(fullpath, ddir, force=True, quiet=quiet)
+
+def worker_count():
+    # Same as mesonlib.determine_worker_count(), which cannot be imported
+    # from here
+    try:
+        num_workers = int(os.environ.get('MESON_NUM_PROCESSES', 0))
+    except ValueError:
+        num_workers = 1
+    if num_workers <= 0:
+        try:
+            import multiprocessing
+            num_workers = multiprocessing.cpu_count()
+        except Exception:
+            num_workers = 1
+    return num_workers
+
+def is_current(source, cfile, invalidation_flags):
+    '''Whether cfile is what compiling source would give, as long as its
+    installed path does not change.'''
+    import importlib.util
+    try:
+        with open(cfile, 'rb') as f:
+            header = f.read(16)
+        st = os.stat(source)
+    except OSError:
+        return False
+    if len(header) != 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+        return False
+    flags = struct.unpack('<I', header[4:8])[0]
+    if flags != invalidation_flags:
+        return False
+    if flags & 0b1:
+        with open(source, 'rb') as f:
+            return header[8:] == importlib.util.source_hash(f.read())
+    return header[8:] == struct.pack('<II', int(st.st_mtime) & 0xFFFFFFFF, st.st_size & 0xFFFFFFFF)
+
+def compile_one(job):
+    '''Compile one source for one optimization level, and return None if
+    its .pyc is up to date, or the error message if it failed.'''
+    import importlib.util, py_compile
+    fullpath, dfile, optimize = job
+    cfile = importlib.util.cache_from_source(fullpath, optimization=optimize or '')
+    # py_compile.compile() writes hash-based .pyc files when
+    # SOURCE_DATE_EPOCH is set, which are checked against the source
+    invalidation_flags = 0b11 if os.environ.get('SOURCE_DATE_EPOCH') else 0
+    if is_current(fullpath, cfile, invalidation_flags):
+        return None
+    try:
+        py_compile.compile(fullpath, cfile, dfile, doraise=True, optimize=optimize)
+    except py_compile.PyCompileError as e:
+        return e.msg
+    return ''
+
+def compileall_parallel(files, optlevel):
+    '''Compile all the sources for all optimization levels, in a process
+    pool, skipping the .pyc files that are already up to date.'''
+    start = time.time()
+    jobs = []
+    for fullpath, ddir in find_sources(files):
+        dfile = os.path.join(ddir, os.path.basename(fullpath)) if ddir is not None else None
+        for optimize in range(optlevel + 1):
+            jobs.append((fullpath, dfile, optimize))
+
+    num_workers = min(worker_count(), len(jobs))
+    if sys.platform == 'win32':
+        # ProcessPoolExecutor refuses more workers than WaitForMultipleObjects()
+        # can wait for
+        num_workers = min(num_workers, 61)
+    if num_workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(num_workers)
+        results = executor.map(compile_one, jobs, chunksize=max(1, len(jobs) // (num_workers * 4)))
+    else:
+        executor = None
+        results = map(compile_one, jobs)
+
+    compiled = skipped = 0
+    printed = None
+    try:
+        for (fullpath, _, optimize), result in zip(jobs, results):
+            if result is None:
+                skipped += 1
+                continue
+            compiled += 1
+            if not quiet and printed != fullpath:
+                print('Compiling {!r}...'.format(fullpath))
+                printed = fullpath
+            if result:
+                print('*** Error compiling {!r}...'.format(fullpath))
+                print(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if not quiet:
+        print('Byte-compiled {} files, skipped {} up to date, in {:.2f}s with {} processes'
+              .format(compiled, skipped, time.time() - start, num_workers))
 
-def run(manifest):
+def run(manifest, optlevel=None):
     data_file = os.path.join(os.path.dirname(__file__), manifest)
     with open(data_file, 'rb') as f:
         dat = json.load(f)
-    compileall(dat)
+    if optlevel is None:
+        compileall(dat)
+    else:
+        compileall_parallel(dat, optlevel)
 
 if __name__ == '__main__':
     manifest = sys.argv[1]
-    run(manifest)
-    if len(sys.argv) > 2:
-        optlevel = int(sys.argv[2])
+    optlevel = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    if sys.version_info >= (3, 7):
+        # All the optimization levels are compiled at once
+        run(manifest, optlevel)
+    else:
+        run(manifest)
         # python2 only needs one or the other
         if optlevel == 1 or (sys.version_info >= (3,) and optlevel > 0):
             subprocess.check_call([sys.executable, '-O'] + sys.argv[:2])
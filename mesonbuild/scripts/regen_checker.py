@@ -6,9 +6,7 @@ from __future__ import annotations
 import sys, os
 import pickle, subprocess
 import typing as T
-from ..coredata import CoreData
-from ..backend.backends import RegenInfo
-from ..options import OptionKey
+from ..utils.core import RegenInfo
 
 # This could also be used for XCode.
 
@@ -22,8 +20,10 @@ def need_regen(regeninfo: RegenInfo, regen_timestamp: float) -> bool:
     # We must make sure to recreate it, even if we do not regenerate the solution.
     # Otherwise, Visual Studio will always consider the REGEN project out of date.
     print("Everything is up-to-date, regeneration of build files is not needed.")
-    from ..backend.vs2010backend import Vs2010Backend
-    Vs2010Backend.touch_regen_timestamp(regeninfo.build_dir)
+    # Same as Vs2010Backend.touch_regen_timestamp(), without importing the
+    # whole backend on the common path.
+    with open(os.path.join(regeninfo.build_dir, 'meson-private', 'regen.stamp'), 'w', encoding='utf-8'):
+        pass
     return False
 
 def regen(regeninfo: RegenInfo, meson_command: T.List[str], backend: str) -> None:
@@ -41,13 +41,16 @@ def run(args: T.List[str]) -> int:
     with open(dumpfile, 'rb') as f:
         regeninfo = pickle.load(f)
         assert isinstance(regeninfo, RegenInfo)
-    with open(coredata_file, 'rb') as f:
-        coredata = pickle.load(f)
-        assert isinstance(coredata, CoreData)
-    backend = coredata.optstore.get_value_for(OptionKey('backend'))
-    assert isinstance(backend, str)
     regen_timestamp = os.stat(dumpfile).st_mtime
     if need_regen(regeninfo, regen_timestamp):
+        # Loading the coredata imports most of meson, only do it when needed
+        from ..coredata import CoreData
+        from ..options import OptionKey
+        with open(coredata_file, 'rb') as f:
+            coredata = pickle.load(f)
+            assert isinstance(coredata, CoreData)
+        backend = coredata.optstore.get_value_for(OptionKey('backend'))
+        assert isinstance(backend, str)
         regen(regeninfo, coredata.meson_command, backend)
     return 0
 
@@ -11,10 +11,7 @@
 from __future__ import annotations
 
 import typing as T
-import os, sys
-from .. import mesonlib
-from .. import mlog
-from ..mesonlib import Popen_safe
+import os, struct, sys
 import argparse
 
 parser = argparse.ArgumentParser()
@@ -48,6 +45,7 @@ def print_tool_warning(tools: T.List[str], msg: str, stderr: T.Optional[str] = N
     m = f'{tools!r} {msg}. {RELINKING_WARNING}'
     if stderr:
         m += '\n' + stderr
+    from .. import mlog
     mlog.warning(m)
     # Write it out so we don't warn again
     with open(TOOL_WARNING_FILE, 'w', encoding='utf-8'):
@@ -61,6 +59,7 @@ def get_tool(name: str) -> T.List[str]:
     return [name]
 
 def call_tool(name: str, args: T.List[str], **kwargs: T.Any) -> str:
+    from ..mesonlib import Popen_safe
     tool = get_tool(name)
     try:
         p, output, e = Popen_safe(tool + args, **kwargs)
@@ -76,6 +75,7 @@ def call_tool(name: str, args: T.List[str], **kwargs: T.Any) -> str:
     return output
 
 def call_tool_nowarn(tool: T.List[str], **kwargs: T.Any) -> T.Tuple[str, str]:
+    from ..mesonlib import Popen_safe
     try:
         p, output, e = Popen_safe(tool, **kwargs)
     except FileNotFoundError:
@@ -86,7 +86,42 @@ def call_tool_nowarn(tool: T.List[str], **kwargs: T.Any) -> T.Tuple[str, str]:
         return None, e
     return output, None
 
+def elf_syms(libfilename: str, outfilename: str) -> bool:
+    """Same as gnu_syms(), reading the ELF file directly instead of running
+    readelf and nm. Returns False if the file could not be read."""
+    # Use the tools if the user asked for specific ones
+    if 'READELF' in os.environ or 'NM' in os.environ:
+        return False
+    from .depfixer import Elf
+    try:
+        with open(libfilename, 'rb') as f:
+            if f.read(4) != b'\x7fELF':
+                return False
+        with Elf(libfilename, verbose=False, readonly=True) as elf:
+            soname = elf.get_soname_line()
+            symbols = elf.get_dynamic_symbols()
+    except (OSError, ValueError, RuntimeError, struct.error, IndexError, SystemExit):
+        return False
+    result = [soname] if soname else []
+    # nm sorts by name, without the version, in the collation order of the
+    # locale
+    import locale
+    try:
+        locale.setlocale(locale.LC_COLLATE, '')
+    except locale.Error:
+        pass
+    for sym in sorted(symbols, key=lambda s: locale.strxfrm(s.name)):
+        entry = sym.name + sym.version + ' ' + sym.symtype
+        # See gnu_syms() for why the size of data objects is stored
+        if sym.symtype in {'B', 'G', 'D'} and sym.size:
+            entry += f' {sym.size:x}'
+        result.append(entry)
+    write_if_changed('\n'.join(result) + '\n', outfilename)
+    return True
+
 def gnu_syms(libfilename: str, outfilename: str) -> None:
+    if elf_syms(libfilename, outfilename):
+        return
     # Get the name of the library
     output = call_tool('readelf', ['-d', libfilename])
     if not output:
@@ -273,9 +308,14 @@ def gen_symbols(libfilename: str, impfilename: str, outfilename: str, cross_host
             windows_syms(impfilename, outfilename)
         else:
             dummy_syms(outfilename)
-    elif mesonlib.is_linux() or mesonlib.is_hurd():
+        return
+    # Same as mesonlib.is_linux() or mesonlib.is_hurd(), without importing
+    # mesonlib, which takes longer than reading the symbols of the library
+    if sys.platform.startswith(('linux', 'gnu')):
         gnu_syms(libfilename, outfilename)
-    elif mesonlib.is_osx():
+        return
+    from .. import mesonlib, mlog
+    if mesonlib.is_osx():
         osx_syms(libfilename, outfilename)
     elif mesonlib.is_openbsd():
         openbsd_syms(libfilename, outfilename)
@@ -11,6 +11,7 @@ as possible for performance reasons.
 
 from __future__ import annotations
 from dataclasses import dataclass
+from functools import wraps
 import os
 import abc
 import typing as T
@@ -25,6 +26,8 @@ if T.TYPE_CHECKING:
 
     EnvInitValueType = T.Dict[str, T.Union[str, T.List[str]]]
 
+_T = T.TypeVar('_T')
+
 
 class MesonException(Exception):
     '''Exceptions thrown by Meson'''
@@ -150,6 +153,13 @@ class EnvironmentVariables(HoldableObject):
         return env
 
 
+@dataclass(eq=False)
+class RegenInfo:
+    source_dir: str
+    build_dir: str
+    depfiles: T.List[str]
+
+
 @dataclass(eq=False)
 class ExecutableSerialisation:
 
@@ -169,3 +179,11 @@ class ExecutableSerialisation:
         self.skip_if_destdir = False
         self.subproject = ''
         self.dry_run = False
+
+
+def generate_list(func: T.Callable[..., T.Generator[_T, None, None]]) -> T.Callable[..., T.List[_T]]:
+    @wraps(func)
+    def wrapper(*args: T.Any, **kwargs: T.Any) -> T.List[_T]:
+        return list(func(*args, **kwargs))
+
+    return wrapper
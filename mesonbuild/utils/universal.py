@@ -27,7 +27,7 @@ import json
 import dataclasses
 
 from mesonbuild import mlog
-from .core import MesonException, HoldableObject
+from .core import MesonException, HoldableObject, generate_list
 
 if T.TYPE_CHECKING:
     from typing_extensions import Literal, Protocol
@@ -83,6 +83,7 @@ __all__ = [
     'Version',
     'check_direntry_issues',
     'classify_unity_sources',
+    'clone_or_copy_file',
     'current_vs_supports_modules',
     'darwin_get_object_archs',
     'default_libdir',
@@ -381,14 +382,59 @@ dot_C_dot_H_warning = """You are using .C or .H files in your project. This is d
          Visual Studio compiler, as it treats .C files as C code, unless you add
          the /TP compiler flag, but this is unreliable.
          See https://github.com/mesonbuild/meson/pull/8747 for the discussions."""
+_FileTuple = T.Tuple[bool, str, str]
+_file_cache: T.Dict[_FileTuple, File] = {}
+
 class File(HoldableObject):
-    def __init__(self, is_built: bool, subdir: str, fname: str):
+
+    """A source or built file, relative to the source or build root.
+
+    Instances are interned: creating a File that is equal to an existing one
+    returns the existing object, so that the path forms computed by
+    rel_to_builddir(), absolute_path() and relative_name() are only computed
+    once for all the targets that use the file.
+    """
+
+    is_built: bool
+    subdir: str
+    fname: str
+    hash: int
+
+    def __new__(cls, is_built: bool = False, subdir: str = '', fname: T.Optional[str] = None) -> File:
+        if fname is None:
+            return super().__new__(cls)  # for unpickling, do not cache now
+
+        tuple_: _FileTuple = (is_built, subdir, fname)
+        try:
+            return _file_cache[tuple_]
+        except KeyError:
+            instance = super().__new__(cls)
+            instance._init(is_built, subdir, fname)
+            _file_cache[tuple_] = instance
+            return instance
+
+    def _init(self, is_built: bool, subdir: str, fname: str) -> None:
         if fname.endswith(".C") or fname.endswith(".H"):
             mlog.warning(dot_C_dot_H_warning, once=True)
         self.is_built = is_built
         self.subdir = subdir
         self.fname = fname
         self.hash = hash((is_built, subdir, fname))
+        self._relative_name: T.Optional[str] = None
+        self._rel_to_builddir: T.Dict[str, str] = {}
+        self._absolute_path: T.Dict[T.Tuple[str, str], str] = {}
+
+    def __getstate__(self) -> T.Dict[str, T.Any]:
+        return {
+            'is_built': self.is_built,
+            'subdir': self.subdir,
+            'fname': self.fname,
+        }
+
+    def __setstate__(self, state: T.Dict[str, T.Any]) -> None:
+        # Here, the object is created using __new__()
+        self._init(**state)
+        _file_cache.setdefault((self.is_built, self.subdir, self.fname), self)
 
     def __str__(self) -> str:
         return self.relative_name()
@@ -422,19 +468,27 @@ class File(HoldableObject):
     def from_absolute_file(fname: str) -> 'File':
         return File(False, '', fname)
 
-    @lru_cache(maxsize=None)
     def rel_to_builddir(self, build_to_src: str) -> str:
-        if self.is_built:
-            return self.relative_name()
-        else:
-            return os.path.join(build_to_src, self.subdir, self.fname)
+        try:
+            return self._rel_to_builddir[build_to_src]
+        except KeyError:
+            if self.is_built:
+                ret = self.relative_name()
+            else:
+                ret = os.path.join(build_to_src, self.subdir, self.fname)
+            self._rel_to_builddir[build_to_src] = ret
+            return ret
 
-    @lru_cache(maxsize=None)
     def absolute_path(self, srcdir: str, builddir: str) -> str:
-        absdir = srcdir
-        if self.is_built:
-            absdir = builddir
-        return os.path.normpath(os.path.join(absdir, self.relative_name()))
+        try:
+            return self._absolute_path[(srcdir, builddir)]
+        except KeyError:
+            absdir = srcdir
+            if self.is_built:
+                absdir = builddir
+            ret = os.path.normpath(os.path.join(absdir, self.relative_name()))
+            self._absolute_path[(srcdir, builddir)] = ret
+            return ret
 
     @property
     def suffix(self) -> str:
@@ -450,6 +504,8 @@ class File(HoldableObject):
         return self.fname.rsplit(s, maxsplit=maxsplit)
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, File):
             return NotImplemented
         if self.hash != other.hash:
@@ -459,9 +515,10 @@ class File(HoldableObject):
     def __hash__(self) -> int:
         return self.hash
 
-    @lru_cache(maxsize=None)
     def relative_name(self) -> str:
-        return os.path.join(self.subdir, self.fname)
+        if self._relative_name is None:
+            self._relative_name = os.path.join(self.subdir, self.fname)
+        return self._relative_name
 
 
 def get_compiler_for_source(compilers: T.Iterable['Compiler'], src: 'FileOrString') -> 'Compiler':
@@ -2033,6 +2090,41 @@ def windows_proof_rm(fpath: T.Union[str, Path]) -> None:
     os.unlink(fpath)
 
 
+# _IOW(0x94, 9, int), fcntl.FICLONE is only available since Python 3.12
+FICLONE = 0x40049409
+
+
+def clone_or_copy_file(src: str, dst: str) -> bool:
+    """Same as shutil.copyfile(), but on file systems that support it the
+    data of the two files is shared instead of copied, which makes copying
+    large files almost free.
+
+    Returns True if the data of dst is a clone of src.
+    """
+    if not hasattr(os, 'copy_file_range'):
+        shutil.copyfile(src, dst)
+        return False
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if sys.platform.startswith('linux'):
+            import fcntl
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return True
+            except OSError:
+                pass
+        try:
+            while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                pass
+        except OSError:
+            # For example EXDEV with old kernels or EINVAL with special
+            # files. Start over with a plain copy.
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst)
+    return False
+
+
 class TemporaryDirectoryWinProof(TemporaryDirectory):
     """
     Like TemporaryDirectory, but cleans things up using
@@ -2402,14 +2494,6 @@ def run_once(func: T.Callable[..., _T]) -> T.Callable[..., _T]:
     return wrapper
 
 
-def generate_list(func: T.Callable[..., T.Generator[_T, None, None]]) -> T.Callable[..., T.List[_T]]:
-    @wraps(func)
-    def wrapper(*args: T.Any, **kwargs: T.Any) -> T.List[_T]:
-        return list(func(*args, **kwargs))
-
-    return wrapper
-
-
 def pickle_load(filename: str, object_name: str, object_type: T.Type[_PL], suggest_reconfigure: bool = True) -> _PL:
     load_fail_msg = f'{object_name} file {filename!r} is corrupted.'
     extra_msg = ' Consider reconfiguring the directory with "meson setup --reconfigure".' if suggest_reconfigure else ''
@@ -0,0 +1,226 @@
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+"""A user-level, content-addressed cache of wrap archives.
+
+Archives are stored under the sha256 hash declared in the `.wrap` file
+(`source_hash` or `patch_hash`), so the same tarball is only downloaded
+once for all projects of a user. The cache is enabled by setting the
+`MESON_WRAP_CACHE_DIR` environment variable.
+
+Git wraps use a bare mirror of each remote URL in the same directory,
+which clones then borrow objects from through git alternates.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import tempfile
+import threading
+import typing as T
+
+from .. import mlog
+from ..mesonlib import DirectoryLock, DirectoryLockAction, MesonException, clone_or_copy_file, quiet_git
+
+if T.TYPE_CHECKING:
+    from typing_extensions import Literal
+
+DEFAULT_MAX_SIZE = 4 * 1024 * 1024 * 1024
+
+
+# Mirrors already fetched by this process, so that wraps sharing a remote
+# only fetch it once.
+_updated_mirrors: T.Set[str] = set()
+_mirrors_lock = threading.Lock()
+
+
+def parse_size(value: str) -> int:
+    '''Parse a size in bytes with an optional K, M or G suffix.'''
+    multipliers = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    value = value.strip().upper()
+    if value and value[-1] in multipliers:
+        return int(value[:-1]) * multipliers[value[-1]]
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    if size < 1024:
+        return f'{size} bytes'
+    value = float(size)
+    for unit in ('KiB', 'MiB'):
+        value /= 1024
+        if value < 1024:
+            return f'{value:.1f} {unit}'
+    return f'{value / 1024:.1f} GiB'
+
+
+def git_objects_size(repo: str) -> int:
+    '''Size in bytes of the objects stored in repo, not counting alternates.'''
+    ret, out = quiet_git(['count-objects', '-v'], repo)
+    if not ret:
+        return 0
+    size = 0
+    for line in out.splitlines():
+        key, _, value = line.partition(':')
+        if key in {'size', 'size-pack'}:
+            size += int(value) * 1024
+    return size
+
+
+def add_git_alternate(repo: str, mirror: str) -> None:
+    '''Let the git checkout in repo borrow objects from mirror.'''
+    ret, gitdir = quiet_git(['rev-parse', '--absolute-git-dir'], repo)
+    if not ret:
+        return
+    alternates = os.path.join(gitdir.strip(), 'objects', 'info', 'alternates')
+    objects = os.path.join(mirror, 'objects')
+    try:
+        with open(alternates, encoding='utf-8') as f:
+            if objects in f.read().splitlines():
+                return
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(alternates), exist_ok=True)
+    with open(alternates, 'a', encoding='utf-8') as f:
+        f.write(objects + '\n')
+
+
+def materialize(src: str, dst: str) -> Literal['hardlink', 'reflink', 'copy']:
+    '''Make the content of src available at dst as cheaply as possible.
+
+    dst must not exist. A hard link is tried first, then a reflink, and
+    finally a plain copy.
+    '''
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    if clone_or_copy_file(src, dst):
+        return 'reflink'
+    return 'copy'
+
+
+class WrapCache:
+
+    def __init__(self, path: str, max_size: int = DEFAULT_MAX_SIZE) -> None:
+        self.path = path
+        self.max_size = max_size
+
+    @classmethod
+    def from_env(cls) -> T.Optional[WrapCache]:
+        path = os.environ.get('MESON_WRAP_CACHE_DIR')
+        if not path:
+            return None
+        max_size = DEFAULT_MAX_SIZE
+        size = os.environ.get('MESON_WRAP_CACHE_MAX_SIZE')
+        if size:
+            try:
+                max_size = parse_size(size)
+            except ValueError:
+                mlog.warning(f'Invalid MESON_WRAP_CACHE_MAX_SIZE value {size!r}, using the default.', fatal=False)
+        return cls(os.path.expanduser(path), max_size)
+
+    def entry_path(self, hashvalue: str) -> str:
+        hashvalue = hashvalue.lower()
+        return os.path.join(self.path, 'sha256', hashvalue[:2], hashvalue)
+
+    def fetch(self, hashvalue: str, dst: str) -> bool:
+        '''Materialize the archive with the given hash at dst.
+
+        Returns False if it is not in the cache.
+        '''
+        entry = self.entry_path(hashvalue)
+        try:
+            how = materialize(entry, dst)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            mlog.debug(f'Could not use {entry} from the wrap cache: {e!s}')
+            return False
+        # Record the use for the least-recently-used eviction
+        with contextlib.suppress(OSError):
+            os.utime(entry)
+        mlog.debug(f'Materialized {entry} into {dst} ({how})')
+        return True
+
+    def discard(self, hashvalue: str) -> None:
+        with contextlib.suppress(OSError):
+            os.unlink(self.entry_path(hashvalue))
+
+    def store(self, hashvalue: str, src: str) -> None:
+        '''Add src, whose hash has already been verified, to the cache.'''
+        entry = self.entry_path(hashvalue)
+        if os.path.exists(entry):
+            return
+        try:
+            os.makedirs(os.path.dirname(entry), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix='.tmp-', dir=os.path.dirname(entry))
+            os.close(fd)
+            os.unlink(tmp)
+            materialize(src, tmp)
+            os.replace(tmp, entry)
+        except OSError as e:
+            mlog.debug(f'Could not add {src} to the wrap cache: {e!s}')
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        '''Remove the least recently used entries above the size limit.'''
+        entries: T.List[T.Tuple[float, int, str]] = []
+        total = 0
+        for root, _, files in os.walk(os.path.join(self.path, 'sha256')):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                total -= size
+
+    def git_mirror_path(self, url: str) -> str:
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, 'git', name[:2], name + '.git')
+
+    def update_git_mirror(self, url: str) -> T.Tuple[T.Optional[str], int]:
+        '''Create or refresh the bare mirror of the git repository at url.
+
+        Returns the mirror path, or None if it could not be created, and
+        the number of bytes fetched into it. A stale mirror is still
+        returned when fetching fails, since clones only use it to avoid
+        downloading objects again.
+        '''
+        mirror = self.git_mirror_path(url)
+        with _mirrors_lock:
+            if mirror in _updated_mirrors:
+                return mirror, 0
+            _updated_mirrors.add(mirror)
+        try:
+            os.makedirs(mirror, exist_ok=True)
+            with DirectoryLock(mirror, '.meson-lock', DirectoryLockAction.WAIT,
+                               f'Failed to lock git mirror {mirror}'):
+                if not os.path.exists(os.path.join(mirror, 'HEAD')):
+                    quiet_git(['init', '--bare', '--quiet', '.'], mirror, check=True)
+                    quiet_git(['remote', 'add', 'origin', url], mirror, check=True)
+                before = git_objects_size(mirror)
+                quiet_git(['fetch', '--quiet', '--prune', 'origin',
+                           '+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*'],
+                          mirror, check=True)
+                fetched = git_objects_size(mirror) - before
+        except (OSError, MesonException) as e:
+            mlog.debug(f'Could not update git mirror of {url} in {mirror}: {e!s}')
+            if os.path.exists(os.path.join(mirror, 'objects')):
+                return mirror, 0
+            return None, 0
+        mlog.debug(f'Fetched {format_size(fetched)} into git mirror {mirror}')
+        return mirror, max(fetched, 0)
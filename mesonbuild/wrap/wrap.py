@@ -5,11 +5,13 @@ from __future__ import annotations
 
 from .. import mlog
 import contextlib
+import copy
 from dataclasses import dataclass
 import urllib.request
 import urllib.error
 import urllib.parse
 import os
+import posixpath
 import hashlib
 import shutil
 import tempfile
@@ -17,22 +19,25 @@ import stat
 import subprocess
 import sys
 import configparser
-import time
 import typing as T
 import textwrap
+import threading
 import json
 import gzip
+import tarfile
 
 from base64 import b64encode
+from concurrent.futures import Future, ThreadPoolExecutor
 from netrc import netrc
 from pathlib import Path, PurePath
 from functools import lru_cache
 
 from . import WrapMode
+from .cache import WrapCache, add_git_alternate
 from .. import coredata
 from ..mesonlib import (
     DirectoryLock, DirectoryLockAction, quiet_git, GIT, ProgressBar, MesonException,
-    windows_proof_rmtree, Popen_safe
+    windows_proof_rmtree, Popen_safe, determine_worker_count
 )
 from ..interpreterbase import FeatureNew
 from ..interpreterbase import SubProject
@@ -73,6 +78,45 @@ else:
     PATCH = shutil.which('patch')
 
 
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+# Extraction filters were backported to 3.8.17, 3.9.17, 3.10.12 and 3.11.4
+HAVE_TAR_FILTERS = hasattr(tarfile, 'data_filter')
+
+class HashingReader:
+    '''A file-like object updating a hash with everything read from it.'''
+
+    def __init__(self, f: T.BinaryIO, h: hashlib._Hash) -> None:
+        self.f = f
+        self.h = h
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.f.read(size)
+        self.h.update(data)
+        return data
+
+    def read_to_end(self) -> None:
+        while self.read(1024 * 1024):
+            pass
+
+def extract_tar(tf: tarfile.TarFile, extract_dir: str) -> None:
+    '''Extract all members of tf, refusing the ones that would be written
+    outside of extract_dir.'''
+    if HAVE_TAR_FILTERS:
+        tf.extractall(extract_dir, filter='data')
+        return
+    # Python versions without extraction filters
+    for member in tf:
+        names = [member.name]
+        if member.issym():
+            names.append(posixpath.join(posixpath.dirname(member.name), member.linkname))
+        elif member.islnk():
+            names.append(member.linkname)
+        for name in names:
+            name = posixpath.normpath(name.replace('\\', '/'))
+            if os.path.isabs(name) or name.startswith('/') or name.split('/')[0] == '..':
+                raise WrapException(f'Archive member {member.name!r} would be extracted outside of {extract_dir}')
+        tf.extract(member, extract_dir)
+
 def whitelist_wrapdb(urlstr: str) -> urllib.parse.ParseResult:
     """ raises WrapException if not whitelisted subdomain """
     url = urllib.parse.urlparse(urlstr)
@@ -84,18 +128,25 @@ def whitelist_wrapdb(urlstr: str) -> urllib.parse.ParseResult:
         raise WrapException(f'WrapDB did not have expected SSL https url, instead got {urlstr}')
     return url
 
-def open_wrapdburl(urlstring: str, allow_insecure: bool = False, have_opt: bool = False, allow_compression: bool = False) -> http.client.HTTPResponse:
+def open_wrapdburl(urlstring: str, allow_insecure: bool = False, have_opt: bool = False, allow_compression: bool = False,
+                   headers: T.Optional[T.Dict[str, str]] = None) -> http.client.HTTPResponse:
     if have_opt:
         insecure_msg = '\n\n    To allow connecting anyway, pass `--allow-insecure`.'
     else:
         insecure_msg = ''
 
     def do_urlopen(url: urllib.parse.ParseResult) -> http.client.HTTPResponse:
-        headers = {}
+        req_headers = dict(headers or {})
         if allow_compression:
-            headers['Accept-Encoding'] = 'gzip'
-        req = urllib.request.Request(urllib.parse.urlunparse(url), headers=headers)
-        return T.cast('http.client.HTTPResponse', urllib.request.urlopen(req, timeout=REQ_TIMEOUT))
+            req_headers['Accept-Encoding'] = 'gzip'
+        req = urllib.request.Request(urllib.parse.urlunparse(url), headers=req_headers)
+        try:
+            return T.cast('http.client.HTTPResponse', urllib.request.urlopen(req, timeout=REQ_TIMEOUT))
+        except urllib.error.HTTPError as e:
+            # Answer to a conditional request, the caller already has the data
+            if e.code == 304:
+                return T.cast('http.client.HTTPResponse', e)
+            raise
 
     url = whitelist_wrapdb(urlstring)
     if has_ssl:
@@ -133,8 +184,40 @@ def read_and_decompress(resp: http.client.HTTPResponse) -> bytes:
         return data
 
 def get_releases_data(allow_insecure: bool) -> bytes:
-    url = open_wrapdburl('https://wrapdb.mesonbuild.com/v2/releases.json', allow_insecure, True, True)
-    return read_and_decompress(url)
+    # Keep a copy of the releases in the shared wrap cache, if there is one,
+    # and only download it again when it changed on the server.
+    shared_cache = WrapCache.from_env()
+    headers: T.Dict[str, str] = {}
+    if shared_cache:
+        cached_file = os.path.join(shared_cache.path, 'releases.json')
+        meta_file = cached_file + '.meta'
+        try:
+            with open(meta_file, encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(cached_file, 'rb') as f:
+                cached_data = f.read()
+        except (OSError, ValueError):
+            pass
+        else:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last-modified'):
+                headers['If-Modified-Since'] = meta['last-modified']
+    url = open_wrapdburl('https://wrapdb.mesonbuild.com/v2/releases.json', allow_insecure, True, True, headers=headers)
+    if url.getcode() == 304:
+        return cached_data
+    data = read_and_decompress(url)
+    if shared_cache:
+        meta = {'etag': url.headers['ETag'], 'last-modified': url.headers['Last-Modified']}
+        try:
+            os.makedirs(shared_cache.path, exist_ok=True)
+            for fname, content in [(cached_file, data), (meta_file, json.dumps(meta).encode())]:
+                with open(fname + '.tmp', 'wb') as f:
+                    f.write(content)
+                os.replace(fname + '.tmp', fname)
+        except OSError as e:
+            mlog.debug(f'Could not cache the WrapDB releases: {e!s}')
+    return data
 
 @lru_cache(maxsize=None)
 def get_releases(allow_insecure: bool) -> T.Dict[str, T.Any]:
@@ -350,6 +433,7 @@ class Resolver:
     def __post_init__(self) -> None:
         self.subdir_root = os.path.join(self.source_dir, self.subdir)
         self.cachedir = os.environ.get('MESON_PACKAGE_CACHE_DIR') or os.path.join(self.subdir_root, 'packagecache')
+        self.shared_cache = WrapCache.from_env()
         self.wraps: T.Dict[str, PackageDefinition] = {}
         self.netrc: T.Optional[netrc] = None
         self.provided_deps: T.Dict[str, PackageDefinition] = {}
@@ -358,6 +442,11 @@ class Resolver:
         self.wrapdb_provided_deps: T.Dict[str, str] = {}
         self.wrapdb_provided_programs: T.Dict[str, str] = {}
         self.loaded_dirs: T.Set[str] = set()
+        self.prefetched: T.Dict[str, Future[str]] = {}
+        self.prefetch_executor: T.Optional[ThreadPoolExecutor] = None
+        self.prefetch_dir: T.Optional[tempfile.TemporaryDirectory[str]] = None
+        # Shared with the copies downloading in the prefetch threads
+        self.prefetch_cancelled: T.Optional[threading.Event] = None
         self.load_wraps()
         self.load_netrc()
         self.load_wrapdb()
@@ -457,6 +546,8 @@ class Resolver:
             other_resolver = Resolver(self.source_dir, subdir, subproject, self.wrap_mode, self.wrap_frontend, self.allow_insecure, self.silent)
             self.merge_wraps(other_resolver.wraps)
             self.loaded_dirs.add(subdir)
+            if self.prefetch_executor is not None:
+                self.prefetch()
 
     def find_dep_provider(self, packagename: str) -> T.Tuple[T.Optional[str], T.Optional[str]]:
         # Python's ini parser converts all key values to lowercase.
@@ -542,6 +633,8 @@ class Resolver:
         if os.path.exists(self.dirname):
             if not os.path.isdir(self.dirname):
                 raise WrapException('Path already exists but is not a directory')
+        elif self.move_prefetched():
+            mlog.log('Using prefetched', mlog.bold(packagename))
         else:
             # Check first if we have the extracted directory in our cache. This can
             # happen for example when MESON_PACKAGE_CACHE_DIR=/usr/share/cargo/registry
@@ -590,6 +683,94 @@ class Resolver:
         except FileNotFoundError:
             raise WrapNotFoundException('Attempted to resolve subproject without subprojects directory present.')
 
+    def prefetch(self) -> None:
+        '''Download, verify and extract wrap-file subprojects in the background.
+
+        Every wrap-file whose subproject directory does not exist yet is
+        fetched in a thread pool into a staging directory in the package
+        cache. Resolving a subproject only waits for its own wrap, and then
+        moves the staged directory into place.
+        '''
+        if self.wrap_mode is WrapMode.nodownload:
+            return
+        if self.prefetch_executor is None:
+            os.makedirs(self.cachedir, exist_ok=True)
+            self.prefetch_dir = tempfile.TemporaryDirectory(prefix='.prefetch-', dir=self.cachedir)
+            self.prefetch_executor = ThreadPoolExecutor(determine_worker_count())
+            self.prefetch_cancelled = threading.Event()
+        for wrap in self.wraps.values():
+            if wrap.type != 'file' or wrap.name in self.prefetched:
+                continue
+            if any(os.path.exists(os.path.join(d, wrap.directory))
+                   for d in (wrap.subprojects_dir, self.subdir_root, self.cachedir)):
+                continue
+            self.prefetched[wrap.name] = self.prefetch_executor.submit(self._prefetch_file, wrap)
+
+    def _prefetch_file(self, wrap: PackageDefinition) -> str:
+        assert self.prefetch_dir is not None, 'for mypy'
+        # Resolver methods are stateful, use a copy to run them in a thread,
+        # extracting into a staging directory instead of the subprojects dir.
+        r = copy.copy(self)
+        r.wrap = wrap
+        r.silent = True
+        r.subdir_root = os.path.join(self.prefetch_dir.name, wrap.name)
+        r.directory = wrap.directory
+        r.dirname = os.path.join(r.subdir_root, wrap.directory)
+        os.mkdir(r.subdir_root)
+        try:
+            r._get_file(wrap.name)
+            r.apply_patch(wrap.name)
+            r.apply_diff_files()
+        except Exception:
+            windows_proof_rmtree(r.subdir_root)
+            raise
+        return r.dirname
+
+    def move_prefetched(self) -> bool:
+        future = self.prefetched.pop(self.wrap.name, None)
+        if future is None:
+            return False
+        try:
+            staged = future.result()
+        except WrapException:
+            raise
+        except Exception as e:
+            mlog.debug(f'Prefetching {self.wrap.name} failed: {e!s}')
+            return False
+        if not os.path.isdir(staged):
+            return False
+        shutil.move(staged, self.dirname)
+        return True
+
+    def cancel_prefetch(self, wait: bool = True) -> None:
+        '''Stop prefetching and remove wraps that were not used.
+
+        If wait is False, for example because configuring failed, downloads
+        that already started are abandoned instead of waited for, and the
+        staging directory is removed when Python exits.
+        '''
+        if self.prefetch_executor is None:
+            return
+        for future in self.prefetched.values():
+            future.cancel()
+        self.prefetched.clear()
+        executor = self.prefetch_executor
+        cancelled = self.prefetch_cancelled
+        self.prefetch_executor = None
+        self.prefetch_cancelled = None
+        if not wait:
+            assert cancelled is not None, 'for mypy'
+            cancelled.set()
+            if sys.version_info >= (3, 9):
+                executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                executor.shutdown(wait=False)
+            return
+        executor.shutdown(wait=True)
+        if self.prefetch_dir is not None:
+            self.prefetch_dir.cleanup()
+            self.prefetch_dir = None
+
     def check_can_download(self) -> None:
         # Don't download subproject data based on wrap file if requested.
         # Git submodules are ok (see above)!
@@ -638,7 +819,7 @@ class Resolver:
         raise WrapException(f'Unknown git submodule output: {out!r}')
 
     def _get_file(self, packagename: str) -> None:
-        path = self._get_file_internal('source', packagename)
+        path = self._get_file_internal('source', packagename, check=False)
         extract_dir = self.subdir_root
         # Some upstreams ship packages that do not have a leading directory.
         # Create one for them.
@@ -646,9 +827,50 @@ class Resolver:
             os.mkdir(self.dirname)
             extract_dir = self.dirname
         try:
-            shutil.unpack_archive(path, extract_dir)
-        except OSError as e:
+            self.unpack_archive('source', path, extract_dir, hash_required='source_url' in self.wrap.values)
+        except (OSError, tarfile.TarError) as e:
             raise WrapException(f'failed to unpack archive with error: {str(e)}') from e
+        # The archive has only been verified now if it was already in the
+        # project's package cache
+        if self.shared_cache and 'source_url' in self.wrap.values:
+            self.shared_cache.store(self.wrap.get('source_hash').lower(), path)
+
+    def unpack_archive(self, what: str, path: str, extract_dir: str, hash_required: bool = True) -> None:
+        '''Verify the hash of an archive and extract it.
+
+        Tarballs are hashed while they are being extracted into a staging
+        directory, which is only moved into place if the hash matches, so
+        that they are read only once.
+        '''
+        if what + '_hash' not in self.wrap.values and not hash_required:
+            shutil.unpack_archive(path, extract_dir)
+            return
+        expected = self.wrap.get(what + '_hash').lower()
+        if not path.endswith(TAR_SUFFIXES):
+            self.check_hash(what, path)
+            shutil.unpack_archive(path, extract_dir)
+            return
+        staging = tempfile.mkdtemp(prefix='.meson-unpack-', dir=extract_dir)
+        try:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                reader = HashingReader(f, h)
+                with tarfile.open(fileobj=T.cast('T.IO[bytes]', reader), mode='r|*') as tf:
+                    extract_tar(tf, staging)
+                # Tar archives can be followed by padding
+                reader.read_to_end()
+            dhash = h.hexdigest()
+            if dhash != expected:
+                raise WrapException(f'Incorrect hash for {what}:\n {expected} expected\n {dhash} actual.')
+            for entry in os.listdir(staging):
+                src = os.path.join(staging, entry)
+                dst = os.path.join(extract_dir, entry)
+                if os.path.isdir(src) and os.path.isdir(dst):
+                    self.copy_tree(src, dst)
+                else:
+                    os.replace(src, dst)
+        finally:
+            windows_proof_rmtree(staging)
 
     def _get_git(self, packagename: str) -> None:
         if not GIT:
@@ -660,24 +882,36 @@ class Resolver:
         if self.wrap.values.get('depth', '') != '':
             is_shallow = True
             depth_option = ['--depth', self.wrap.values.get('depth')]
+        # Borrow objects from the shared mirror of this remote, if any. The
+        # mirror has the full history of all branches, which a shallow clone
+        # is meant to avoid downloading.
+        mirror: T.Optional[str] = None
+        reference_option: T.List[str] = []
+        if self.shared_cache and not is_shallow:
+            mirror, _ = self.shared_cache.update_git_mirror(self.wrap.get('url'))
+            if mirror:
+                reference_option = ['--reference', mirror]
+                mlog.log('Using shared git mirror', mlog.bold(mirror))
         # for some reason git only allows commit ids to be shallowly fetched by fetch not with clone
         if is_shallow and self.is_git_full_commit_id(revno):
             # git doesn't support directly cloning shallowly for commits,
             # so we follow https://stackoverflow.com/a/43136160
             verbose_git(['-c', 'init.defaultBranch=meson-dummy-branch', 'init', self.directory], self.subdir_root, check=True)
+            if mirror:
+                add_git_alternate(self.dirname, mirror)
             verbose_git(['remote', 'add', 'origin', self.wrap.get('url')], self.dirname, check=True)
             revno = self.wrap.get('revision')
             verbose_git(['fetch', *depth_option, 'origin', revno], self.dirname, check=True)
             verbose_git(checkout_cmd, self.dirname, check=True)
         else:
             if not is_shallow:
-                verbose_git(['clone', self.wrap.get('url'), self.directory], self.subdir_root, check=True)
+                verbose_git(['clone', *reference_option, self.wrap.get('url'), self.directory], self.subdir_root, check=True)
                 if revno.lower() != 'head':
                     if not verbose_git(checkout_cmd, self.dirname):
                         verbose_git(['fetch', self.wrap.get('url'), revno], self.dirname, check=True)
                         verbose_git(checkout_cmd, self.dirname, check=True)
             else:
-                args = ['-c', 'advice.detachedHead=false', 'clone', *depth_option]
+                args = ['-c', 'advice.detachedHead=false', 'clone', *depth_option, *reference_option]
                 if revno.lower() != 'head':
                     args += ['--branch', revno]
                 args += [self.wrap.get('url'), self.directory]
@@ -742,21 +976,31 @@ class Resolver:
 
         return login, password
 
-    def get_data(self, urlstring: str) -> T.Tuple[str, str]:
-        blocksize = 10 * 1024
+    def get_data(self, urlstring: str, tmpname: T.Optional[str] = None) -> T.Tuple[str, str]:
+        """Download urlstring into tmpname, returning its hash and filename.
+
+        If tmpname already contains the beginning of the file from an
+        interrupted attempt, only the rest of it is requested when the server
+        supports HTTP ranges.
+        """
+        blocksize = 64 * 1024
         h = hashlib.sha256()
-        tmpfile = tempfile.NamedTemporaryFile(mode='wb', dir=self.cachedir, delete=False)
+        if tmpname is None:
+            with tempfile.NamedTemporaryFile(mode='wb', dir=self.cachedir, delete=False) as tmpfile:
+                tmpname = tmpfile.name
+        offset = os.path.getsize(tmpname)
+        range_headers = {'Range': f'bytes={offset}-'} if offset else {}
         url = urllib.parse.urlparse(urlstring)
         if url.hostname and url.hostname.endswith(WHITELIST_SUBDOMAIN):
-            resp = open_wrapdburl(urlstring, allow_insecure=self.allow_insecure, have_opt=self.wrap_frontend)
+            resp = open_wrapdburl(urlstring, allow_insecure=self.allow_insecure, have_opt=self.wrap_frontend,
+                                  headers=range_headers)
         elif WHITELIST_SUBDOMAIN in urlstring:
             raise WrapException(f'{urlstring} may be a WrapDB-impersonating URL')
         elif url.scheme == 'sftp':
             sftp = shutil.which('sftp')
             if sftp is None:
                 raise WrapException('Scheme sftp is not available. Install sftp to enable it.')
-            with tempfile.TemporaryDirectory() as workdir, \
-                    tempfile.NamedTemporaryFile(mode='wb', dir=self.cachedir, delete=False) as tmpfile:
+            with tempfile.TemporaryDirectory() as workdir:
                 args = []
                 # Older versions of the sftp client cannot handle URLs, hence the splitting of url below
                 if url.port:
@@ -765,14 +1009,14 @@ class Resolver:
                 command = [sftp, '-o', 'KbdInteractiveAuthentication=no', *args, f'{user}{url.hostname}:{url.path[1:]}']
                 subprocess.run(command, cwd=workdir, check=True)
                 downloaded = os.path.join(workdir, os.path.basename(url.path))
-                tmpfile.close()
-                shutil.move(downloaded, tmpfile.name)
-                return self.hash_file(tmpfile.name), tmpfile.name
+                shutil.move(downloaded, tmpname)
+                return self.hash_file(tmpname), tmpname
         else:
             headers = {
                 'User-Agent': f'mesonbuild/{coredata.version}',
                 'Accept-Language': '*',
                 'Accept-Encoding': '*',
+                **range_headers,
             }
             creds = self.get_netrc_credentials(url.netloc)
 
@@ -790,10 +1034,23 @@ class Resolver:
             try:
                 req = urllib.request.Request(urlstring, headers=headers)
                 resp = urllib.request.urlopen(req, timeout=REQ_TIMEOUT)
+            except urllib.error.HTTPError as e:
+                if offset and e.code == 416:
+                    # What we have cannot be resumed, start over
+                    os.truncate(tmpname, 0)
+                    return self.get_data(urlstring, tmpname)
+                mlog.log(str(e))
+                raise WrapException(f'could not get {urlstring}; is the internet available?')
             except OSError as e:
                 mlog.log(str(e))
                 raise WrapException(f'could not get {urlstring}; is the internet available?')
-        with contextlib.closing(resp) as resp, tmpfile as tmpfile:
+        # Only append to what we have if the server sent the rest of the file,
+        # it could also ignore the range and send all of it.
+        resumed = offset > 0 and resp.getcode() == 206
+        if resumed:
+            mlog.log(f'Resuming download after {offset} bytes.')
+            self.hash_file(tmpname, h)
+        with contextlib.closing(resp) as resp, open(tmpname, 'ab' if resumed else 'wb') as tmpfile:
             try:
                 dlsize = int(resp.info()['Content-Length'])
             except TypeError:
@@ -807,26 +1064,35 @@ class Resolver:
                     h.update(block)
                     tmpfile.write(block)
                 hashvalue = h.hexdigest()
-                return hashvalue, tmpfile.name
+                return hashvalue, tmpname
             sys.stdout.flush()
             progress_bar = ProgressBar(bar_type='download', total=dlsize,
                                        desc='Downloading',
                                        disable=(self.silent or None))
+            received = 0
             while True:
                 block = resp.read(blocksize)
                 if block == b'':
                     break
                 h.update(block)
                 tmpfile.write(block)
+                received += len(block)
                 progress_bar.update(len(block))
             progress_bar.close()
+            if received != dlsize:
+                raise WrapException(f'download of {urlstring} was interrupted after {received} of {dlsize} bytes')
             hashvalue = h.hexdigest()
-        return hashvalue, tmpfile.name
+        return hashvalue, tmpname
 
-    def hash_file(self, path: str) -> str:
-        h = hashlib.sha256()
+    def hash_file(self, path: str, h: T.Optional[hashlib._Hash] = None) -> str:
+        if h is None:
+            h = hashlib.sha256()
         with open(path, 'rb') as f:
-            h.update(f.read())
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                h.update(block)
         return h.hexdigest()
 
     def check_hash(self, what: str, path: str, hash_required: bool = True) -> None:
@@ -839,13 +1105,26 @@ class Resolver:
 
     def get_data_with_backoff(self, urlstring: str) -> T.Tuple[str, str]:
         delays = [1, 2, 4, 8, 16]
-        for d in delays:
-            try:
-                return self.get_data(urlstring)
-            except Exception as e:
-                mlog.warning(f'failed to download with error: {e}. Trying after a delay...', fatal=False)
-                time.sleep(d)
-        return self.get_data(urlstring)
+        cancelled = self.prefetch_cancelled or threading.Event()
+        # All attempts share the same temporary file, so that each of them
+        # can resume where the previous one was interrupted.
+        with tempfile.NamedTemporaryFile(mode='wb', dir=self.cachedir, delete=False) as tmpfile:
+            pass
+        try:
+            for d in delays:
+                try:
+                    return self.get_data(urlstring, tmpfile.name)
+                except Exception as e:
+                    if cancelled.is_set():
+                        raise
+                    mlog.warning(f'failed to download with error: {e}. Trying after a delay...', fatal=False)
+                    if cancelled.wait(d):
+                        raise
+            return self.get_data(urlstring, tmpfile.name)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmpfile.name)
+            raise
 
     def _download(self, what: str, ofname: str, packagename: str, fallback: bool = False) -> None:
         self.check_can_download()
@@ -866,25 +1145,48 @@ class Resolver:
             raise
         os.rename(tmpfile, ofname)
 
-    def _get_file_internal(self, what: str, packagename: str) -> str:
+    def _get_file_internal(self, what: str, packagename: str, check: bool = True) -> str:
+        '''Get the path of an archive, downloading it if needed.
+
+        If check is False, the caller is responsible for verifying the hash
+        of an archive that was not downloaded, see unpack_archive().
+        '''
         filename = self.wrap.get(what + '_filename')
         if what + '_url' in self.wrap.values:
             cache_path = os.path.join(self.cachedir, filename)
+            expected = self.wrap.get(what + '_hash').lower()
 
             if os.path.exists(cache_path):
-                self.check_hash(what, cache_path)
+                if check:
+                    self.check_hash(what, cache_path)
                 mlog.log('Using', mlog.bold(packagename), what, 'from cache.')
+                if check and self.shared_cache:
+                    self.shared_cache.store(expected, cache_path)
                 return cache_path
 
             os.makedirs(self.cachedir, exist_ok=True)
+            if self.shared_cache and self.shared_cache.fetch(expected, cache_path):
+                try:
+                    self.check_hash(what, cache_path)
+                except WrapException:
+                    # The shared cache has been tampered with, download again.
+                    os.remove(cache_path)
+                    self.shared_cache.discard(expected)
+                else:
+                    mlog.log('Using', mlog.bold(packagename), what, 'from the shared wrap cache.')
+                    return cache_path
+
             self._download(what, cache_path, packagename)
+            if self.shared_cache:
+                self.shared_cache.store(expected, cache_path)
             return cache_path
         else:
             path = Path(self.wrap.filesdir) / filename
 
             if not path.exists():
                 raise WrapException(f'File "{path}" does not exist')
-            self.check_hash(what, path.as_posix(), hash_required=False)
+            if check:
+                self.check_hash(what, path.as_posix(), hash_required=False)
 
             return path.as_posix()
 
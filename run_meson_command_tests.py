@@ -211,6 +211,13 @@ class CommandTests(unittest.TestCase):
         script = source / 'packaging' / 'create_zipapp.py'
         self._run([script.as_posix(), source, '--outfile', target, '--interpreter', python_command[0]])
         self._run([target.as_posix(), '--help'])
+        # Commands wrapped by meson must not try to run scripts from inside
+        # the zipapp
+        testdir = str(self.src_root / 'test cases/unit/132 exe launcher')
+        builddir = str(self.tmpdir / 'build')
+        self._run([target.as_posix(), 'setup'] + self.meson_args + [testdir, builddir])
+        self._run([target.as_posix(), 'compile', '-C', builddir])
+        self.assertIn('appended', (Path(builddir) / 'env.txt').read_text(encoding='utf-8'))
 
     def test_meson_runpython(self):
         meson_command = str(self.src_root / 'meson.py')
@@ -0,0 +1,6 @@
+#define HEADER "plain.h"
+#include HEADER
+
+int computed(void) {
+    return plain();
+}
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+import sys
+
+with open(sys.argv[1], encoding='utf-8') as f:
+    value = f.read().strip()
+with open(sys.argv[2], 'w', encoding='utf-8') as f:
+    f.write(f'#define GENERATED_VALUE {value}\n')
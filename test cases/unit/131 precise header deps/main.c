@@ -0,0 +1,9 @@
+#include "plain.h"
+
+int uses_gen(void);
+int uses_gen_indirectly(void);
+int computed(void);
+
+int main(void) {
+    return uses_gen() + uses_gen_indirectly() + computed() == 84 ? 0 : 1;
+}
@@ -0,0 +1,5 @@
+#include "plain.h"
+
+int plain(void) {
+    return 0;
+}
@@ -0,0 +1,3 @@
+#pragma once
+#include <stdlib.h>
+int plain(void);
@@ -0,0 +1,5 @@
+#include "gen.h"
+
+int uses_gen(void) {
+    return GENERATED_VALUE;
+}
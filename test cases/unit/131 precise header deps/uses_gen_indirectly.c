@@ -0,0 +1,5 @@
+#include "wrapper.h"
+
+int uses_gen_indirectly(void) {
+    return GENERATED_VALUE;
+}
@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+
+import os
+
+print(os.environ['LAUNCHER_TEST'])
+print(os.environ['LAUNCHER_TEST_SET'])
@@ -0,0 +1,12 @@
+#include <stdio.h>
+
+int data[4] = {1, 2, 3, 4};
+int bss[16];
+const char rodata[] = "rodata";
+__thread int tls = 1;
+
+int func(void) { return data[0] + bss[0] + tls; }
+int func2(void) { return puts(rodata); }
+__attribute__((weak)) int weak_func(void) { return 0; }
+int old_func(void) { return 1; }
+int hidden_func(void) { return 2; }
@@ -0,0 +1,3 @@
+int func(void);
+
+int main(void) { return func() != 2; }
@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+
+time.sleep(float(sys.argv[1]))
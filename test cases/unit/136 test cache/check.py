@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+
+if os.environ.get('MODE', 'good') != 'good':
+    sys.exit(1)
+with open(sys.argv[1], encoding='utf-8') as f:
+    sys.exit(f.read().strip() != 'ok')
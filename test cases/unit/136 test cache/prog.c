@@ -0,0 +1,5 @@
+int foo(void);
+
+int main(void) {
+    return foo();
+}
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+import sys
+import time
+
+time.sleep(2)
+with open(sys.argv[1], 'w', encoding='utf-8') as f:
+    f.write('done\n')
@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+
+import time
+
+time.sleep(0.5)
@@ -0,0 +1,5 @@
+#include "base.h"
+
+int base_func(void) {
+    return BASE_VALUE;
+}
@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+
+import shutil
+import sys
+
+shutil.copyfile(sys.argv[1], sys.argv[2])
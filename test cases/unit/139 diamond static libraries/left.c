@@ -0,0 +1,5 @@
+int base_func(void);
+
+int left_func(void) {
+    return base_func();
+}
@@ -0,0 +1,6 @@
+int left_func(void);
+int right_func(void);
+
+int main(void) {
+    return left_func() + right_func() == 2 ? 0 : 1;
+}
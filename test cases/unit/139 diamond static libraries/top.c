@@ -0,0 +1,6 @@
+int left_func(void);
+int right_func(void);
+
+int top_func(void) {
+    return left_func() + right_func();
+}
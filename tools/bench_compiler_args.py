@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+'''Micro-benchmark for CompilerArgs.
+
+Builds compile and link argument lists the way the backends do, adding the
+arguments of one dependency at a time, and prints the best time of several
+runs for each scenario.
+'''
+
+import argparse
+import os
+import sys
+import timeit
+import typing as T
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mesonbuild.compilers.c import ClangCCompiler
+from mesonbuild.mesonlib import MachineChoice
+
+def dependency_args(ndeps: int) -> T.List[T.List[str]]:
+    deps = []
+    for i in range(ndeps):
+        deps.append([
+            f'-I/usr/include/dep{i}',
+            f'-I/usr/include/dep{i}/internal',
+            f'-DDEP{i}_ENABLED=1',
+            f'-DHAVE_DEP{i}',
+            '-pthread',
+            '-I/usr/include/common',
+            '-DCOMMON=1',
+        ])
+    return deps
+
+def link_args(ndeps: int) -> T.List[T.List[str]]:
+    deps = []
+    for i in range(ndeps):
+        deps.append([
+            f'-L/usr/lib/dep{i}',
+            f'-ldep{i}',
+            f'/usr/lib/dep{i}/libdep{i}_static.a',
+            f'-Wl,-rpath,/usr/lib/dep{i}',
+            '-lm',
+            '-lpthread',
+            '/usr/lib/libcommon.so.1',
+        ])
+    return deps
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--deps', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    cc = ClangCCompiler([], [], 'fake', MachineChoice.HOST, False, mock.Mock())
+
+    def compile_scenario(deps: T.List[T.List[str]]) -> None:
+        args = cc.compiler_args(['-Wall', '-O2', '-g'])
+        for d in deps:
+            args.extend(d)
+        list(args)
+
+    def link_scenario(deps: T.List[T.List[str]]) -> None:
+        args = cc.compiler_args(['-Wl,--as-needed'])
+        for d in deps:
+            args.extend_preserving_lflags(d)
+        args.extend(['-Wl,--export-dynamic'] * len(deps))
+        list(args)
+
+    for ndeps in options.deps:
+        for name, scenario, deps in [('compile', compile_scenario, dependency_args(ndeps)),
+                                     ('link', link_scenario, link_args(ndeps))]:
+            best = min(timeit.repeat(lambda: scenario(deps), number=1, repeat=options.repeat))
+            print(f'{name:8} {ndeps:5} deps {sum(len(d) for d in deps):6} args: {best * 1000:9.2f} ms')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+'''Benchmark for the overhead of meson test.
+
+Generates a project with many trivial tests, half of them exitcode and half
+TAP tests, and compares how long meson test takes to run them with how long
+it takes to run the same commands directly, with the same number of
+processes. The difference is the overhead of the test harness.
+'''
+
+import argparse
+import asyncio
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+import typing as T
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mesonbuild.backend.backends import TestSerialisation
+
+PROG = '''#include <stdio.h>
+#include <string.h>
+
+int main(int argc, char **argv) {
+    if (argc > 1 && strcmp(argv[1], "tap") == 0)
+        printf("1..1\\nok 1\\n");
+    return 0;
+}
+'''
+
+def generate_project(srcdir: str, ntests: int) -> None:
+    with open(os.path.join(srcdir, 'prog.c'), 'w', encoding='utf-8') as f:
+        f.write(PROG)
+    with open(os.path.join(srcdir, 'meson.build'), 'w', encoding='utf-8') as f:
+        f.write("project('bench mtest', 'c')\n")
+        f.write("exe = executable('prog', 'prog.c')\n")
+        f.write('foreach i : range({})\n'.format(ntests // 2))
+        f.write("  test('exitcode-@0@'.format(i), exe)\n")
+        f.write("  test('tap-@0@'.format(i), exe, args: ['tap'], protocol: 'tap')\n")
+        f.write('endforeach\n')
+
+async def run_directly(tests: T.List[TestSerialisation], num_processes: int) -> None:
+    semaphore = asyncio.Semaphore(num_processes)
+
+    async def run(test: TestSerialisation) -> None:
+        async with semaphore:
+            p = await asyncio.create_subprocess_exec(*test.fname, *test.cmd_args,
+                                                     stdout=asyncio.subprocess.PIPE,
+                                                     stderr=asyncio.subprocess.STDOUT)
+            await p.communicate()
+
+    await asyncio.gather(*(run(t) for t in tests))
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tests', type=int, default=20000,
+                        help='number of tests of the generated project')
+    parser.add_argument('-j', '--num-processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('meson_test_args', nargs='*',
+                        help='additional arguments for meson test, after --')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        srcdir = os.path.join(tmpdir, 'src')
+        builddir = os.path.join(tmpdir, 'build')
+        os.mkdir(srcdir)
+        generate_project(srcdir, options.tests)
+        meson = [sys.executable, os.path.join(ROOT, 'meson.py')]
+        subprocess.check_call(meson + ['setup', srcdir, builddir], stdout=subprocess.DEVNULL)
+        subprocess.check_call(meson + ['compile', '-C', builddir], stdout=subprocess.DEVNULL)
+        with open(os.path.join(builddir, 'meson-private', 'meson_test_setup.dat'), 'rb') as f:
+            tests = pickle.load(f)
+
+        cmd = meson + ['test', '-C', builddir, '--no-rebuild', '-q',
+                       '--num-processes', str(options.num_processes)] + options.meson_test_args
+        harness = []
+        direct = []
+        for _ in range(options.repeat):
+            start = time.perf_counter()
+            subprocess.run(cmd, stdout=subprocess.DEVNULL, check=True)
+            harness.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            asyncio.run(run_directly(tests, options.num_processes))
+            direct.append(time.perf_counter() - start)
+
+    ntests = len(tests)
+    overhead = min(harness) - min(direct)
+    print(f'{ntests} tests, {options.num_processes} processes: meson test {min(harness):.2f}s, '
+          f'directly {min(direct):.2f}s, overhead {overhead:.2f}s '
+          f'({overhead / ntests * 1000:.2f} ms per test)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: Apache-2.0
+# Copyright 2025 The Meson development team
+
+'''Benchmark for the symbol extractor.
+
+Compares reading the ELF file in process with running readelf and nm, for
+the given shared libraries or for a generated one with many symbols, and
+checks that both produce the same symbols file.
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+import typing as T
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mesonbuild.scripts import symbolextractor
+
+def generate_library(tmpdir: str, nsymbols: int) -> str:
+    src = os.path.join(tmpdir, 'big.c')
+    with open(src, 'w', encoding='utf-8') as f:
+        for i in range(nsymbols):
+            if i % 10 == 0:
+                f.write(f'int data{i}[{i % 7 + 1}] = {{1}};\n')
+            else:
+                f.write(f'int func{i}(int x) {{ return x + {i}; }}\n')
+    lib = os.path.join(tmpdir, 'libbig.so')
+    subprocess.check_call([os.environ.get('CC', 'cc'), '-shared', '-fPIC', '-O0',
+                           '-Wl,-soname,libbig.so.1', '-o', lib, src])
+    return lib
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('libraries', nargs='*')
+    parser.add_argument('--symbols', type=int, default=20000,
+                        help='number of symbols of the generated library')
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        libraries = options.libraries or [generate_library(tmpdir, options.symbols)]
+        symbolextractor.TOOL_WARNING_FILE = os.path.join(tmpdir, 'tool_warning')
+        native_out = os.path.join(tmpdir, 'native.symbols')
+        tools_out = os.path.join(tmpdir, 'tools.symbols')
+
+        def native(lib: str) -> None:
+            if os.path.exists(native_out):
+                os.unlink(native_out)
+            assert symbolextractor.elf_syms(lib, native_out)
+
+        def tools(lib: str) -> None:
+            if os.path.exists(tools_out):
+                os.unlink(tools_out)
+            with mock.patch.object(symbolextractor, 'elf_syms', return_value=False):
+                symbolextractor.gnu_syms(lib, tools_out)
+
+        for lib in libraries:
+            results: T.Dict[str, float] = {}
+            for name, func in [('in-process', native), ('readelf+nm', tools)]:
+                results[name] = min(timeit.repeat(lambda: func(lib), number=1, repeat=options.repeat))
+            with open(native_out, 'rb') as a, open(tools_out, 'rb') as b:
+                identical = a.read() == b.read()
+            with open(native_out, 'rb') as a:
+                nlines = len(a.read().splitlines())
+            print(f'{os.path.basename(lib)}: {nlines} lines, '
+                  + ', '.join(f'{k} {v * 1000:.1f} ms' for k, v in results.items())
+                  + ('' if identical else ', OUTPUT DIFFERS'))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
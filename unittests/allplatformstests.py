@@ -26,6 +26,7 @@ import mesonbuild.dependencies.base
 import mesonbuild.dependencies.factory
 import mesonbuild.envconfig
 import mesonbuild.environment
+import mesonbuild.build
 import mesonbuild.coredata
 import mesonbuild.machinefile
 import mesonbuild.modules.gnome
@@ -51,6 +52,7 @@ from mesonbuild.compilers import (
 from mesonbuild.linkers import linkers
 
 from mesonbuild.dependencies.pkgconfig import PkgConfigDependency
+from mesonbuild.backend.ninjabackend import NinjaBackend
 from mesonbuild.build import Target, ConfigurationData, Executable, SharedLibrary, StaticLibrary
 from mesonbuild import mtest
 import mesonbuild.modules.pkgconfig
@@ -487,6 +489,25 @@ class AllPlatformTests(BasePlatformTests):
         self.assertTrue(compdb[3]['file'].endswith("libfile4.c"))
         # FIXME: We don't have access to the linker command
 
+    def test_static_diamond_link_graph(self):
+        '''
+        Test that static libraries reachable through several paths, with
+        link_with and link_whole, are listed once and in a stable order.
+        '''
+        testdir = os.path.join(self.unit_test_dir, '139 diamond static libraries')
+        self.init(testdir)
+        b = mesonbuild.build.load(self.builddir)
+        targets = {t.name: t for t in b.get_build_targets().values()}
+        self.assertEqual([t.name for t in targets['prog'].get_dependencies()], ['left', 'base', 'right'])
+        self.assertEqual([t.name for t in targets['top'].get_dependencies()], ['left', 'base', 'right'])
+        self.assertEqual([t.name for t in targets['top'].get_internal_static_libraries()], ['left', 'base'])
+        # The generated header of base is only an order-only dependency once
+        backend = NinjaBackend(b, None)
+        headers = backend.get_generated_headers(targets['prog'])
+        self.assertEqual(headers, backend.get_generated_headers(targets['base']))
+        self.assertEqual(len(headers), 1)
+        self.build()
+
     def test_replace_unencodable_xml_chars(self):
         '''
         Test that unencodable xml chars are replaced with their
@@ -672,6 +693,55 @@ class AllPlatformTests(BasePlatformTests):
         self._run(self.meson_command + ['install', '--dry-run', '--destdir', rel_installpath, '-C', self.builddir])
         self.assertEqual(logged, self.read_install_logs())
 
+        # Installing in parallel installs the same files, and logs them in
+        # the same order
+        self._run(self.meson_command + ['install', '-j', '4', '--destdir', self.installdir], workdir=self.builddir)
+        self.assertEqual(logged, self.read_install_logs())
+        self.assertEqual(set(expected), {installpath, *installpath.rglob('*')})
+
+    def test_install_incremental(self):
+        testdir = self.copy_srcdir(os.path.join(self.unit_test_dir, '134 incremental install'))
+        self.init(testdir)
+        install = self.meson_command + ['install', '--incremental', '--destdir', self.installdir]
+        datadir = Path(self.installdir, self.prefix.lstrip('/'), 'share', 'incr')
+        out = self._run(install, workdir=self.builddir)
+        self.assertIn('Copied 3 files, skipped 0 unchanged files, removed 0 files', out)
+        logged = self.read_install_logs()
+        mtimes = {p: p.lstat().st_mtime_ns for p in Path(self.installdir).rglob('*')}
+
+        # Nothing is copied again, even if the mtime of a source changed,
+        # and the log lists the same files; directories are only logged
+        # when they are created
+        os.utime(os.path.join(testdir, 'data.txt'))
+        out = self._run(install, workdir=self.builddir)
+        self.assertIn('Copied 0 files, skipped 4 unchanged files, removed 0 files', out)
+        self.assertEqual([p for p in logged if not p.is_dir()], self.read_install_logs())
+        self.assertEqual(mtimes, {p: p.lstat().st_mtime_ns for p in Path(self.installdir).rglob('*')})
+
+        # Changed files and files that were modified since they were
+        # installed are copied again
+        with open(os.path.join(testdir, 'data.txt'), 'w', encoding='utf-8') as f:
+            f.write('changed\n')
+        Path(datadir, 'extra.txt').write_text('modified\n', encoding='utf-8')
+        out = self._run(install, workdir=self.builddir)
+        self.assertIn('Copied 2 files, skipped 2 unchanged files, removed 0 files', out)
+        self.assertEqual(Path(datadir, 'data.txt').read_text(encoding='utf-8'), 'changed\n')
+        self.assertEqual(Path(datadir, 'extra.txt').read_text(encoding='utf-8'), 'extra\n')
+
+        # Files that are no longer installed are removed
+        self.setconf('-Dextra=false', will_build=False)
+        out = self._run(install, workdir=self.builddir)
+        self.assertIn('Copied 0 files, skipped 3 unchanged files, removed 1 files', out)
+        self.assertPathDoesNotExist(os.path.join(datadir, 'extra.txt'))
+
+        # Targets are installed again when their mode changes
+        self.setconf('-Dprog_mode=rwxr-x---', will_build=False)
+        out = self._run(install, workdir=self.builddir)
+        self.assertIn('Copied 1 files, skipped 2 unchanged files, removed 0 files', out)
+        if not is_windows():
+            prog = Path(self.installdir, self.prefix.lstrip('/'), 'bin', 'prog')
+            self.assertEqual(prog.stat().st_mode & 0o777, 0o750)
+
     def test_uninstall(self):
         exename = os.path.join(self.installdir, 'usr/bin/prog' + exe_suffix)
         dirname = os.path.join(self.installdir, 'usr/share/dir')
@@ -890,6 +960,16 @@ class AllPlatformTests(BasePlatformTests):
         self.assertIn('ENV_B is 3', other_log)
         self.assertIn('ENV_C is 2', other_log)
 
+    def test_test_env_unset(self):
+        '''
+        Variables unset by the test's environment() object are removed from
+        the environment inherited from meson test.
+        '''
+        testdir = os.path.join(self.common_test_dir, '275 environment')
+        self.init(testdir)
+        self.build()
+        self._run(self.mtest_command + ['not set'], override_envvars={'foo': 'bar'})
+
     def assertFailedTestCount(self, failure_count, command):
         try:
             self._run(command)
@@ -1370,12 +1450,39 @@ class AllPlatformTests(BasePlatformTests):
     def test_custom_target_exe_data_deterministic(self):
         testdir = os.path.join(self.common_test_dir, '109 custom target capture')
         self.init(testdir)
-        meson_exe_dat1 = glob(os.path.join(self.privatedir, 'meson_exe*.dat'))
+        meson_exe_dat1 = glob(os.path.join(self.privatedir, 'meson_exe*'))
         self.wipe()
         self.init(testdir)
-        meson_exe_dat2 = glob(os.path.join(self.privatedir, 'meson_exe*.dat'))
+        meson_exe_dat2 = glob(os.path.join(self.privatedir, 'meson_exe*'))
         self.assertListEqual(meson_exe_dat1, meson_exe_dat2)
 
+    def test_custom_target_exe_launcher(self):
+        if self.backend is not Backend.ninja:
+            raise SkipTest('This test reads the ninja file')
+        testdir = os.path.join(self.unit_test_dir, '132 exe launcher')
+        self.init(testdir)
+        with open(os.path.join(self.builddir, 'build.ninja'), encoding='utf-8') as f:
+            contents = f.read()
+        self.assertNotIn("'--internal' 'exe'", contents)
+        self.assertIn('exe_launcher.py', contents)
+        self.assertEqual(glob(os.path.join(self.privatedir, 'meson_exe*.dat')), [])
+
+        self.build()
+        with open(os.path.join(self.builddir, 'env.txt'), encoding='utf-8') as f:
+            self.assertEqual(f.read().splitlines(), ['appended', 'newline', 'value'])
+        with open(os.path.join(testdir, 'printenv.py'), encoding='utf-8') as f:
+            expected = f.read().upper()
+        with open(os.path.join(self.builddir, 'feed.txt'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), expected)
+        out = self.build('printenv')
+        self.assertIn('appended', out)
+
+        # Unchanged captured output is not rewritten
+        mtime = os.stat(os.path.join(self.builddir, 'env.txt')).st_mtime_ns
+        os.utime(os.path.join(testdir, 'printenv.py'))
+        self.assertIn('Generating env', self.build())
+        self.assertEqual(os.stat(os.path.join(self.builddir, 'env.txt')).st_mtime_ns, mtime)
+
     def test_noop_changes_cause_no_rebuilds(self):
         '''
         Test that no-op changes to the build files such as mtime do not cause
@@ -3533,6 +3640,8 @@ class AllPlatformTests(BasePlatformTests):
             ('depends', list),
             ('workdir', (str, None)),
             ('priority', int),
+            ('cpu_cost', int),
+            ('resources', list),
             ('extra_paths', list),
         ]
 
@@ -4216,6 +4325,122 @@ class AllPlatformTests(BasePlatformTests):
         self.assertRegex(contents, r'build main(\.exe)?.*: c_LINKER')
         self.assertRegex(contents, r'build (lib|cyg)?mylib.*: c_LINKER')
 
+    def test_shared_compile_args(self):
+        if self.backend is not Backend.ninja:
+            raise SkipTest('This test reads the ninja file')
+
+        testdir = os.path.join(self.common_test_dir, '131 override options')
+        self.init(testdir)
+
+        build_ninja = os.path.join(self.builddir, 'build.ninja')
+        with open(build_ninja, encoding='utf-8') as f:
+            contents = f.read()
+
+        # The arguments common to both sources are only written once
+        m = re.search(r'^(notunity\w*_c_ARGS\w*) = (.*)$', contents, re.MULTILINE)
+        self.assertIsNotNone(m, msg=contents)
+        self.assertEqual(contents.count(f' ARGS = ${m.group(1)}'), 2)
+        for compdb in self.get_compdb():
+            if 'notunity' in compdb['output']:
+                self.assertIn('notunity', compdb['command'])
+                self.assertNotIn('$', compdb['command'])
+
+        # Variable references end at a '.' in ninja, and only ASCII
+        # characters are allowed in variable names
+        self.new_builddir()
+        with tempfile.TemporaryDirectory() as d:
+            with open(os.path.join(d, 'meson.build'), 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent('''\
+                    project('dotted', 'c')
+                    static_library('foo-2.0', 'a.c', 'b.c')
+                    static_library('bär', 'a.c', 'b.c')
+                    '''))
+            for name in ['a', 'b']:
+                with open(os.path.join(d, f'{name}.c'), 'w', encoding='utf-8') as f:
+                    f.write(f'int {name}(void) {{ return 0; }}\n')
+            self.init(d)
+            self.build()
+            with open(os.path.join(self.builddir, 'build.ninja'), encoding='utf-8') as f:
+                contents = f.read()
+        shared = re.findall(r'^(\S+_c_ARGS) = ', contents, re.MULTILINE)
+        self.assertEqual(len(shared), 2, msg=contents)
+        for var in shared:
+            self.assertRegex(var, r'^[A-Za-z0-9_-]+$')
+
+    def test_compdb_fragments(self):
+        if self.backend is not Backend.ninja:
+            raise SkipTest('Compiler db not available with non-ninja backends')
+
+        testdir = self.copy_srcdir(os.path.join(self.common_test_dir, '22 object extraction'))
+        # ninja leaves fewer characters unquoted in file names than shlex
+        for fname in ('a=b.c', 'x@y.c'):
+            with open(os.path.join(testdir, fname), 'w', encoding='utf-8') as f:
+                f.write(f'int {fname[0]}_func(void) {{ return 0; }}\n')
+        with open(os.path.join(testdir, 'meson.build'), 'a', encoding='utf-8') as f:
+            f.write("library('quoting', 'a=b.c', 'x@y.c')\n")
+        self.init(testdir, extra_args=['-Dbackend_compdb_fragments=true'])
+        compdb = self.get_compdb()
+        fragments_dir = os.path.join(self.builddir, 'compile_commands.d')
+        fragments = {}
+        for fname in os.listdir(fragments_dir):
+            with open(os.path.join(fragments_dir, fname), encoding='utf-8') as f:
+                fragments[fname] = json.load(f)
+        self.assertEqual(sorted(e['output'] for f in fragments.values() for e in f),
+                         sorted(e['output'] for e in compdb))
+        out = self._run(self.build_command + ['-t', 'compdb', 'c_COMPILER'], workdir=self.builddir, stderr=False)
+        self.assertEqual(sorted((e['output'], e['command']) for e in json.loads(out)),
+                         sorted((e['output'], e['command']) for e in compdb))
+        intro = self.introspect('--targets')
+        for t in intro:
+            if t['type'] != 'custom':
+                self.assertIn(t['id'] + '.json', fragments)
+
+        # Files are only rewritten when their content changes
+        mtimes = {f: os.stat(os.path.join(fragments_dir, f)).st_mtime_ns for f in fragments}
+        compdb_mtime = os.stat(os.path.join(self.builddir, 'compile_commands.json')).st_mtime_ns
+        self.init(testdir, extra_args=['--reconfigure'])
+        self.assertEqual(os.stat(os.path.join(self.builddir, 'compile_commands.json')).st_mtime_ns, compdb_mtime)
+        for f, mtime in mtimes.items():
+            self.assertEqual(os.stat(os.path.join(fragments_dir, f)).st_mtime_ns, mtime)
+
+        self.init(testdir, extra_args=['--reconfigure', '-Dbackend_compdb_fragments=false'])
+        self.assertPathDoesNotExist(fragments_dir)
+        self.assertEqual(self.get_compdb(), compdb)
+
+    def test_precise_header_deps(self):
+        if self.backend is not Backend.ninja:
+            raise SkipTest('This test reads the ninja file')
+        if not mesonbuild.environment.detect_ninja('1.10'):
+            raise SkipTest('Dyndeps need ninja 1.10 or newer')
+
+        testdir = os.path.join(self.unit_test_dir, '131 precise header deps')
+        self.init(testdir, extra_args=['-Dbackend_header_deps=precise'])
+
+        # Compilations are no longer ordered after the generated headers
+        # in build.ninja, only through the dyndep file
+        with open(os.path.join(self.builddir, 'build.ninja'), encoding='utf-8') as f:
+            contents = f.read()
+        m = re.search(r'^build liblib\.a\.p/plain\.c\.o: .*$', contents, re.MULTILINE)
+        self.assertIsNotNone(m, msg=contents)
+        self.assertNotIn('gen.h', m.group(0))
+
+        self.build()
+        self.run_tests()
+        with open(os.path.join(self.builddir, 'liblib.a.p', 'headerscan.dd'), encoding='utf-8') as f:
+            dyndeps = f.read()
+        for obj, uses_gen in [('uses_gen', True), ('uses_gen_indirectly', True),
+                              ('computed', True), ('plain', False)]:
+            line = f'build liblib.a.p/{obj}.c.o: dyndep'
+            if uses_gen:
+                line += ' | liblib.a.p/generated-headers'
+            self.assertIn(line + '\n', dyndeps)
+
+        # The scan is redone when an included header changes
+        self.utime(os.path.join(testdir, 'wrapper.h'))
+        out = self.build()
+        self.assertIn('Scanning target lib for generated header includes', out)
+        self.assertNotIn('Scanning target prog', out)
+
     def test_commands_documented(self):
         '''
         Test that all listed meson commands are documented in Commands.md.
@@ -5453,6 +5678,177 @@ class AllPlatformTests(BasePlatformTests):
                 self._run(self.mtest_command + ['--slice=' + arg])
             self.assertIn(expectation, cm.exception.output)
 
+    def test_slice_by_duration(self):
+        testdir = os.path.join(self.unit_test_dir, '127 test slice')
+        self.init(testdir)
+        self.build()
+        durations = os.path.join(self.builddir, 'durations.json')
+
+        def get_slices(nslices):
+            slices = []
+            for i in range(1, nslices + 1):
+                output = self._run(self.mtest_command + ['--list', '--slice-by=duration', '--durations', durations,
+                                                         f'--slice={i}/{nslices}'])
+                slices.append({int(x) for x in re.findall(r'test-([0-9]+)', output)})
+            self.assertEqual(sorted(t for s in slices for t in s), list(range(1, 11)))
+            return slices
+
+        # Without durations, the slices have the same number of tests
+        self.assertEqual([len(s) for s in get_slices(2)], [5, 5])
+        self.assertEqual(sorted(len(s) for s in get_slices(3)), [3, 3, 4])
+
+        # test-1 takes as long as 8 other tests
+        with open(durations, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'durations': {f'test_slice:test-{i} (test_slice)': 8.0 if i == 1 else 1.0
+                                                   for i in range(1, 11)}}, f)
+        slices = get_slices(2)
+        slow = next(s for s in slices if 1 in s)
+        self.assertLessEqual(len(slow), 2)
+
+        # Running the tests records their durations into the given file
+        self._run(self.mtest_command + ['--durations', durations, 'test-2'])
+        with open(durations, encoding='utf-8') as f:
+            self.assertLess(json.load(f)['durations']['test_slice:test-2 (test_slice)'], 1.0)
+
+    def test_cached(self):
+        testdir = self.copy_srcdir(os.path.join(self.unit_test_dir, '136 test cache'))
+        self.init(testdir)
+        self.build()
+
+        def run_cached(*args, fail=False, env=None):
+            cmd = self.mtest_command + ['--cached', *args]
+            if fail:
+                with self.assertRaises(subprocess.CalledProcessError):
+                    self._run(cmd, override_envvars=env)
+            else:
+                self._run(cmd, override_envvars=env)
+            with open(os.path.join(self.logdir, 'testlog.json'), encoding='utf-8') as f:
+                return {r['name']: r.get('cached', False) for r in map(json.loads, f)}
+
+        self.assertEqual(run_cached(), {'exe': False, 'data': False})
+        self.assertEqual(run_cached(), {'exe': True, 'data': True})
+        with open(os.path.join(self.logdir, 'testlog.txt'), encoding='utf-8') as f:
+            self.assertIn('result:       exit status 0, cached', f.read())
+        self.assertRegex(self._run(self.mtest_command + ['--cached', 'data']), r'data +OK +[0-9.]+s +cached')
+        self.assertEqual(run_cached('--no-cache'), {'exe': False, 'data': False})
+
+        # A failure is not cached, and replaces the previous pass
+        data = os.path.join(testdir, 'data.txt')
+        with open(data, 'w', encoding='utf-8') as f:
+            f.write('fail\n')
+        self.assertEqual(run_cached(fail=True), {'exe': True, 'data': False})
+        with open(data, 'w', encoding='utf-8') as f:
+            f.write('ok\n')
+        self.assertEqual(run_cached(), {'exe': True, 'data': False})
+
+        # Changing a library that the executable links to runs it again,
+        # even though the executable is not relinked
+        foo = os.path.join(testdir, 'foo.c')
+        with open(foo, encoding='utf-8') as f:
+            foo_source = f.read()
+        with open(foo, 'w', encoding='utf-8') as f:
+            f.write(foo_source.replace('return 0;', 'return 1;'))
+        self.assertEqual(run_cached(fail=True), {'exe': False, 'data': True})
+        with open(foo, 'w', encoding='utf-8') as f:
+            f.write(foo_source)
+        self.assertEqual(run_cached(), {'exe': False, 'data': True})
+
+        # Rebuilding the executable runs it again
+        with open(os.path.join(testdir, 'prog.c'), 'a', encoding='utf-8') as f:
+            f.write('/* changed */\n')
+        self.assertEqual(run_cached(), {'exe': False, 'data': True})
+        self.assertEqual(run_cached('--test-args=-v'), {'exe': False, 'data': False})
+
+        # The environment inherited from meson test is an input too
+        self.assertEqual(run_cached(env={'MODE': 'good'}), {'exe': False, 'data': False})
+        self.assertEqual(run_cached(fail=True, env={'MODE': 'bad'}), {'exe': False, 'data': False})
+        self.assertEqual(run_cached(env={'MODE': 'good'}), {'exe': False, 'data': False})
+        self.assertEqual(run_cached(env={'MODE': 'good'}), {'exe': True, 'data': True})
+
+    def test_pipeline(self):
+        testdir = os.path.join(self.unit_test_dir, '137 test pipeline')
+        slow = os.path.join(self.builddir, 'slow.txt')
+
+        def run(*args):
+            self._run(self.mtest_command + ['-j2', '--schedule=declared', *args])
+            with open(os.path.join(self.logdir, 'testlog.json'), encoding='utf-8') as f:
+                results = {r['name']: r for r in map(json.loads, f)}
+            self.assertEqual({r['result'] for r in results.values()}, {'OK'})
+            return results['quick']['starttime'], os.stat(slow).st_mtime
+
+        # The test without dependencies waits for the others to be built...
+        self.init(testdir)
+        quick_start, built = run()
+        self.assertGreaterEqual(quick_start, built - 0.5)
+        self.wipe()
+
+        # ... unless tests start as soon as their own dependencies are built
+        self.init(testdir)
+        quick_start, built = run('--pipeline')
+        self.assertLess(quick_start, built - 1)
+        self.wipe()
+
+        # Tests whose dependencies fail to build are not run
+        self.init(testdir, extra_args=['-Dbroken=true'])
+        with self.assertRaises(subprocess.CalledProcessError) as cm:
+            self._run(self.mtest_command + ['-j2', '--schedule=declared', '--pipeline'])
+        self.assertEqual(cm.exception.returncode, 125)
+        self.assertIn('Could not rebuild', cm.exception.output)
+        self.assertPathDoesNotExist(os.path.join(self.builddir, 'ran.txt'))
+
+    def test_resources(self):
+        testdir = os.path.join(self.unit_test_dir, '138 test resources')
+        self.init(testdir)
+        self.build()
+
+        def run(*args):
+            self._run(self.mtest_command + ['-j4', '--schedule=declared', *args])
+            with open(os.path.join(self.logdir, 'testlog.json'), encoding='utf-8') as f:
+                results = {r['name']: r for r in map(json.loads, f)}
+
+            def overlap(a, b):
+                a, b = results[a], results[b]
+                return a['starttime'] < b['starttime'] + b['duration'] and \
+                    b['starttime'] < a['starttime'] + a['duration']
+            return overlap
+
+        overlap = run()
+        self.assertFalse(overlap('db-1', 'db-2'))
+        # Other tests keep running
+        self.assertTrue(overlap('db-1', 'free-1'))
+        for name in ['db-1', 'db-2', 'free-1', 'free-2']:
+            self.assertFalse(overlap('heavy', name))
+
+        overlap = run('--resource', 'db=2')
+        self.assertTrue(overlap('db-1', 'db-2'))
+
+    def test_schedule(self):
+        testdir = os.path.join(self.unit_test_dir, '135 test schedule')
+        self.init(testdir)
+        self.build()
+
+        def run_order(*args):
+            output = self._run(self.mtest_command + ['-j2', *args])
+            with open(os.path.join(self.logdir, 'testlog.json'), encoding='utf-8') as f:
+                results = [json.loads(l) for l in f]
+            return [r['name'] for r in sorted(results, key=lambda r: r['starttime'])], output
+
+        declared = ['prio', 'fast-1', 'fast-2', 'fast-3', 'fast-4', 'slow']
+        # Without history, tests start as declared
+        order, output = run_order()
+        self.assertEqual(order, declared)
+        self.assertNotIn('expected from previous runs', output)
+        with open(os.path.join(self.privatedir, 'test-durations.json'), encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)['durations']), 6)
+
+        # Then the slow test starts first, after the one with a higher priority
+        order, output = run_order()
+        self.assertEqual(order[:2], ['prio', 'slow'])
+        self.assertRegex(output, r'Took [0-9.]+s, [0-9.]+s expected from previous runs')
+
+        order, _ = run_order('--schedule=declared')
+        self.assertEqual(order, declared)
+
     def test_rsp_support(self):
         env = get_fake_env()
         cc = detect_c_compiler(env, MachineChoice.HOST)
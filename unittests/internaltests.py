@@ -5,12 +5,15 @@ from configparser import ConfigParser
 from pathlib import Path
 from unittest import mock
 import argparse
+import collections
 import contextlib
+import errno
 import io
 import json
 import operator
 import os
 import pickle
+import random
 import stat
 import subprocess
 import tempfile
@@ -27,6 +30,7 @@ import mesonbuild.environment
 import mesonbuild.modules.gnome
 import mesonbuild.scripts.env2mfile
 from mesonbuild import coredata
+from mesonbuild.arglist import Dedup
 from mesonbuild.compilers.c import ClangCCompiler, GnuCCompiler
 from mesonbuild.compilers.cpp import VisualStudioCPPCompiler
 from mesonbuild.compilers.d import DmdDCompiler
@@ -275,6 +279,85 @@ class InternalTests(unittest.TestCase):
         l += ['-isystem/usr/include', '-isystem=/usr/share/include', '-DSOMETHING_IMPORTANT=1', '-isystem', '/usr/local/include']
         self.assertEqual(l.to_native(copy=True), ['-Lfoodir', '-lfoo', '-DSOMETHING_IMPORTANT=1'])
 
+    def test_compiler_args_class_matches_scanning(self):
+        '''
+        Random sequences of operations give the same results as the previous
+        implementation, which looked for UNIQUE arguments by scanning the lists.
+        '''
+        def scanning_iadd(self, args):
+            tmp_pre = collections.deque()
+            for arg in args:
+                dedup = self._can_dedup(arg)
+                if dedup is Dedup.UNIQUE:
+                    if arg in self._container or arg in self.pre or arg in self.post:
+                        continue
+                elif dedup is Dedup.OVERRIDDEN:
+                    self.needs_override_check = True
+                if self._should_prepend(arg):
+                    tmp_pre.appendleft(arg)
+                else:
+                    self.post.append(arg)
+            self.pre.extendleft(tmp_pre)
+            return self
+
+        pool = ['-I.', '-Ifoo', '-I/abs/inc', '-DA', '-DA=1', '-UA', '-D', 'FOO', '-Lx', '-L/abs/lib',
+                '-L/abs/libd.a', '-lfoo', '-lbar', '-lm', '/abs/libq.a', '/abs/libr.so', '/abs/libs.so.1.2',
+                'libt.lib', '-c', '-pipe', '-pthread', '-O2', '-Wall', '-Wl,-rpath,/r', '-isystem', '/sys']
+        cc = ClangCCompiler([], [], 'fake', MachineChoice.HOST, False, mock.Mock())
+        d = DmdDCompiler([], 'fake', MachineChoice.HOST, 'info', 'arch')
+        for compiler in [cc, d]:
+            cls = type(compiler.compiler_args())
+            ref_cls = type('Scanning' + cls.__name__, (cls,), {'__iadd__': scanning_iadd})
+            for seed in range(300):
+                rng = random.Random(seed)
+
+                def some_args() -> T.List[str]:
+                    return rng.choices(pool, k=rng.randrange(6))
+
+                initial = some_args()
+                new, ref = cls(compiler, initial), ref_cls(compiler, initial)
+                for _ in range(30):
+                    op = rng.randrange(10)
+                    # Replacing, deleting and inserting flush pending arguments,
+                    # which may drop duplicates
+                    size = len(list(ref)) if op in {5, 6, 7} else len(ref)
+                    if op == 0:
+                        args = some_args()
+                        new += args
+                        ref += args
+                    elif op == 1:
+                        arg = rng.choice(pool)
+                        new.append_direct(arg)
+                        ref.append_direct(arg)
+                    elif op == 2:
+                        args = some_args()
+                        new.extend_preserving_lflags(args)
+                        ref.extend_preserving_lflags(args)
+                    elif op == 3:
+                        args = some_args()
+                        new, ref = new + args, ref + args
+                    elif op == 4:
+                        args = some_args()
+                        new, ref = args + new, args + ref
+                    elif op == 5 and size:
+                        i, arg = rng.randrange(size), rng.choice(pool)
+                        new[i] = arg
+                        ref[i] = arg
+                    elif op == 6 and size:
+                        i = rng.randrange(size)
+                        del new[i]
+                        del ref[i]
+                    elif op == 7:
+                        i, arg = rng.randrange(size + 1), rng.choice(pool)
+                        new.insert(i, arg)
+                        ref.insert(i, arg)
+                    elif op == 8:
+                        new, ref = new.copy(), ref.copy()
+                    else:
+                        self.assertEqual(list(new), list(ref), msg=f'seed {seed}')
+                    self.assertEqual(len(new), len(ref), msg=f'seed {seed}')
+                self.assertEqual(list(new), list(ref), msg=f'seed {seed}')
+
     def test_string_templates_substitution(self):
         dictfunc = mesonbuild.mesonlib.get_filenames_templates_dict
         substfunc = mesonbuild.mesonlib.substitute_values
@@ -1743,6 +1826,139 @@ class InternalTests(unittest.TestCase):
             with self.subTest(raw):
                 self.assertEqual(OptionKey.from_string(raw), expected)
 
+    def test_file_interning(self) -> None:
+        File = mesonbuild.mesonlib.File
+        f = File(False, 'sub', 'foo.c')
+        self.assertIs(File(False, 'sub', 'foo.c'), f)
+        self.assertIs(File.from_built_file('sub', 'foo.c'), File(True, 'sub', 'foo.c'))
+        self.assertIsNot(File(True, 'sub', 'foo.c'), f)
+        self.assertNotEqual(File(True, 'sub', 'foo.c'), f)
+
+        self.assertEqual(f.relative_name(), os.path.join('sub', 'foo.c'))
+        self.assertEqual(f.rel_to_builddir('..'), os.path.join('..', 'sub', 'foo.c'))
+        self.assertEqual(f.rel_to_builddir('../src'), os.path.join('../src', 'sub', 'foo.c'))
+        self.assertEqual(f.absolute_path('/src', '/build'), os.path.normpath('/src/sub/foo.c'))
+        self.assertEqual(File(True, 'sub', 'foo.c').absolute_path('/src', '/build'),
+                         os.path.normpath('/build/sub/foo.c'))
+
+        # Unpickling gives back an equal object with fresh caches
+        g = pickle.loads(pickle.dumps(f))
+        self.assertEqual(g, f)
+        self.assertEqual(hash(g), hash(f))
+        self.assertEqual(g.rel_to_builddir('..'), os.path.join('..', 'sub', 'foo.c'))
+        self.assertIs(File(False, 'sub', 'foo.c'), f)
+
+    def test_wrap_cache(self) -> None:
+        from mesonbuild.wrap.cache import WrapCache, parse_size
+        self.assertEqual(parse_size('10'), 10)
+        self.assertEqual(parse_size('2k'), 2048)
+        self.assertEqual(parse_size('3M'), 3 * 1024 * 1024)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = WrapCache(os.path.join(tmpdir, 'cache'), max_size=30)
+            srcs = {}
+            for i, name in enumerate(['a', 'b', 'c']):
+                srcs[name] = os.path.join(tmpdir, name)
+                with open(srcs[name], 'wb') as f:
+                    f.write(name.encode() * 10)
+                hashvalue = f'{i:02}' + name * 62
+                cache.store(hashvalue, srcs[name])
+                # Make the modification times deterministic for eviction
+                os.utime(cache.entry_path(hashvalue), (i, i))
+
+            dst = os.path.join(tmpdir, 'dst')
+            self.assertTrue(cache.fetch('00' + 'a' * 62, dst))
+            with open(dst, 'rb') as f:
+                self.assertEqual(f.read(), b'a' * 10)
+            self.assertFalse(cache.fetch('ff' + 'f' * 62, os.path.join(tmpdir, 'missing')))
+
+            # 'b' is now the least recently used entry and must go first
+            cache.max_size = 25
+            cache.evict()
+            self.assertFalse(os.path.exists(cache.entry_path('01' + 'b' * 62)))
+            self.assertTrue(os.path.exists(cache.entry_path('00' + 'a' * 62)))
+            self.assertTrue(os.path.exists(cache.entry_path('02' + 'c' * 62)))
+
+    def test_clone_or_copy_file(self) -> None:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            src = os.path.join(tmpdir, 'src')
+            data = os.urandom(100000)
+            with open(src, 'wb') as f:
+                f.write(data)
+            for i, side_effect in enumerate([None, OSError(errno.EXDEV, 'cross-device link')]):
+                dst = os.path.join(tmpdir, f'dst{i}')
+                with contextlib.ExitStack() as stack:
+                    if side_effect is not None and hasattr(os, 'copy_file_range'):
+                        # Only a plain copy is left when neither cloning nor
+                        # copy_file_range() work
+                        stack.enter_context(mock.patch('fcntl.ioctl', side_effect=side_effect))
+                        stack.enter_context(mock.patch('os.copy_file_range', side_effect=side_effect))
+                    mesonbuild.mesonlib.clone_or_copy_file(src, dst)
+                with open(dst, 'rb') as f:
+                    self.assertEqual(f.read(), data)
+
+    def test_wrap_extract_tar(self) -> None:
+        import tarfile
+        from mesonbuild.wrap import wrap
+
+        def make_tar(path: str, members: T.List[tarfile.TarInfo]) -> None:
+            with tarfile.open(path, 'w') as tf:
+                for member in members:
+                    tf.addfile(member, io.BytesIO(b'x' * member.size))
+
+        def member(name: str, linkname: T.Optional[str] = None) -> tarfile.TarInfo:
+            info = tarfile.TarInfo(name)
+            if linkname is None:
+                info.size = 1
+            else:
+                info.type = tarfile.SYMTYPE
+                info.linkname = linkname
+            return info
+
+        for have_filters in sorted({False, wrap.HAVE_TAR_FILTERS}):
+            with tempfile.TemporaryDirectory() as tmpdir, \
+                    mock.patch.object(wrap, 'HAVE_TAR_FILTERS', have_filters):
+                dest = os.path.join(tmpdir, 'dest')
+                os.mkdir(dest)
+                archive = os.path.join(tmpdir, 'good.tar')
+                make_tar(archive, [member('foo/a.txt'), member('foo/link', 'a.txt')])
+                with tarfile.open(archive) as tf:
+                    wrap.extract_tar(tf, dest)
+                self.assertTrue(os.path.isfile(os.path.join(dest, 'foo', 'link')))
+
+                for i, bad in enumerate([member('../evil.txt'), member('foo/../../evil.txt'),
+                                         member('evil', '../../evil.txt')]):
+                    archive = os.path.join(tmpdir, f'bad{i}.tar')
+                    make_tar(archive, [bad])
+                    with tarfile.open(archive) as tf, self.assertRaises((tarfile.TarError, wrap.WrapException)):
+                        wrap.extract_tar(tf, dest)
+                    self.assertEqual(os.listdir(tmpdir).count('evil.txt'), 0)
+
+    def test_wrapdb_releases_conditional_request(self) -> None:
+        from mesonbuild.wrap import wrap
+        from email.message import Message
+        payload = json.dumps({'zlib': {'versions': ['1.3.1-1']}}).encode()
+
+        def response(code: int, headers: T.Dict[str, str], body: bytes) -> mock.Mock:
+            resp = mock.Mock()
+            resp.getcode.return_value = code
+            resp.headers = Message()
+            for k, v in headers.items():
+                resp.headers[k] = v
+            resp.read.return_value = body
+            return resp
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+                mock.patch.dict(os.environ, {'MESON_WRAP_CACHE_DIR': tmpdir}):
+            with mock.patch('mesonbuild.wrap.wrap.open_wrapdburl',
+                            return_value=response(200, {'ETag': '"abc"'}, payload)) as opener:
+                self.assertEqual(wrap.get_releases_data(False), payload)
+                self.assertEqual(opener.call_args[1]['headers'], {})
+            with mock.patch('mesonbuild.wrap.wrap.open_wrapdburl',
+                            return_value=response(304, {}, b'')) as opener:
+                self.assertEqual(wrap.get_releases_data(False), payload)
+                self.assertEqual(opener.call_args[1]['headers'], {'If-None-Match': '"abc"'})
+
     def test_env2mfile_deb(self) -> None:
         MachineInfo = mesonbuild.scripts.env2mfile.MachineInfo
         to_machine_info = mesonbuild.scripts.env2mfile.dpkg_architecture_to_machine_info
@@ -2,6 +2,7 @@
 # Copyright 2016-2022 The Meson development team
 
 import stat
+import tarfile
 import subprocess
 import re
 import tempfile
@@ -692,6 +693,50 @@ class LinuxlikeTests(BasePlatformTests):
         # FIXME: also verify the files list
         self.introspect('--installed')
 
+    def test_install_archive(self):
+        '''
+        Test that installing into an archive gives the same files, with the
+        same permissions, as installing into a DESTDIR.
+        '''
+        testdir = self.copy_srcdir(os.path.join(self.common_test_dir, '190 install_mode'))
+        os.symlink('../../nonexistent.txt', os.path.join(testdir, 'sub2', 'invalid-symlink.txt'))
+        self.init(testdir)
+        self.build()
+        self._run(self.meson_command + ['install', '--strip', '--destdir', self.installdir], workdir=self.builddir)
+        with open(os.path.join(self.logdir, 'install-log.txt'), encoding='utf-8') as f:
+            install_log = list(f)
+        # The DESTDIR itself is logged when it is created
+        destdir_log = [l.replace(self.installdir, '') for l in install_log if l.strip() != self.installdir]
+
+        archive = os.path.join(self.builddir, 'install.tar.gz')
+        self._run(self.meson_command + ['install', '--strip', '--archive', archive], workdir=self.builddir)
+        with open(os.path.join(self.logdir, 'archive-log.txt'), encoding='utf-8') as f:
+            self.assertEqual(destdir_log, list(f))
+        # The log used by `meson uninstall` is left untouched
+        with open(os.path.join(self.logdir, 'install-log.txt'), encoding='utf-8') as f:
+            self.assertEqual(install_log, list(f))
+
+        installed = {}
+        for root, dirs, files in os.walk(self.installdir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                installed[os.path.relpath(path, self.installdir)] = path
+        with tarfile.open(archive) as tf:
+            members = tf.getmembers()
+            self.assertEqual(sorted(installed), [m.name for m in members])
+            for m in members:
+                path = installed[m.name]
+                st = os.lstat(path)
+                self.assertEqual(stat.S_IMODE(st.st_mode) if not m.issym() else 0o777, m.mode, msg=m.name)
+                if m.issym():
+                    self.assertEqual(os.readlink(path), m.linkname)
+                elif m.isfile():
+                    self.assertTrue(stat.S_ISREG(st.st_mode), msg=m.name)
+                    with open(path, 'rb') as f:
+                        self.assertEqual(f.read(), tf.extractfile(m).read(), msg=m.name)
+                else:
+                    self.assertTrue(m.isdir() and stat.S_ISDIR(st.st_mode), msg=m.name)
+
     def test_install_umask(self):
         '''
         Test that files are installed with correct permissions using default
@@ -1722,6 +1767,38 @@ class LinuxlikeTests(BasePlatformTests):
         windows_proof_rmtree(os.path.join(testdir, 'subprojects', 'foo'))
         os.unlink(wrap_filename)
 
+    def test_wrap_shared_cache(self):
+        testdir = os.path.join(self.unit_test_dir, '72 wrap file url')
+        basedir = self.builddir
+        cachedir = os.path.join(basedir, 'wrapcache')
+        hashes = {}
+        for name in ['foo.tar.xz', 'foo-patch.tar.xz']:
+            hashes[name] = self.compute_sha256(os.path.join(testdir, 'subprojects', name))
+        outputs = []
+        for i, urldir in enumerate([os.path.join(testdir, 'subprojects'), '/nonexistent']):
+            srcdir = os.path.join(basedir, f'srctree{i}')
+            os.mkdir(srcdir)
+            shutil.copy(os.path.join(testdir, 'meson.build'), srcdir)
+            os.mkdir(os.path.join(srcdir, 'subprojects'))
+            with open(os.path.join(srcdir, 'subprojects', 'foo.wrap'), 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent(f'''\
+                    [wrap-file]
+                    directory = foo
+                    source_url = file://{urldir}/foo.tar.xz
+                    source_filename = foo.tar.xz
+                    source_hash = {hashes['foo.tar.xz']}
+                    patch_url = file://{urldir}/foo-patch.tar.xz
+                    patch_filename = foo-patch.tar.xz
+                    patch_hash = {hashes['foo-patch.tar.xz']}
+                    '''))
+            self.change_builddir(os.path.join(srcdir, '_build'))
+            outputs.append(self.init(srcdir, override_envvars={'MESON_WRAP_CACHE_DIR': cachedir}))
+        self.assertIn('Downloading foo source', outputs[0])
+        # The second project is only able to get its files from the shared cache
+        self.assertIn('Using foo source from the shared wrap cache.', outputs[1])
+        self.assertIn('Using foo patch from the shared wrap cache.', outputs[1])
+        self.assertTrue(os.path.isfile(os.path.join(cachedir, 'sha256', hashes['foo.tar.xz'][:2], hashes['foo.tar.xz'])))
+
     def test_no_rpath_for_static(self):
         testdir = os.path.join(self.common_test_dir, '5 linkstatic')
         self.init(testdir)
@@ -1992,3 +2069,29 @@ class LinuxlikeTests(BasePlatformTests):
                     self.assertRegex(out, 'value *: *' + expected)
                 finally:
                     self.wipe()
+
+    @skip_if_not_language('c')
+    def test_elf_symbols_match_tools(self):
+        '''
+        Test that the symbols read from the ELF file are the same as those
+        listed by readelf and nm, so that switching between the two does not
+        cause relinking.
+        '''
+        if not shutil.which('readelf') or not shutil.which('nm'):
+            raise SkipTest('readelf or nm not found')
+        testdir = os.path.join(self.unit_test_dir, '133 elf symbols')
+        self.init(testdir)
+        self.build()
+        from mesonbuild.scripts import symbolextractor
+        lib = os.path.join(self.builddir, 'libelfsyms.so.1')
+        symbols = os.path.join(self.builddir, 'libelfsyms.so.1.p', 'libelfsyms.so.1.symbols')
+        with open(symbols, encoding='utf-8') as f:
+            native = f.read()
+        self.assertIn('ELFSYMS_2.0', native)
+        self.assertIn('(SONAME)', native)
+        tools = os.path.join(self.builddir, 'tools.symbols')
+        symbolextractor.TOOL_WARNING_FILE = os.path.join(self.privatedir, 'symbolextractor_tool_warning_printed')
+        with mock.patch.dict(os.environ, {'NM': 'nm'}):
+            symbolextractor.gnu_syms(lib, tools)
+        with open(tools, encoding='utf-8') as f:
+            self.assertEqual(native, f.read())
@@ -3,20 +3,27 @@
 # Copyright © 2024-2025 Intel Corporation
 
 from __future__ import annotations
+import functools
+import hashlib
+import http.server
 import json
 import os
 import pickle
+import socket
 import subprocess
 import tempfile
 import subprocess
 import textwrap
+import threading
+import time
 import shutil
 from unittest import skipIf, SkipTest
 from pathlib import Path
 
 from .baseplatformtests import BasePlatformTests
 from .helpers import is_ci
-from mesonbuild.mesonlib import EnvironmentVariables, ExecutableSerialisation, MesonException, is_linux, python_command, windows_proof_rmtree
+from mesonbuild.backend import backends
+from mesonbuild.mesonlib import EnvironmentVariables, ExecutableSerialisation, MesonException, is_linux, is_windows, python_command, windows_proof_rmtree
 from mesonbuild.mformat import Formatter, match_path
 from mesonbuild.optinterpreter import OptionInterpreter, OptionException
 from mesonbuild.options import OptionStore
@@ -266,17 +273,75 @@ class PlatformAgnosticTests(BasePlatformTests):
         meson_modules = [m for m in all_modules if m.startswith('mesonbuild')]
         expected_meson_modules = [
             'mesonbuild',
-            'mesonbuild._pathlib',
             'mesonbuild.utils',
             'mesonbuild.utils.core',
             'mesonbuild.mesonmain',
-            'mesonbuild.mlog',
             'mesonbuild.scripts',
             'mesonbuild.scripts.meson_exe',
             'mesonbuild.scripts.test_loaded_modules'
         ]
+        if is_windows():
+            expected_meson_modules.append('mesonbuild._pathlib')
         self.assertEqual(sorted(expected_meson_modules), sorted(meson_modules))
 
+    def test_internal_scripts_loaded_modules(self):
+        '''
+        The scripts run by the backends for many build steps must not load
+        the parts of Meson that are only needed to configure a project.
+        Whether or not the script succeeds with the given arguments does not
+        matter, the modules are listed on exit.
+        '''
+        if not self.meson_command[-1].endswith('.py'):
+            raise SkipTest('Needs to run meson.py')
+        code = textwrap.dedent('''
+            import atexit, runpy, sys
+            atexit.register(lambda: print(' '.join(sys.modules), file=sys.stderr))
+            sys.argv = sys.argv[1:]
+            runpy.run_path(sys.argv[0], run_name='__main__')
+            ''')
+        scripts = {
+            'copy': ['src', 'dst'],
+            'delsuffix': [self.builddir, '.xyz'],
+            'depaccumulate': ['out.dd', 'in.json'],
+            'depscan': ['in.json', 'out.dd', 'c'],
+            'exe': ['--capture', 'out.txt', '--'] + python_command + ['-c', 'pass'],
+            'headerscan': ['out.dd', 'out.d', 'in.dat'],
+            'regencheck': [self.builddir],
+            'symbolextractor': [self.builddir, 'libfoo.so', 'libfoo.so', 'libfoo.so.symbols'],
+            'vcstagger': ['in', 'out', 'fallback', '.', 'REPLACE', 'x', 'true'],
+        }
+        forbidden = {'mesonbuild.backend', 'mesonbuild.build', 'mesonbuild.compilers',
+                     'mesonbuild.coredata', 'mesonbuild.environment', 'mesonbuild.interpreter',
+                     'mesonbuild.mparser', 'mesonbuild.options'}
+        for script, args in scripts.items():
+            with self.subTest(script=script):
+                p = subprocess.run(python_command + ['-c', code, self.meson_command[-1], '--internal', script] + args,
+                                   cwd=self.builddir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+                modules = set(p.stderr.splitlines()[-1].split())
+                self.assertIn('mesonbuild.mesonmain', modules)
+                self.assertEqual(sorted(modules & forbidden), [])
+
+    def test_exe_launcher_loaded_modules(self):
+        '''
+        The launcher used for custom targets and generators instead of
+        `meson --internal exe` must not import anything from meson, nor the
+        modules that make Python startup noticeably slower.
+        '''
+        launcher = backends.Backend.get_exe_launcher_command()
+        if launcher is None:
+            raise SkipTest('The launcher is not used by frozen meson')
+        capture = Path(self.builddir, 'out.txt')
+        p = subprocess.run(launcher[:1] + ['-X', 'importtime'] + launcher[1:] +
+                           ['--capture', str(capture), '--'] + python_command + ['-c', 'print("hello")'],
+                           stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(capture.read_text(encoding='utf-8').strip(), 'hello')
+        modules = {l.rsplit('|', 1)[-1].strip() for l in p.stderr.splitlines() if l.startswith('import time:')}
+        self.assertIn('subprocess', modules)
+        self.assertEqual([m for m in modules if m.startswith('mesonbuild')], [])
+        for m in ['argparse', 'pickle', 'json', 'typing', 'site']:
+            self.assertNotIn(m, modules)
+
     def test_setup_loaded_modules(self):
         '''
         Execute a very basic meson.build and capture a list of all python
@@ -310,6 +375,146 @@ class PlatformAgnosticTests(BasePlatformTests):
         self.change_builddir(builddir)
         self.init(srcdir, override_envvars={'MESON_PACKAGE_CACHE_DIR': os.path.join(srcdir, 'cache_dir')})
 
+    def test_wrap_prefetch(self):
+        testdir = os.path.join(self.unit_test_dir, '72 wrap file url')
+        srcdir = os.path.join(self.builddir, 'srctree')
+        shutil.copytree(testdir, srcdir)
+        builddir = os.path.join(srcdir, '_build')
+        self.change_builddir(builddir)
+
+        class QuietHandler(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        handler = functools.partial(QuietHandler, directory=os.path.join(testdir, 'subprojects'))
+        with http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler) as server:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            url = f'http://127.0.0.1:{server.server_address[1]}'
+            hashes = {}
+            for name in ['foo.tar.xz', 'foo-patch.tar.xz']:
+                with open(os.path.join(testdir, 'subprojects', name), 'rb') as f:
+                    hashes[name] = hashlib.sha256(f.read()).hexdigest()
+            with open(os.path.join(srcdir, 'subprojects', 'foo.wrap'), 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent(f'''\
+                    [wrap-file]
+                    directory = foo
+                    source_url = {url}/foo.tar.xz
+                    source_filename = foo.tar.xz
+                    source_hash = {hashes['foo.tar.xz']}
+                    patch_url = {url}/foo-patch.tar.xz
+                    patch_filename = foo-patch.tar.xz
+                    patch_hash = {hashes['foo-patch.tar.xz']}
+                    '''))
+            try:
+                out = self.init(srcdir, extra_args=['--wrap-prefetch'])
+            finally:
+                server.shutdown()
+        self.assertIn('Using prefetched foo', out)
+        self.assertTrue(os.path.isfile(os.path.join(srcdir, 'subprojects', 'foo', 'meson.build')))
+        # Nothing is left behind in the staging area
+        cachedir = os.path.join(srcdir, 'subprojects', 'packagecache')
+        self.assertEqual(sorted(os.listdir(cachedir)), ['foo-patch.tar.xz', 'foo.tar.xz'])
+        self.build()
+        self.run_tests()
+
+    def test_wrap_prefetch_configure_error(self):
+        '''
+        A failed configure does not wait for the downloads of the wraps
+        being prefetched, including their retries.
+        '''
+        srcdir = os.path.join(self.builddir, 'srctree')
+        os.makedirs(os.path.join(srcdir, 'subprojects'))
+        with open(os.path.join(srcdir, 'meson.build'), 'w', encoding='utf-8') as f:
+            f.write("project('prefetch error')\nerror('boom')\n")
+        # Nothing listens on the port of a closed socket
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        for i in range(3):
+            with open(os.path.join(srcdir, 'subprojects', f'foo{i}.wrap'), 'w', encoding='utf-8') as f:
+                f.write(textwrap.dedent(f'''\
+                    [wrap-file]
+                    directory = foo{i}
+                    source_url = http://127.0.0.1:{port}/foo{i}.tar.xz
+                    source_filename = foo{i}.tar.xz
+                    source_hash = {'0' * 64}
+                    '''))
+        self.change_builddir(os.path.join(srcdir, '_build'))
+        start = time.monotonic()
+        out = self.init(srcdir, extra_args=['--wrap-prefetch'], allow_fail=True)
+        self.assertIn('ERROR: Problem encountered: boom', out)
+        # Each download is retried for more than 30 seconds
+        self.assertLess(time.monotonic() - start, 20)
+
+    def test_wrap_download_resume(self):
+        from mesonbuild.wrap.wrap import Resolver
+        data = os.urandom(256 * 1024)
+        requests = []
+
+        class FlakyHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                requests.append(self.headers.get('Range'))
+                if self.headers.get('Range'):
+                    start = int(self.headers['Range'][len('bytes='):-1])
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+                    self.send_header('Content-Length', str(len(data) - start))
+                    self.end_headers()
+                    self.wfile.write(data[start:])
+                else:
+                    # Drop the connection in the middle of the download
+                    self.send_response(200)
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data[:len(data) // 2])
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        srcdir = os.path.join(self.builddir, 'srctree')
+        os.makedirs(os.path.join(srcdir, 'subprojects', 'packagecache'))
+        resolver = Resolver(srcdir, 'subprojects', silent=True)
+        with http.server.ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler) as server:
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            try:
+                dhash, fname = resolver.get_data_with_backoff(f'http://127.0.0.1:{server.server_address[1]}/foo.tar')
+            finally:
+                server.shutdown()
+        self.assertEqual(requests, [None, f'bytes={len(data) // 2}-'])
+        self.assertEqual(dhash, hashlib.sha256(data).hexdigest())
+        with open(fname, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_wrap_unpack_verifies_hash(self):
+        testdir = os.path.join(self.unit_test_dir, '72 wrap file url')
+        srcdir = os.path.join(self.builddir, 'srctree')
+        shutil.copytree(testdir, srcdir)
+        os.rename(os.path.join(srcdir, 'subprojects'), os.path.join(srcdir, 'archives'))
+        os.makedirs(os.path.join(srcdir, 'subprojects', 'packagecache'))
+        shutil.copy(os.path.join(srcdir, 'archives', 'foo.tar.xz'), os.path.join(srcdir, 'subprojects', 'packagecache'))
+        with open(os.path.join(srcdir, 'subprojects', 'foo.wrap'), 'w', encoding='utf-8') as f:
+            f.write(textwrap.dedent(f'''\
+                [wrap-file]
+                directory = foo
+                source_url = http://server.invalid/foo.tar.xz
+                source_filename = foo.tar.xz
+                source_hash = {'0' * 64}
+                patch_directory = foo
+                '''))
+        self.change_builddir(os.path.join(srcdir, '_build'))
+        cachedir = os.path.join(self.builddir, 'wrapcache')
+        out = self.init(srcdir, allow_fail=True, override_envvars={'MESON_WRAP_CACHE_DIR': cachedir})
+        self.assertIn('Incorrect hash for source', out)
+        # Nothing has been extracted
+        self.assertEqual(set(os.listdir(os.path.join(srcdir, 'subprojects'))) - {'.wraplock'}, {'foo.wrap', 'packagecache'})
+        # The unverified archive has not been added to the shared cache
+        self.assertFalse(os.path.exists(os.path.join(cachedir, 'sha256')))
+
     def test_cmake_openssl_not_found_bug(self):
         """Issue #12098"""
         testdir = os.path.join(self.unit_test_dir, '119 openssl cmake bug')
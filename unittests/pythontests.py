@@ -92,6 +92,31 @@ python = pymod.find_installation('python3', required: true)
             raise self.skipTest('python2 installed, already tested')
         self._test_bytecompile()
 
+    def test_bytecompile_up_to_date(self):
+        testdir = self.copy_srcdir(os.path.join(self.src_root, 'test cases', 'python', '2 extmodule'))
+        self.init(testdir, extra_args=['-Dpython2=disabled', '-Dpython.bytecompile=2'])
+        self.build()
+        # 5 files x 3 optimization levels, compiled in parallel
+        out = self.install(override_envvars={'MESON_NUM_PROCESSES': '2'})
+        self.assertRegex(out, r'Byte-compiled 15 files, skipped 0 up to date, in [0-9.]+s with 2 processes')
+
+        # The installed sources keep their modification time, the .pyc
+        # files are still up to date
+        out = self.install()
+        self.assertRegex(out, r'Byte-compiled 0 files, skipped 15 up to date')
+
+        with open(os.path.join(testdir, 'subinst', 'printer.py'), 'a', encoding='utf-8') as f:
+            f.write('# changed\n')
+        out = self.install(override_envvars={'MESON_NUM_PROCESSES': '1'})
+        self.assertRegex(out, r'Byte-compiled 3 files, skipped 12 up to date')
+
+        # meson install -j takes precedence over the environment
+        with open(os.path.join(testdir, 'subinst', 'printer.py'), 'a', encoding='utf-8') as f:
+            f.write('# changed again\n')
+        out = self._run(self.meson_command + ['install', '-j', '2'], workdir=self.builddir,
+                        override_envvars={'MESON_NUM_PROCESSES': '1', 'DESTDIR': self.installdir})
+        self.assertRegex(out, r'Byte-compiled 3 files, skipped 12 up to date, in [0-9.]+s with 2 processes')
+
     def test_limited_api_linked_correct_lib(self):
         if not is_windows():
             return self.skipTest('Test only run on Windows.')
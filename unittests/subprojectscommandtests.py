@@ -118,8 +118,9 @@ class SubprojectsCommandTests(BasePlatformTests):
                 '''))
         Path(self.packagecache_dir / tarball).touch()
 
-    def _subprojects_cmd(self, args):
-        return self._run(self.meson_command + ['subprojects'] + args, workdir=str(self.project_dir))
+    def _subprojects_cmd(self, args, override_envvars=None):
+        return self._run(self.meson_command + ['subprojects'] + args, workdir=str(self.project_dir),
+                         override_envvars=override_envvars)
 
     def test_git_update(self):
         subp_name = 'sub1'
@@ -219,6 +220,41 @@ class SubprojectsCommandTests(BasePlatformTests):
         self.assertPathExists(str(self.subprojects_dir / subp_name))
         self._git_config(self.subprojects_dir / subp_name)
 
+    def test_git_shared_mirror(self):
+        cache_dir = self.root_dir / 'cache'
+        env = {'MESON_WRAP_CACHE_DIR': str(cache_dir)}
+        subp_name = 'sub1'
+        self._git_create_remote_repo(subp_name)
+        self._wrap_create_git(subp_name)
+
+        # The clone borrows its objects from a bare mirror in the cache
+        self._subprojects_cmd(['download'], override_envvars=env)
+        alternates = self.subprojects_dir / subp_name / '.git' / 'objects' / 'info' / 'alternates'
+        mirror = Path(alternates.read_text(encoding='utf-8').strip()).parent
+        self.assertEqual(mirror.parent.parent, cache_dir / 'git')
+        self.assertEqual(self._git(['rev-parse', 'master'], mirror), self._git_remote_commit(subp_name))
+
+        # Updating refreshes the mirror and reports what was fetched
+        self._git_create_remote_branch(subp_name, 'newbranch')
+        self._wrap_create_git(subp_name, 'newbranch')
+        out = self._subprojects_cmd(['update', '--reset'], override_envvars=env)
+        self.assertIn('-> Fetched', out)
+        self.assertIn('from 1 git remote(s)', out)
+        self.assertEqual(self._git(['rev-parse', 'newbranch'], mirror),
+                         self._git_remote_commit(subp_name, 'newbranch'))
+        self.assertEqual(self._git_local_commit(subp_name), self._git_remote_commit(subp_name, 'newbranch'))
+
+        # Shallow clones do not download the full history into a mirror
+        subp_name = 'sub2'
+        self._git_create_remote_repo(subp_name)
+        self._wrap_create_git(subp_name, depth='1')
+        self._subprojects_cmd(['download'], override_envvars=env)
+        self._subprojects_cmd(['update', '--reset'], override_envvars=env)
+        self.assertEqual(self._git_local_commit(subp_name), self._git_remote_commit(subp_name))
+        alternates = self.subprojects_dir / subp_name / '.git' / 'objects' / 'info' / 'alternates'
+        self.assertPathDoesNotExist(str(alternates))
+        self.assertEqual(list((cache_dir / 'git').glob('*/*.git')), [mirror])
+
     @skipIfNoExecutable('true')
     def test_foreach(self):
         self._create_project(self.subprojects_dir / 'sub_file')